@@ -1,3 +1,4 @@
+from asgiref.sync import sync_to_async
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -6,6 +7,9 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 from diet_plans.models import DietPlan
+from jobs.serializers import JobSerializer
+from smartfit import images
+from smartfit.asyncapi import AsyncAPIViewMixin
 from .serializers import (
     UserSerializer,
     UserCreateSerializer,
@@ -40,7 +44,7 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        return User.objects.with_profile_details().get(pk=self.request.user.pk)
 
     def update(self, request, *args, **kwargs):
         user = self.get_object()
@@ -48,8 +52,30 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         serializer.is_valid(raise_exception=True)
         serializer.save()
 
-        # Return updated user data
-        return Response(UserSerializer(user).data)
+        # Return updated user data, with the jobs processing a new image
+        data = UserSerializer(user).data
+        data['jobs'] = JobSerializer(
+            images.upload_jobs(user.profile), many=True,
+            context=self.get_serializer_context()
+        ).data
+        return Response(data)
+
+class UserProfileAsyncView(AsyncAPIViewMixin, UserProfileView):
+    """
+    Async version of UserProfileView, served under ASGI. Reads use the
+    async ORM; updates save uploads and queue jobs, so they keep running
+    in a worker thread.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        user = await User.objects.with_profile_details().aget(pk=request.user.pk)
+        return Response(self.get_serializer(user).data)
+
+    async def put(self, request, *args, **kwargs):
+        return await sync_to_async(self.update)(request, *args, **kwargs)
+
+    async def patch(self, request, *args, **kwargs):
+        return await sync_to_async(self.partial_update)(request, *args, **kwargs)
 
 class ChangePasswordView(generics.UpdateAPIView):
     serializer_class = ChangePasswordSerializer
@@ -125,12 +151,19 @@ class BodyMeasurementsUpdateView(generics.UpdateAPIView):
         serializer.is_valid(raise_exception=True)
         serializer.save()
 
-        # Return updated user data with profile
+        # Return updated user data with profile, and the jobs processing
+        # the photo, which clients can poll
         return Response({
             'message': ('Your body measurements have been updated successfully. '
                         'These measurements will help us create a personalized '
                         'fitness plan for you.'),
-            'user': UserSerializer(request.user).data
+            'user': UserSerializer(
+                User.objects.with_profile_details().get(pk=request.user.pk)
+            ).data,
+            'jobs': JobSerializer(
+                images.upload_jobs(profile), many=True,
+                context=self.get_serializer_context()
+            ).data
         }, status=status.HTTP_200_OK)
 
 
@@ -159,7 +192,9 @@ class DietPlanSelectionView(generics.UpdateAPIView):
 
             return Response({
                 'message': f'You have successfully selected the "{diet_plan.name}" diet plan.',
-                'user': UserSerializer(request.user).data
+                'user': UserSerializer(
+                    User.objects.with_profile_details().get(pk=request.user.pk)
+                ).data
             }, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        from smartfit import images
+        from .models import Profile
+
+        images.register(Profile, 'image', strip_metadata=True)
+        images.register(Profile, 'body_photo', strip_metadata=True, renditions=False)
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Prefetch
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.utils.translation import gettext_lazy as _
 from diet_plans.models import DietPlan
@@ -26,6 +27,13 @@ class UserManager(BaseUserManager):
             raise ValueError(_('Superuser must have is_superuser=True.'))
         return self.create_user(email, name, password, **extra_fields)
 
+    def with_profile_details(self):
+        """Load users with their profile and selected plans, including plan counts"""
+        return self.select_related('profile').prefetch_related(
+            Prefetch('profile__diet_plan', queryset=DietPlan.objects.with_weeks_count()),
+            Prefetch('profile__workout_plan', queryset=WorkoutPlan.objects.with_days_count()),
+        )
+
 # Custom User Model
 class User(AbstractUser):
     username = None
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from smartfit.images import RenditionsField
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from .models import Profile, Gender, FitnessGoal
@@ -12,12 +13,13 @@ class ProfileSerializer(serializers.ModelSerializer):
     fitness_goal_display = serializers.CharField(source='get_fitness_goal_display', read_only=True)
     diet_plan_details = DietPlanListSerializer(source='diet_plan', read_only=True)
     workout_plan_details = WorkoutPlanListSerializer(source='workout_plan', read_only=True)
+    image_renditions = RenditionsField(source='image')
 
     class Meta:
         model = Profile
         fields = [
-            'id', 'image', 'age', 'gender', 'gender_display', 'fitness_goal',
-            'fitness_goal_display', 'diet_plan', 'diet_plan_details',
+            'id', 'image', 'image_renditions', 'age', 'gender', 'gender_display',
+            'fitness_goal', 'fitness_goal_display', 'diet_plan', 'diet_plan_details',
             'workout_plan', 'workout_plan_details', 'height', 'weight',
             'waist_circumference', 'hip_circumference', 'chest_circumference',
             'arm_circumference', 'thigh_circumference', 'neck_circumference',
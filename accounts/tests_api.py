@@ -3,6 +3,8 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from diet_plans.models import DietPlan, DietPlanWeek
+from workouts.models import WorkoutPlan, WorkoutDay
 from .models import Profile, Gender, FitnessGoal
 
 User = get_user_model()
@@ -69,6 +71,32 @@ class AccountsAPITests(TestCase):
         self.assertEqual(response.data['name'], self.test_user.name)
         self.assertIn('profile', response.data)
 
+    def test_get_profile_with_selected_plans(self):
+        """Test that the profile embeds the selected plans and their counts"""
+        diet_plan = DietPlan.objects.create(name='Cut', description='Cutting plan')
+        for week_number in range(1, 4):
+            DietPlanWeek.objects.create(diet_plan=diet_plan, week_number=week_number)
+        workout_plan = WorkoutPlan.objects.create(name='Split', description='Split plan')
+        for day_number in range(1, 6):
+            WorkoutDay.objects.create(
+                workout_plan=workout_plan,
+                day_number=day_number,
+                name=f'Day {day_number}'
+            )
+        profile = self.test_user.profile
+        profile.diet_plan = diet_plan
+        profile.workout_plan = workout_plan
+        profile.save()
+
+        self.client.force_authenticate(user=self.test_user)
+
+        # User with profile, diet plan with weeks count, workout plan with days count
+        with self.assertNumQueries(3):
+            response = self.client.get(self.profile_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['profile']['diet_plan_details']['weeks_count'], 3)
+        self.assertEqual(response.data['profile']['workout_plan_details']['days_count'], 5)
+
     def test_update_profile(self):
         """Test updating user profile"""
         # Authenticate
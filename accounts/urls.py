@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from smartfit.asyncapi import select_view
 from . import views
 from . import api
 
@@ -14,7 +15,7 @@ api_urlpatterns = [
     path('logout/', api.LogoutView.as_view(), name='logout'),
 
     # User profile endpoints
-    path('profile/', api.UserProfileView.as_view(), name='profile'),
+    path('profile/', select_view(api.UserProfileView, api.UserProfileAsyncView), name='profile'),
     path('change-password/', api.ChangePasswordView.as_view(), name='change_password'),
     path('body-measurements/', api.BodyMeasurementsUpdateView.as_view(), name='body_measurements'),
     path('select-diet-plan/', api.DietPlanSelectionView.as_view(), name='select_diet_plan'),
@@ -1,6 +1,8 @@
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
+from jobs.serializers import JobSerializer
+from smartfit import images
 from .models import ContactForm, Subscription, BodyMeasurements
 from .serializers import (
     ContactFormSerializer,
@@ -77,7 +79,11 @@ class BodyMeasurementsCreateView(generics.CreateAPIView):
                 'message': ('Thank you for submitting your body measurements. '
                             'This information will help us create a '
                             'personalized fitness plan for you.'),
-                'data': serializer.data
+                'data': serializer.data,
+                'jobs': JobSerializer(
+                    images.upload_jobs(serializer.instance), many=True,
+                    context=self.get_serializer_context()
+                ).data
             },
             status=status.HTTP_201_CREATED,
             headers=headers
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AdditionalFormsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'additional_forms'
+
+    def ready(self):
+        from smartfit import images
+        from .models import BodyMeasurements
+
+        images.register(BodyMeasurements, 'photo', strip_metadata=True, renditions=False)
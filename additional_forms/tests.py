@@ -1,6 +1,13 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from io import StringIO
+from PIL import Image
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from jobs.models import JobStatus
 from rest_framework.test import APIClient
 from rest_framework import status
 from .models import ContactForm, QueryType, Subscription, BodyMeasurements
@@ -164,4 +171,48 @@ class BodyMeasurementsAPITests(TestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertEqual(BodyMeasurements.objects.count(), 0)
\ No newline at end of file
+        self.assertEqual(BodyMeasurements.objects.count(), 0)
+
+
+class BodyMeasurementsPhotoProcessingTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.client = APIClient()
+        self.body_measurements_url = reverse('additional_forms:api:body_measurements')
+
+        # A photo with the location it was taken at in its EXIF data
+        exif = Image.Exif()
+        exif[0x010F] = 'PhoneMaker'
+        exif[0x8825] = {1: 'N', 2: (30.0, 2.0, 40.0)}
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 48), (90, 90, 90)).save(buffer, 'JPEG', exif=exif)
+        self.photo = SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_photo_metadata_is_removed_in_the_background(self):
+        """Test that the upload returns a job that strips the photo's metadata"""
+        response = self.client.post(self.body_measurements_url, {
+            'name': 'Test User',
+            'email': 'test@example.com',
+            'photo': self.photo,
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        [job] = response.data['jobs']
+        self.assertEqual(job['status'], JobStatus.PENDING)
+        body = BodyMeasurements.objects.get()
+        with Image.open(body.photo.path) as image:
+            self.assertTrue(image.getexif())
+
+        call_command('run_worker', '--burst', stdout=StringIO())
+
+        response = self.client.get(job['url'])
+        self.assertEqual(response.data['data']['status'], JobStatus.SUCCEEDED)
+        self.assertTrue(response.data['data']['result']['metadata_removed'])
+        with Image.open(body.photo.path) as image:
+            self.assertFalse(image.getexif())
+            self.assertEqual(image.size, (64, 48))
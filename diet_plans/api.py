@@ -1,5 +1,8 @@
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
+from smartfit.cache import CatalogCacheMixin
+from smartfit.conditional import ConditionalGetMixin
+from smartfit.fieldsets import SparseFieldsetMixin
 from .models import DietPlan, DietPlanWeek, DietPlanMeal
 from .serializers import (
     DietPlanListSerializer,
@@ -7,36 +10,47 @@ from .serializers import (
 )
 
 
-class DietPlanListView(generics.ListAPIView):
+class DietPlanListView(SparseFieldsetMixin, CatalogCacheMixin, generics.ListAPIView):
     """
     API view to list all diet plans
     """
-    queryset = DietPlan.objects.all()
+    queryset = DietPlan.objects.with_weeks_count()
     serializer_class = DietPlanListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    list_message = 'Diet plans retrieved successfully'
+    cache_namespace = 'diet_plans'
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
         
         # Apply category filter if provided
-        category = request.query_params.get('category', None)
+        category = self.request.query_params.get('category', None)
         if category:
             queryset = queryset.filter(category=category)
-            
-        serializer = self.get_serializer(queryset, many=True)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
         return Response({
-            'message': 'Diet plans retrieved successfully',
-            'data': serializer.data
+            'message': self.list_message,
+            'data': serializer.data,
+            'pagination': self.paginator.get_pagination_data()
         })
 
 
-class DietPlanDetailView(generics.RetrieveAPIView):
+class DietPlanDetailView(ConditionalGetMixin, CatalogCacheMixin, generics.RetrieveAPIView):
     """
     API view to retrieve a specific diet plan with all its details
     """
-    queryset = DietPlan.objects.all()
+    # Load the whole plan tree up front: plan, weeks and their meals,
+    # regardless of the number of weeks
+    queryset = DietPlan.objects.prefetch_related('weeks__meals')
     serializer_class = DietPlanDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_namespace = 'diet_plans'
+    freshness_paths = ('weeks', 'weeks__meals')
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
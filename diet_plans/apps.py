@@ -6,3 +6,11 @@ class DietPlansConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'diet_plans'
     verbose_name = _('Diet Plans')
+
+    def ready(self):
+        from smartfit import cache, images
+        from .models import DietPlan, DietPlanWeek, DietPlanMeal
+
+        cache.register('diet_plans', [DietPlan, DietPlanWeek, DietPlanMeal])
+        images.register(DietPlan, 'image')
+        images.register(DietPlanMeal, 'image')
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diet_plans', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dietplan',
+            index=models.Index(fields=['-created_at', '-id'], name='dietplan_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dietplan',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='dietplan_category_recent_idx'),
+        ),
+    ]
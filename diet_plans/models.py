@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 
 
@@ -29,6 +31,20 @@ class MealType(models.TextChoices):
     POST_WORKOUT = 'PT', _('Post-Workout')
 
 
+class DietPlanQuerySet(models.QuerySet):
+    """
+    QuerySet for diet plans
+    """
+    def with_weeks_count(self):
+        """Annotate each plan with the number of its weeks"""
+        # A correlated count rather than a join and GROUP BY, so a page of
+        # plans is read in index order and stops at the page size
+        weeks = DietPlanWeek.objects.filter(
+            diet_plan=OuterRef('pk')
+        ).order_by().values('diet_plan').annotate(count=Count('pk')).values('count')
+        return self.annotate(weeks_count=Coalesce(Subquery(weeks), 0))
+
+
 class DietPlan(models.Model):
     """
     Model for diet plans
@@ -50,10 +66,16 @@ class DietPlan(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = DietPlanQuerySet.as_manager()
+
     class Meta:
         verbose_name = _('Diet Plan')
         verbose_name_plural = _('Diet Plans')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='dietplan_recent_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], name='dietplan_category_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.get_category_display()}"
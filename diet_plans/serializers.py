@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from smartfit.fieldsets import SparseFieldsetSerializerMixin
+from smartfit.images import RenditionsField
 from .models import DietPlan, DietPlanWeek, DietPlanMeal
 
 
@@ -8,6 +10,7 @@ class DietPlanMealSerializer(serializers.ModelSerializer):
     """
     meal_type_display = serializers.CharField(source='get_meal_type_display', read_only=True)
     day_of_week_display = serializers.SerializerMethodField()
+    image_renditions = RenditionsField(source='image')
 
     class Meta:
         model = DietPlanMeal
@@ -15,7 +18,7 @@ class DietPlanMealSerializer(serializers.ModelSerializer):
             'id', 'meal_type', 'meal_type_display', 'day_of_week',
             'day_of_week_display', 'name', 'description', 'ingredients',
             'preparation', 'calories', 'protein', 'carbs', 'fat',
-            'image', 'created_at', 'updated_at'
+            'image', 'image_renditions', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
@@ -47,24 +50,32 @@ class DietPlanWeekSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class DietPlanListSerializer(serializers.ModelSerializer):
+class DietPlanListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for listing diet plans
     """
     category_display = serializers.CharField(source='get_category_display', read_only=True)
     weeks_count = serializers.SerializerMethodField()
+    image_renditions = RenditionsField(source='image')
 
     class Meta:
         model = DietPlan
         fields = [
             'id', 'name', 'description', 'category', 'category_display',
             'duration_weeks', 'calories_per_day', 'protein_percentage',
-            'carbs_percentage', 'fat_percentage', 'image',
+            'carbs_percentage', 'fat_percentage', 'image', 'image_renditions',
             'weeks_count', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+        slim_fields = ['id', 'name', 'image_renditions', 'calories_per_day', 'duration_weeks']
+        field_columns = {
+            'category_display': ['category'],
+        }
 
     def get_weeks_count(self, obj):
+        # Use the annotated count when the queryset provides it
+        if hasattr(obj, 'weeks_count'):
+            return obj.weeks_count
         return obj.weeks.count()
 
 
@@ -74,13 +85,14 @@ class DietPlanDetailSerializer(serializers.ModelSerializer):
     """
     category_display = serializers.CharField(source='get_category_display', read_only=True)
     weeks = DietPlanWeekSerializer(many=True, read_only=True)
+    image_renditions = RenditionsField(source='image')
 
     class Meta:
         model = DietPlan
         fields = [
             'id', 'name', 'description', 'category', 'category_display',
             'duration_weeks', 'calories_per_day', 'protein_percentage',
-            'carbs_percentage', 'fat_percentage', 'image',
+            'carbs_percentage', 'fat_percentage', 'image', 'image_renditions',
             'weeks', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
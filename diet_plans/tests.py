@@ -1,3 +1,191 @@
+from django.core.cache import caches
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from .models import DietPlan, DietPlanWeek, DietPlanMeal, MealType
 
-# Create your tests here.
+User = get_user_model()
+
+
+def create_diet_plan(weeks, name='Diet Plan'):
+    """Create a diet plan with the given number of weeks"""
+    plan = DietPlan.objects.create(name=name, description='Test diet plan')
+    for week_number in range(1, weeks + 1):
+        DietPlanWeek.objects.create(diet_plan=plan, week_number=week_number)
+    return plan
+
+
+class DietPlanListAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.list_url = reverse('diet_plans:api:list')
+        self.user = User.objects.create_user(
+            email='dieter@example.com',
+            name='Dieter',
+            password='DieterPassword123!'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_includes_weeks_count(self):
+        """Test that each listed plan reports its number of weeks"""
+        create_diet_plan(weeks=4, name='Four Weeks')
+        create_diet_plan(weeks=0, name='Empty')
+
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        weeks_counts = {plan['name']: plan['weeks_count'] for plan in response.data['data']}
+        self.assertEqual(weeks_counts, {'Four Weeks': 4, 'Empty': 0})
+
+    def test_list_query_count_is_constant(self):
+        """Test that the week counts are not queried once per plan"""
+        for index in range(10):
+            create_diet_plan(weeks=index % 4, name=f'Plan {index}')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.list_url)
+        self.assertEqual(len(response.data['data']), 10)
+
+
+class DietPlanCacheTests(TestCase):
+    def setUp(self):
+        caches['catalog'].clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='cached@example.com',
+            name='Cached',
+            password='CachedPassword123!'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.plan = create_diet_plan(weeks=2)
+        self.detail_url = reverse('diet_plans:api:detail', kwargs={'pk': self.plan.id})
+
+    def test_detail_is_served_from_cache(self):
+        """Test that a repeated detail request only runs the freshness check"""
+        first = self.client.get(self.detail_url)
+        self.assertEqual(first['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(1):
+            second = self.client.get(self.detail_url)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+
+    def test_detail_query_count_is_constant(self):
+        """Test that the detail query count does not grow with the number of weeks"""
+        # Freshness check, plan, weeks, meals
+        expected_queries = 4
+
+        for weeks in [1, 4, 12]:
+            plan = create_diet_plan(weeks=weeks, name=f'{weeks} Weeks')
+            DietPlanMeal.objects.bulk_create([
+                DietPlanMeal(week=week, day_of_week=day, meal_type=MealType.values[0],
+                             name='Oatmeal', description='Oats with milk', ingredients='Oats, milk')
+                for week in plan.weeks.all() for day in range(1, 8)
+            ])
+            url = reverse('diet_plans:api:detail', kwargs={'pk': plan.id})
+
+            with self.subTest(weeks=weeks):
+                with self.assertNumQueries(expected_queries):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                meals_count = sum(len(week['meals']) for week in response.data['data']['weeks'])
+                self.assertEqual(meals_count, weeks * 7)
+
+    def test_meal_change_invalidates_cached_plan(self):
+        """Test that saving a meal deep in the plan tree refreshes the cached plan"""
+        self.client.get(self.detail_url)
+
+        meal = DietPlanMeal.objects.create(
+            week=self.plan.weeks.first(),
+            day_of_week=1,
+            meal_type=MealType.values[0],
+            name='Oatmeal',
+            description='Oats with milk',
+            ingredients='Oats, milk'
+        )
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['data']['weeks'][0]['meals'][0]['name'], 'Oatmeal')
+
+        meal.delete()
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['data']['weeks'][0]['meals'], [])
+
+    def test_list_is_cached_per_query(self):
+        """Test that list responses are cached per query, whatever the param order"""
+        list_url = reverse('diet_plans:api:list')
+        category = self.plan.category
+
+        self.client.get(list_url, {'category': category, 'page_size': 5})
+        response = self.client.get(f'{list_url}?page_size=5&category={category}')
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+        response = self.client.get(list_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+
+class DietPlanConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='mobile@example.com',
+            name='Mobile',
+            password='MobilePassword123!'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.plan = create_diet_plan(weeks=2)
+        self.week = self.plan.weeks.first()
+        self.meal = DietPlanMeal.objects.create(
+            week=self.week,
+            day_of_week=1,
+            meal_type=MealType.values[0],
+            name='Oatmeal',
+            description='Oats with milk',
+            ingredients='Oats, milk'
+        )
+        self.detail_url = reverse('diet_plans:api:detail', kwargs={'pk': self.plan.id})
+
+    def test_unchanged_plan_is_not_modified(self):
+        """Test that a matching ETag returns 304 after a single query"""
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_unchanged_plan_is_not_modified_since(self):
+        """Test that If-Modified-Since returns 304 for an unchanged plan"""
+        response = self.client.get(self.detail_url)
+        last_modified = response['Last-Modified']
+
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_meal_changes_change_the_etag(self):
+        """Test that updating or deleting a meal deep in the tree changes the ETag"""
+        etag = self.client.get(self.detail_url)['ETag']
+
+        self.meal.name = 'Porridge'
+        self.meal.save()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        etag = response['ETag']
+
+        self.meal.delete()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['weeks'][0]['meals'], [])
+
+    def test_unknown_plan_is_not_found(self):
+        """Test that the freshness check does not hide a missing plan"""
+        url = reverse('diet_plans:api:detail', kwargs={'pk': self.plan.id + 100})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,23 @@
+from django.contrib import admin
+from django.utils.translation import gettext_lazy as _
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('task', 'queue', 'status', 'attempts', 'max_attempts', 'run_after', 'created_at')
+    list_filter = ('status', 'queue', 'created_at')
+    search_fields = ('task', 'last_error')
+    readonly_fields = ('id', 'created_at', 'started_at', 'finished_at', 'locked_by')
+
+    fieldsets = (
+        (None, {
+            'fields': ('id', 'task', 'queue', 'kwargs')
+        }),
+        (_('Status'), {
+            'fields': ('status', 'attempts', 'max_attempts', 'run_after', 'locked_by')
+        }),
+        (_('Outcome'), {
+            'fields': ('result', 'last_error', 'created_at', 'started_at', 'finished_at'),
+        }),
+    )
@@ -0,0 +1,24 @@
+from rest_framework import generics, permissions
+from rest_framework.response import Response
+from .models import Job
+from .serializers import JobSerializer
+
+
+class JobDetailView(generics.RetrieveAPIView):
+    """
+    API view to poll the status of a background job. Job IDs are random,
+    so anyone holding one, including anonymous form submitters, may poll it.
+    """
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    permission_classes = [permissions.AllowAny]
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        response = Response({
+            'message': 'Job status retrieved successfully',
+            'data': serializer.data
+        })
+        response['Cache-Control'] = 'no-store'
+        return response
@@ -0,0 +1,101 @@
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection
+
+from jobs import queue
+
+# Times per JOB_TIMEOUT a worker looks for jobs left running by dead workers
+STALE_CHECKS = 10
+
+
+class Command(BaseCommand):
+    help = (
+        'Run background jobs. Each thread claims due jobs, respecting the '
+        'concurrency limit of their queue, until stopped or, with --burst, '
+        'until no job is due. Jobs left running by a worker that died are '
+        'handed back to their queue once JOB_TIMEOUT has passed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', action='append', dest='queues',
+                            help='Queue to work on, may be repeated (default: all configured queues)')
+        parser.add_argument('--threads', type=int, default=1,
+                            help='Jobs run in parallel by this worker (default: 1)')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once no job is due')
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help='Seconds to wait when no job is due (default: 1)')
+
+    def handle(self, *args, **options):
+        queues = options['queues'] or list(getattr(settings, 'JOB_QUEUE_CONCURRENCY', {'default': 1}))
+        name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stop = threading.Event()
+        self.processed = 0
+        self.lock = threading.Lock()
+
+        if options['threads'] == 1:
+            self.work(queues, name, options['burst'], options['sleep'])
+        else:
+            threads = [
+                threading.Thread(
+                    target=self.work_in_thread, daemon=True,
+                    args=(queues, f'{name}:{i}', options['burst'], options['sleep'])
+                )
+                for i in range(options['threads'])
+            ]
+            for thread in threads:
+                thread.start()
+            try:
+                for thread in threads:
+                    while thread.is_alive():
+                        thread.join(timeout=0.5)
+            except KeyboardInterrupt:
+                # Let the running jobs finish, then stop
+                self.stop.set()
+                for thread in threads:
+                    thread.join()
+        self.stdout.write(f'Processed {self.processed} job(s)')
+
+    def work_in_thread(self, *args):
+        try:
+            self.work(*args)
+        finally:
+            connection.close()
+
+    def work(self, queues, name, burst, sleep):
+        check_every = getattr(settings, 'JOB_TIMEOUT', 600) / STALE_CHECKS
+        next_check = time.monotonic()
+        while not self.stop.is_set():
+            close_old_connections()
+            if time.monotonic() >= next_check:
+                self.requeue_stale()
+                next_check = time.monotonic() + check_every
+            try:
+                job = queue.claim(queues, name)
+            except OperationalError:
+                # SQLite is locked by another writer, try again shortly
+                job = None
+            if job is None:
+                if burst:
+                    return
+                time.sleep(sleep)
+                continue
+
+            queue.run(job)
+            with self.lock:
+                self.processed += 1
+            self.stdout.write(f'{job.task} [{job.pk}] {job.get_status_display().lower()}')
+
+    def requeue_stale(self):
+        try:
+            requeued = queue.requeue_stale()
+        except OperationalError:
+            # Another writer holds the SQLite lock, the next check will do it
+            return
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} stale job(s)')
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:40
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('queue', models.CharField(default='default', max_length=50, verbose_name='Queue')),
+                ('task', models.CharField(max_length=200, verbose_name='Task')),
+                ('kwargs', models.JSONField(blank=True, default=dict, verbose_name='Arguments')),
+                ('status', models.CharField(choices=[('PD', 'Pending'), ('RN', 'Running'), ('SC', 'Succeeded'), ('FL', 'Failed')], default='PD', max_length=2, verbose_name='Status')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Attempts')),
+                ('max_attempts', models.PositiveIntegerField(default=3, verbose_name='Max Attempts')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Run After')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Result')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Job',
+                'verbose_name_plural': 'Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['queue', 'status', 'run_after'], name='job_queue_due_idx')],
+            },
+        ),
+    ]
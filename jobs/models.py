@@ -0,0 +1,54 @@
+import uuid
+
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class JobStatus(models.TextChoices):
+    """
+    Status options for background jobs
+    """
+    PENDING = 'PD', _('Pending')
+    RUNNING = 'RN', _('Running')
+    SUCCEEDED = 'SC', _('Succeeded')
+    FAILED = 'FL', _('Failed')
+
+
+class Job(models.Model):
+    """
+    Model for a function call run by the ``run_worker`` command
+    """
+    # Random IDs, so a job's status can be polled without guessing others'
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    queue = models.CharField(_('Queue'), max_length=50, default='default')
+    task = models.CharField(_('Task'), max_length=200)
+    kwargs = models.JSONField(_('Arguments'), default=dict, blank=True)
+    status = models.CharField(
+        _('Status'),
+        max_length=2,
+        choices=JobStatus.choices,
+        default=JobStatus.PENDING
+    )
+    attempts = models.PositiveIntegerField(_('Attempts'), default=0)
+    max_attempts = models.PositiveIntegerField(_('Max Attempts'), default=3)
+    run_after = models.DateTimeField(_('Run After'), default=timezone.now)
+    locked_by = models.CharField(_('Worker'), max_length=100, blank=True)
+    result = models.JSONField(_('Result'), null=True, blank=True)
+    last_error = models.TextField(_('Last Error'), blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('Job')
+        verbose_name_plural = _('Jobs')
+        ordering = ['-created_at']
+        indexes = [
+            # Workers look up the next due job of a queue, and count the
+            # running ones against its concurrency limit
+            models.Index(fields=['queue', 'status', 'run_after'], name='job_queue_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.get_status_display()})"
@@ -0,0 +1,123 @@
+"""
+Database-backed job queue.
+
+``enqueue`` stores a call to a module-level function as a ``Job`` row and
+returns at once; ``python manage.py run_worker`` claims due jobs and runs
+them outside the request cycle. No broker is needed, and because the row
+is written in the caller's transaction a job is never picked up for data
+that was rolled back.
+
+A job that raises is retried with exponential backoff until it has been
+attempted ``max_attempts`` times, then marked failed with its traceback.
+Each queue runs at most ``JOB_QUEUE_CONCURRENCY[queue]`` jobs at a time
+across all workers, so slow work such as image processing cannot take
+every worker. Jobs left running by a worker that died are handed back to
+the queue after ``JOB_TIMEOUT`` seconds.
+"""
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job, JobStatus
+
+# Seconds before the first retry, doubled on every further attempt
+RETRY_DELAY = 10
+MAX_RETRY_DELAY = 60 * 60
+
+
+def enqueue(func, queue='default', max_attempts=3, delay=0, **kwargs):
+    """
+    Store a call to ``func(**kwargs)`` and return its ``Job``. ``func``
+    must be importable by its dotted path and ``kwargs`` JSON-serializable.
+    """
+    return Job.objects.create(
+        task=f'{func.__module__}.{func.__qualname__}',
+        queue=queue,
+        kwargs=kwargs,
+        max_attempts=max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def concurrency(queue):
+    """Maximum number of jobs of ``queue`` running at once"""
+    limits = getattr(settings, 'JOB_QUEUE_CONCURRENCY', {})
+    return limits.get(queue, limits.get('default', 1))
+
+
+def claim(queues, worker):
+    """
+    Mark the next due job of the first of ``queues`` below its concurrency
+    limit as running and return it, or ``None`` when there is nothing to do.
+    """
+    now = timezone.now()
+    for queue in queues:
+        with transaction.atomic():
+            # Workers racing on the same queue can both pass this check, so
+            # the limit may be exceeded by one job per racing worker
+            running = Job.objects.filter(queue=queue, status=JobStatus.RUNNING).count()
+            if running >= concurrency(queue):
+                continue
+            due = Job.objects.filter(
+                queue=queue, status=JobStatus.PENDING, run_after__lte=now
+            ).order_by('run_after').values_list('pk', flat=True)[:5]
+            for pk in due:
+                # The status condition makes sure only one worker claims a job
+                claimed = Job.objects.filter(pk=pk, status=JobStatus.PENDING).update(
+                    status=JobStatus.RUNNING,
+                    locked_by=worker,
+                    attempts=F('attempts') + 1,
+                    started_at=now,
+                )
+                if claimed:
+                    return Job.objects.get(pk=pk)
+    return None
+
+
+def run(job):
+    """Run a claimed job and record its result, or schedule its retry"""
+    try:
+        result = import_string(job.task)(**job.kwargs)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = JobStatus.PENDING
+            job.run_after = timezone.now() + timedelta(seconds=retry_delay(job.attempts))
+        else:
+            job.status = JobStatus.FAILED
+            job.finished_at = timezone.now()
+    else:
+        job.status = JobStatus.SUCCEEDED
+        job.result = result
+        job.finished_at = timezone.now()
+    job.locked_by = ''
+    job.save(update_fields=[
+        'status', 'result', 'last_error', 'run_after', 'locked_by', 'finished_at'
+    ])
+    return job
+
+
+def retry_delay(attempts):
+    """Seconds to wait before retrying a job that failed ``attempts`` times"""
+    return min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def requeue_stale():
+    """
+    Hand jobs whose worker stopped without finishing them back to the
+    queue, or fail them if they have no attempts left. Returns the number
+    of jobs changed.
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'JOB_TIMEOUT', 600))
+    stale = Job.objects.filter(status=JobStatus.RUNNING, started_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=JobStatus.FAILED, locked_by='', finished_at=timezone.now(),
+        last_error='Worker stopped before the job finished'
+    )
+    requeued = stale.update(status=JobStatus.PENDING, locked_by='', run_after=timezone.now())
+    return failed + requeued
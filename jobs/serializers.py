@@ -0,0 +1,24 @@
+from rest_framework import serializers
+from django.urls import reverse
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the status of a background job
+    """
+    url = serializers.SerializerMethodField()
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'url', 'status', 'status_display', 'attempts', 'max_attempts',
+            'result', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+    def get_url(self, obj):
+        url = reverse('jobs:api:job_detail', kwargs={'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,157 @@
+import uuid
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from . import queue
+from .management.commands import run_worker as run_worker_command
+from .models import Job, JobStatus
+
+
+def add(a, b):
+    return a + b
+
+
+def explode():
+    raise ValueError('Boom')
+
+
+def run_worker(*args):
+    call_command('run_worker', '--burst', *args, stdout=StringIO())
+
+
+class JobQueueTests(TestCase):
+    def test_worker_runs_due_jobs(self):
+        """Test that the worker runs a job and stores its result"""
+        job = queue.enqueue(add, a=2, b=3)
+        run_worker()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.SUCCEEDED)
+        self.assertEqual(job.result, 5)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_delayed_jobs_wait(self):
+        """Test that a job is not run before its delay has passed"""
+        job = queue.enqueue(add, delay=60, a=1, b=1)
+        run_worker()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.PENDING)
+
+    def test_failed_job_is_retried_with_backoff(self):
+        """Test that a failing job is retried later until it runs out of attempts"""
+        job = queue.enqueue(explode, max_attempts=2)
+        run_worker()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=5))
+        self.assertIn('ValueError: Boom', job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        run_worker()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_retry_delay_doubles(self):
+        """Test that each retry waits twice as long as the previous one"""
+        self.assertEqual(
+            [queue.retry_delay(attempts) for attempts in [1, 2, 3]],
+            [queue.RETRY_DELAY, queue.RETRY_DELAY * 2, queue.RETRY_DELAY * 4]
+        )
+        self.assertEqual(queue.retry_delay(50), queue.MAX_RETRY_DELAY)
+
+    @override_settings(JOB_QUEUE_CONCURRENCY={'default': 1, 'images': 1})
+    def test_queue_concurrency_limit(self):
+        """Test that no job is claimed from a queue running its limit"""
+        Job.objects.create(task='jobs.tests.add', queue='images', status=JobStatus.RUNNING,
+                           started_at=timezone.now())
+        waiting = queue.enqueue(add, queue='images', a=1, b=2)
+        other = queue.enqueue(add, a=1, b=2)
+
+        self.assertEqual(queue.claim(['images', 'default'], 'test'), other)
+        self.assertIsNone(queue.claim(['images'], 'test'))
+        waiting.refresh_from_db()
+        self.assertEqual(waiting.status, JobStatus.PENDING)
+
+    @override_settings(JOB_TIMEOUT=60)
+    def test_stale_running_jobs_are_requeued(self):
+        """Test that jobs of a worker that disappeared are run again"""
+        started_at = timezone.now() - timedelta(minutes=5)
+        stale = Job.objects.create(task='jobs.tests.add', kwargs={'a': 1, 'b': 1},
+                                   status=JobStatus.RUNNING, attempts=1, started_at=started_at)
+        exhausted = Job.objects.create(task='jobs.tests.add', status=JobStatus.RUNNING,
+                                       attempts=3, max_attempts=3, started_at=started_at)
+        run_worker()
+
+        stale.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual(stale.status, JobStatus.SUCCEEDED)
+        self.assertEqual(stale.attempts, 2)
+        self.assertEqual(exhausted.status, JobStatus.FAILED)
+
+    @override_settings(JOB_TIMEOUT=60, JOB_QUEUE_CONCURRENCY={'default': 1})
+    def test_running_worker_requeues_jobs_gone_stale(self):
+        """Test that a running worker requeues jobs of a worker that died after it started"""
+        job = Job.objects.create(task='jobs.tests.add', kwargs={'a': 1, 'b': 1},
+                                 status=JobStatus.RUNNING, attempts=1, started_at=timezone.now())
+        clock = [0.0]
+        sleeps = []
+
+        class Stop(Exception):
+            pass
+
+        def sleep(seconds):
+            # The job's worker died and JOB_TIMEOUT passed while this one
+            # waited; stop at the next wait
+            if sleeps:
+                raise Stop
+            sleeps.append(seconds)
+            clock[0] += 61
+            Job.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(seconds=61))
+
+        with mock.patch.object(run_worker_command, 'time') as fake_time:
+            fake_time.monotonic.side_effect = lambda: clock[0]
+            fake_time.sleep.side_effect = sleep
+            with self.assertRaises(Stop):
+                call_command('run_worker', stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.SUCCEEDED)
+        self.assertEqual(job.attempts, 2)
+
+
+class JobStatusAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.job = queue.enqueue(add, a=1, b=2)
+
+    def test_job_status(self):
+        """Test that anyone holding a job's ID can poll its status"""
+        url = reverse('jobs:api:job_detail', kwargs={'pk': self.job.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['status'], JobStatus.PENDING)
+        self.assertEqual(response['Cache-Control'], 'no-store')
+
+        run_worker()
+        response = self.client.get(url)
+        self.assertEqual(response.data['data']['status'], JobStatus.SUCCEEDED)
+        self.assertEqual(response.data['data']['result'], 3)
+
+    def test_unknown_job(self):
+        """Test that an unknown job ID returns 404"""
+        url = reverse('jobs:api:job_detail', kwargs={'pk': uuid.uuid4()})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,14 @@
+from django.urls import path, include
+from . import api
+
+app_name = 'jobs'
+
+# API URL patterns
+api_urlpatterns = [
+    path('<uuid:pk>/', api.JobDetailView.as_view(), name='job_detail'),
+]
+
+urlpatterns = [
+    # API endpoints
+    path('api/', include((api_urlpatterns, 'api'))),
+]
@@ -0,0 +1,6 @@
+"""
+Fake-news classifier behind the ``nlp.py`` Streamlit app.
+
+The modules here have no Streamlit dependency, so they can be imported
+by worker processes, scripts and benchmarks without starting the UI.
+"""
@@ -0,0 +1,153 @@
+"""
+Benchmarks, run as ``python -m news_classifier.bench <name>``.
+
+They run on synthetic news-like documents, so no corpus is needed.
+"""
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from .cleaning import clean_corpus, clean_series
+
+WORDS = (
+    'president government election minister policy economy market report '
+    'officials statement campaign senate court police attack vote country '
+    'people state year week million percent support security health city'
+).split()
+STOP_WORDS_SAMPLE = (
+    'the a an and or of to in on for with is was were be been it this that '
+    'he she they we you i not but by at from as have has had will would'
+).split()
+
+
+def load_stop_words():
+    try:
+        from nltk.corpus import stopwords
+        return set(stopwords.words('english'))
+    except (ImportError, LookupError):
+        # nltk or its stopwords corpus is missing, fall back to a sample
+        return set(STOP_WORDS_SAMPLE)
+
+
+def synthetic_texts(count, words_per_text=400, seed=42):
+    rng = random.Random(seed)
+    vocabulary = WORDS + STOP_WORDS_SAMPLE + ['U.S.', "don't", '2017', '(Reuters)', '—', 'COVID19']
+    return pd.Series([
+        ' '.join(rng.choice(vocabulary) for _ in range(words_per_text))
+        for _ in range(count)
+    ])
+
+
+def legacy_clean_text(text, stop_words):
+    # The per-row cleaning nlp.py used before news_classifier.cleaning
+    text = re.sub(r'[^\w\s]', '', text)
+    text = re.sub(r'\d+', '', text)
+    text = text.lower()
+    text = ' '.join([word for word in text.split() if word not in stop_words])
+    return text.strip()
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def bench_cleaning(sizes, workers):
+    stop_words = load_stop_words()
+    print(f"{'documents':>10} {'legacy apply':>14} {'vectorized':>14} {'parallel':>14}   same output")
+    for size in sizes:
+        texts = synthetic_texts(size)
+        legacy, legacy_seconds = timed(
+            lambda: texts.apply(legacy_clean_text, args=(stop_words,))
+        )
+        vectorized, vectorized_seconds = timed(clean_series, texts, stop_words)
+        parallel, parallel_seconds = timed(clean_corpus, texts, stop_words, workers)
+        same = legacy.equals(vectorized) and legacy.equals(parallel)
+        print(
+            f'{size:>10} {size / legacy_seconds:>9.0f} d/s {size / vectorized_seconds:>9.0f} d/s '
+            f'{size / parallel_seconds:>9.0f} d/s   {same}'
+        )
+
+
+def synthetic_model_path(directory, stop_words):
+    """Train a small model on synthetic texts, for when no real one is given"""
+    import joblib
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    texts = clean_series(synthetic_texts(2000, words_per_text=200), stop_words)
+    labels = [i % 2 for i in range(len(texts))]
+    vectorizer = TfidfVectorizer()
+    model = LogisticRegression(max_iter=1000).fit(vectorizer.fit_transform(texts), labels)
+    path = os.path.join(directory, 'synthetic.joblib')
+    joblib.dump({
+        'vectorizer': vectorizer, 'model': model, 'model_name': 'synthetic',
+        'stop_words': sorted(stop_words),
+    }, path)
+    return path
+
+
+def bench_service(model_path, documents, batch_size, clients):
+    from .service import MicroBatcher, Predictor
+
+    stop_words = load_stop_words()
+    with tempfile.TemporaryDirectory() as directory:
+        predictor = Predictor(model_path or synthetic_model_path(directory, stop_words))
+    texts = list(synthetic_texts(documents))
+
+    def one_at_a_time():
+        for text in texts:
+            predictor.predict([text])
+
+    def batched():
+        for start in range(0, len(texts), batch_size):
+            predictor.predict(texts[start:start + batch_size])
+
+    batcher = MicroBatcher(predictor, max_batch=batch_size)
+
+    def concurrent_micro_batched():
+        with ThreadPoolExecutor(clients) as pool:
+            list(pool.map(lambda text: batcher.predict([text]), texts))
+
+    print(f'Model: {predictor.model_name}, {documents} documents')
+    for label, scenario in [
+        ('one text per call', one_at_a_time),
+        (f'batches of {batch_size}', batched),
+        (f'{clients} clients, micro-batched', concurrent_micro_batched),
+    ]:
+        _, seconds = timed(scenario)
+        print(f'{label:<32} {documents / seconds:>10.0f} docs/s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    cleaning = subparsers.add_parser('cleaning', help='Text cleaning throughput')
+    cleaning.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 200000])
+    cleaning.add_argument('--workers', type=int, default=None,
+                          help='Cleaning processes (default: one per CPU)')
+
+    service = subparsers.add_parser('service', help='Prediction throughput')
+    service.add_argument('--model', help='Saved model (default: one trained on synthetic texts)')
+    service.add_argument('--documents', type=int, default=5000)
+    service.add_argument('--batch-size', type=int, default=256)
+    service.add_argument('--clients', type=int, default=32,
+                         help='Threads sending one text per request')
+
+    args = parser.parse_args()
+    if args.benchmark == 'cleaning':
+        bench_cleaning(args.sizes, args.workers)
+    elif args.benchmark == 'service':
+        bench_service(args.model, args.documents, args.batch_size, args.clients)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Text cleaning.
+
+Removes punctuation and digits, lowercases and drops stop words, the
+same as the original per-row ``clean_text``, but over a whole pandas
+Series with precompiled regexes and ``.str`` methods, and over large
+corpora in chunks across a process pool.
+"""
+import math
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+
+import pandas as pd
+
+# Punctuation and digits are removed in one pass; removing one never
+# creates a match for the other
+PUNCTUATION_AND_DIGITS_RE = re.compile(r'[^\w\s]|\d')
+WHITESPACE_RE = re.compile(r'\s+')
+
+# Below this many documents, starting worker processes costs more than
+# it saves
+PARALLEL_THRESHOLD = 20000
+CHUNKS_PER_WORKER = 4
+
+
+@lru_cache(maxsize=8)
+def stop_words_re(stop_words):
+    """One alternation matching any of the ``stop_words`` frozenset as a whole word"""
+    words = sorted(stop_words, key=len, reverse=True)
+    # Words are delimited by whitespace, as str.split() delimited them: \b
+    # also breaks before combining marks, such as the dot 'İ'.lower() leaves
+    return re.compile(r'(?<!\S)(?:' + '|'.join(map(re.escape, words)) + r')(?!\S)')
+
+
+def clean_text(text, stop_words):
+    """Clean a single text"""
+    text = PUNCTUATION_AND_DIGITS_RE.sub('', text).lower()
+    text = stop_words_re(frozenset(stop_words)).sub('', text)
+    return WHITESPACE_RE.sub(' ', text).strip()
+
+
+def clean_series(texts, stop_words):
+    """Clean a Series of texts in the current process"""
+    return (
+        texts.str.replace(PUNCTUATION_AND_DIGITS_RE, '', regex=True)
+        .str.lower()
+        .str.replace(stop_words_re(frozenset(stop_words)), '', regex=True)
+        .str.replace(WHITESPACE_RE, ' ', regex=True)
+        .str.strip()
+    )
+
+
+def clean_corpus(texts, stop_words, workers=None):
+    """
+    Clean a Series of texts, split into chunks across ``workers``
+    processes (default: one per CPU) when it is large enough to pay off.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(texts) < PARALLEL_THRESHOLD:
+        return clean_series(texts, stop_words)
+
+    size = math.ceil(len(texts) / (workers * CHUNKS_PER_WORKER))
+    chunks = [texts.iloc[start:start + size] for start in range(0, len(texts), size)]
+    with ProcessPoolExecutor(workers) as pool:
+        cleaned = list(pool.map(clean_series, chunks, repeat(frozenset(stop_words))))
+    return pd.concat(cleaned)
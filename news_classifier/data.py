@@ -0,0 +1,68 @@
+"""
+Loading the True/Fake CSV corpus.
+
+The cleaned corpus is cached next to the models, keyed by the path,
+modification time and size of both CSVs, so only a changed file is
+read and cleaned again.
+"""
+import hashlib
+import os
+
+import pandas as pd
+
+from .cleaning import clean_corpus
+
+try:
+    import pyarrow  # noqa: F401 (Parquet engine)
+except ImportError:
+    CORPUS_CACHE_FORMAT = 'pickle'
+else:
+    CORPUS_CACHE_FORMAT = 'parquet'
+
+# Bump when the cleaning changes, so cached corpora are rebuilt
+CLEANING_VERSION = 3
+
+
+def read_corpus(true_path, fake_path):
+    """Both CSVs in one DataFrame, labelled 1 for true and 0 for fake news"""
+    df_true = pd.read_csv(true_path)
+    df_fake = pd.read_csv(fake_path)
+
+    df_true['label'] = 1
+    df_fake['label'] = 0
+
+    df = pd.concat([df_true, df_fake], ignore_index=True)
+
+    df.drop_duplicates(subset='text', inplace=True)
+    df.dropna(subset=['text'], inplace=True)
+    return df.reset_index(drop=True)
+
+
+def corpus_cache_path(cache_dir, paths, stop_words):
+    key = [CLEANING_VERSION, sorted(stop_words)]
+    for path in paths:
+        stat = os.stat(path)
+        key.append((os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+    digest = hashlib.sha256(repr(key).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f'corpus-{digest}.{CORPUS_CACHE_FORMAT}')
+
+
+def load_corpus(true_path, fake_path, stop_words, cache_dir, workers=None):
+    """The cleaned corpus, from the cache when neither CSV has changed"""
+    path = corpus_cache_path(cache_dir, [true_path, fake_path], stop_words)
+    if os.path.exists(path):
+        if CORPUS_CACHE_FORMAT == 'parquet':
+            return pd.read_parquet(path)
+        return pd.read_pickle(path)
+
+    df = read_corpus(true_path, fake_path)
+    df['text'] = clean_corpus(df['text'], stop_words, workers)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    if CORPUS_CACHE_FORMAT == 'parquet':
+        df.to_parquet(temporary, index=False)
+    else:
+        df.to_pickle(temporary)
+    os.replace(temporary, path)
+    return df
@@ -0,0 +1,263 @@
+"""
+Headless prediction service.
+
+Loads a model saved by ``training.train_and_evaluate`` once and
+classifies batches of texts: each batch is cleaned as one Series and
+vectorized with a single sparse ``transform``.
+
+    # Classify JSON lines ({"text": ...} or plain strings) or a CSV with a
+    # ``text`` column from stdin
+    python -m news_classifier.service predict < news.jsonl > predictions.jsonl
+
+    # HTTP server; POST JSON ({"texts": [...]}), JSON lines or CSV to
+    # /predict. Listens on 8601 by default, next to Streamlit's 8501
+    python -m news_classifier.service serve --port 8601
+
+The HTTP server answers each request on its own thread, and a
+``MicroBatcher`` merges texts that arrive within ``--max-wait-ms`` of
+each other into one model call, so many small concurrent requests cost
+about as much as one large one.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Empty, Queue
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from .cleaning import clean_series
+from .training import latest_model_path
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.nlp_cache')
+
+LABELS = {1: 'real', 0: 'fake'}
+
+
+class Predictor:
+    """A loaded vectorizer and model"""
+    def __init__(self, path):
+        bundle = joblib.load(path)
+        self.path = path
+        self.model_name = bundle.get('model_name', os.path.basename(path))
+        self.vectorizer = bundle['vectorizer']
+        self.model = bundle['model']
+        self.stop_words = frozenset(bundle.get('stop_words') or load_stop_words())
+
+    def predict(self, texts):
+        """Label and probability of being real news of each text"""
+        if not len(texts):
+            return []
+        cleaned = clean_series(pd.Series(texts, dtype=object).fillna('').astype(str), self.stop_words)
+        features = self.vectorizer.transform(cleaned)
+        predictions = self.model.predict(features)
+        if hasattr(self.model, 'predict_proba'):
+            probabilities = self.model.predict_proba(features)[:, list(self.model.classes_).index(1)]
+        else:
+            # LinearSVC has no probabilities; squash its margin instead,
+            # which ranks texts the same but is not calibrated
+            probabilities = 1 / (1 + np.exp(-self.model.decision_function(features)))
+        return [
+            {'label': LABELS[int(prediction)], 'prediction': int(prediction),
+             'probability_real': round(float(probability), 6)}
+            for prediction, probability in zip(predictions, probabilities)
+        ]
+
+
+def load_stop_words():
+    # Models saved before the stop words were stored with them
+    from nltk.corpus import stopwords
+    return stopwords.words('english')
+
+
+class MicroBatcher:
+    """
+    Collects texts submitted from many threads and predicts them together,
+    once ``max_batch`` texts are waiting or the oldest has waited
+    ``max_wait`` seconds.
+    """
+    def __init__(self, predictor, max_batch=256, max_wait=0.005):
+        self.predictor = predictor
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.pending = Queue()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def predict(self, texts):
+        """Predict ``texts`` as part of the next batch, blocking until done"""
+        future = Future()
+        self.pending.put((list(texts), future))
+        return future.result()
+
+    def run(self):
+        while True:
+            requests = [self.pending.get()]
+            size = len(requests[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self.pending.get(timeout=timeout)
+                except Empty:
+                    break
+                requests.append(request)
+                size += len(request[0])
+
+            texts = [text for request_texts, _ in requests for text in request_texts]
+            try:
+                results = self.predictor.predict(texts)
+            except Exception as exc:
+                for _, future in requests:
+                    future.set_exception(exc)
+                continue
+            start = 0
+            for request_texts, future in requests:
+                future.set_result(results[start:start + len(request_texts)])
+                start += len(request_texts)
+
+
+def parse_texts(body, content_type):
+    """Texts of a JSON, JSON lines or CSV request body"""
+    content_type = content_type.split(';')[0].strip()
+    text = body.decode('utf-8')
+    if content_type == 'text/csv':
+        texts = [row['text'] for row in csv.DictReader(io.StringIO(text))]
+    elif content_type == 'application/json':
+        payload = json.loads(text)
+        texts = payload['texts'] if isinstance(payload, dict) else payload
+    else:
+        # JSON lines
+        texts = []
+        for line in text.splitlines():
+            if line.strip():
+                item = json.loads(line)
+                texts.append(item['text'] if isinstance(item, dict) else item)
+    # A string would be classified one character at a time
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        raise TypeError('Expected a list of strings')
+    return texts
+
+
+def format_predictions(predictions, content_type):
+    content_type = content_type.split(';')[0].strip()
+    if content_type == 'text/csv':
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=['label', 'prediction', 'probability_real'])
+        writer.writeheader()
+        writer.writerows(predictions)
+        return out.getvalue(), 'text/csv'
+    if content_type == 'application/json':
+        return json.dumps({'predictions': predictions}), 'application/json'
+    return ''.join(json.dumps(p) + '\n' for p in predictions), 'application/x-ndjson'
+
+
+def make_handler(batcher):
+    class PredictionHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if self.path != '/health':
+                return self.reply(404, json.dumps({'error': 'Not found'}), 'application/json')
+            self.reply(200, json.dumps({
+                'status': 'ok', 'model': batcher.predictor.model_name,
+            }), 'application/json')
+
+        def do_POST(self):
+            if self.path != '/predict':
+                return self.reply(404, json.dumps({'error': 'Not found'}), 'application/json')
+            content_type = self.headers.get('Content-Type', 'application/x-ndjson')
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            try:
+                texts = parse_texts(body, content_type)
+            except (ValueError, KeyError, TypeError) as exc:
+                return self.reply(400, json.dumps({'error': f'Invalid request body: {exc}'}),
+                                  'application/json')
+            try:
+                predictions = batcher.predict(texts)
+            except Exception as exc:
+                return self.reply(500, json.dumps({'error': f'Prediction failed: {exc}'}),
+                                  'application/json')
+            self.reply(200, *format_predictions(predictions, content_type))
+
+        def reply(self, status, body, content_type):
+            body = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # One line per request would cost more than the prediction
+            pass
+
+    return PredictionHandler
+
+
+def predict_stream(predictor, infile, outfile, batch_size, csv_input):
+    """Classify a JSON lines or CSV stream in batches of ``batch_size``"""
+    if csv_input:
+        texts = (row['text'] for row in csv.DictReader(infile))
+    else:
+        texts = (
+            item['text'] if isinstance(item, dict) else item
+            for item in (json.loads(line) for line in infile if line.strip())
+        )
+    batch = []
+    for text in texts:
+        batch.append(text)
+        if len(batch) == batch_size:
+            write_predictions(predictor.predict(batch), outfile)
+            batch = []
+    write_predictions(predictor.predict(batch), outfile)
+
+
+def write_predictions(predictions, outfile):
+    outfile.writelines(json.dumps(p) + '\n' for p in predictions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake-news prediction service')
+    parser.add_argument('--model', help='Saved model (default: the latest one in --cache-dir)')
+    parser.add_argument('--model-name', help='Use the latest model of this name, e.g. "SVM"')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    predict = subparsers.add_parser('predict', help='Classify stdin, write JSON lines to stdout')
+    predict.add_argument('--csv', action='store_true', help='Read a CSV with a text column')
+    predict.add_argument('--batch-size', type=int, default=1000)
+
+    serve = subparsers.add_parser('serve', help='Run the HTTP server')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8601)
+    serve.add_argument('--max-batch', type=int, default=256)
+    serve.add_argument('--max-wait-ms', type=float, default=5)
+
+    args = parser.parse_args()
+    predictor = Predictor(args.model or latest_model_path(args.cache_dir, args.model_name))
+
+    if args.command == 'predict':
+        predict_stream(predictor, sys.stdin, sys.stdout, args.batch_size, args.csv)
+    else:
+        batcher = MicroBatcher(predictor, args.max_batch, args.max_wait_ms / 1000)
+        server = ThreadingHTTPServer((args.host, args.port), make_handler(batcher))
+        print(f'Serving {predictor.model_name} on http://{args.host}:{args.port}/predict',
+              file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Dataset statistics for the dashboard.
+
+Computed once per dataset and saved in the ``stats`` subdirectory of the
+model cache, where ``training.latest_model_path`` never looks, so reruns
+of the app only draw them.
+"""
+import os
+
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+
+TOP_WORDS = 15
+STATS_DIR = 'stats'
+
+
+def top_words(texts, n=TOP_WORDS):
+    """
+    The ``n`` most frequent words of the cleaned ``texts``, with their
+    counts, from a sparse document-term matrix instead of one string of
+    the whole corpus
+    """
+    # Cleaned texts are lowercase words separated by single spaces, which
+    # is what str.split() tokenized
+    vectorizer = CountVectorizer(token_pattern=r'\S+', lowercase=False)
+    counts = np.asarray(vectorizer.fit_transform(texts).sum(axis=0)).ravel()
+    n = min(n, len(counts))
+    top = np.argpartition(-counts, n - 1)[:n] if n else []
+    top = sorted(top, key=lambda index: -counts[index])
+    words = vectorizer.get_feature_names_out()
+    return [(words[index], int(counts[index])) for index in top]
+
+
+def dashboard_stats(df, cache_dir, fingerprint):
+    """Label distribution and most common words of a dataset"""
+    directory = os.path.join(cache_dir, STATS_DIR)
+    path = os.path.join(directory, f"{fingerprint[:16]}-top{TOP_WORDS}.joblib")
+    if os.path.exists(path):
+        return joblib.load(path)
+
+    label_counts = df['label'].value_counts()
+    stats = {
+        'label_counts': {label: int(label_counts.get(label, 0)) for label in (1, 0)},
+        'top_words': top_words(df['text']),
+    }
+    os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(stats, temporary)
+    os.replace(temporary, path)
+    return stats
@@ -0,0 +1,195 @@
+"""
+Out-of-core training for corpora larger than memory.
+
+Unlike ``data.load_corpus``, which reads both CSVs whole, the corpus is
+streamed in chunks of ``chunksize`` rows, reading only the ``text``
+column. Duplicates are dropped with a set of 64-bit row hashes, so
+memory grows with the number of distinct documents (about 70 bytes
+each) rather than with their text. Each chunk is cleaned, hashed into a
+fixed number of features by a ``HashingVectorizer`` (which needs no
+fitted vocabulary) and fed to a model's ``partial_fit``.
+
+Every fifth document, chosen by its hash, is held out for testing. The
+model is evaluated in a second pass over the files once training is
+done, so the held-out documents never need to be kept in memory.
+
+    python -m news_classifier.streaming --true True.csv --fake Fake.csv --model sgd
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+from itertools import zip_longest
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, classification_report
+from sklearn.naive_bayes import MultinomialNB
+
+from .cleaning import clean_series
+from .training import RANDOM_STATE, model_file_prefix
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+CHUNKSIZE = 10000
+N_FEATURES = 2 ** 20
+# One document in TEST_MODULUS is held out for testing
+TEST_MODULUS = 5
+CLASSES = np.array([0, 1])
+
+STREAMING_MODELS = {
+    'sgd': "Streaming SGD",
+    'nb': "Streaming Naive Bayes",
+}
+
+
+def build_streaming_model(key):
+    if key == 'sgd':
+        # Logistic loss, so the prediction service gets probabilities
+        return SGDClassifier(loss='log_loss', alpha=1e-6, random_state=RANDOM_STATE)
+    elif key == 'nb':
+        return MultinomialNB(alpha=0.01)
+    raise ValueError("Invalid streaming model")
+
+
+def build_vectorizer(key, n_features=N_FEATURES):
+    # Naive Bayes needs non-negative features
+    return HashingVectorizer(n_features=n_features, alternate_sign=(key != 'nb'))
+
+
+def read_texts(path, chunksize):
+    for chunk in pd.read_csv(path, usecols=['text'], chunksize=chunksize):
+        yield chunk['text'].dropna()
+
+
+def iter_chunks(true_path, fake_path, stop_words, chunksize=CHUNKSIZE, seed=RANDOM_STATE):
+    """
+    Yield ``(texts, labels, is_test)`` for chunks of distinct documents,
+    taking rows from both files in turn and shuffling them, so that
+    ``partial_fit`` never sees a long run of one class.
+    """
+    seen = set()
+    rng = np.random.default_rng(seed)
+    for true_texts, fake_texts in zip_longest(read_texts(true_path, chunksize),
+                                              read_texts(fake_path, chunksize)):
+        parts = [(texts, label) for texts, label in [(true_texts, 1), (fake_texts, 0)]
+                 if texts is not None]
+        texts = pd.concat([texts for texts, _ in parts], ignore_index=True)
+        labels = np.concatenate([np.full(len(texts), label) for texts, label in parts])
+
+        hashes = pd.util.hash_pandas_object(texts, index=False).to_numpy()
+        keep = np.fromiter(
+            (h not in seen and not seen.add(h) for h in hashes.tolist()),
+            dtype=bool, count=len(hashes)
+        )
+        order = rng.permutation(np.flatnonzero(keep))
+        yield (
+            clean_series(texts.iloc[order], stop_words),
+            labels[order],
+            hashes[order] % TEST_MODULUS == 0,
+        )
+
+
+def train_streaming(true_path, fake_path, stop_words, key='sgd',
+                    chunksize=CHUNKSIZE, n_features=N_FEATURES, progress=None):
+    """
+    Train a streaming model and return ``(vectorizer, model, acc, report, seconds)``.
+    Raises ``ValueError`` when the hash holdout leaves no document to train
+    or to test on, as with a very small or heavily duplicated corpus.
+    """
+    started = time.perf_counter()
+    vectorizer = build_vectorizer(key, n_features)
+    model = build_streaming_model(key)
+
+    documents = trained = 0
+    for texts, labels, is_test in iter_chunks(true_path, fake_path, stop_words, chunksize):
+        train = ~is_test
+        if train.any():
+            model.partial_fit(vectorizer.transform(texts[train]), labels[train], classes=CLASSES)
+            trained += int(train.sum())
+        documents += len(texts)
+        if progress:
+            progress(documents)
+    if not trained:
+        raise ValueError(f"No training documents among the {documents} distinct documents")
+
+    y_true, y_pred = [], []
+    for texts, labels, is_test in iter_chunks(true_path, fake_path, stop_words, chunksize):
+        if is_test.any():
+            y_true.append(labels[is_test])
+            y_pred.append(model.predict(vectorizer.transform(texts[is_test])))
+    if not y_true:
+        raise ValueError(
+            f"No test documents among the {documents} distinct documents: one in "
+            f"{TEST_MODULUS} is held out by its hash, the corpus is too small"
+        )
+    y_true, y_pred = np.concatenate(y_true), np.concatenate(y_pred)
+
+    acc = accuracy_score(y_true, y_pred)
+    report = classification_report(y_true, y_pred, output_dict=True)
+    return vectorizer, model, acc, report, time.perf_counter() - started
+
+
+def save_streaming_model(cache_dir, key, vectorizer, model, acc, report, stop_words, sources):
+    """Save in the format ``service.Predictor`` loads"""
+    model_name = STREAMING_MODELS[key]
+    source_key = [(os.path.abspath(p), os.stat(p).st_mtime_ns, os.stat(p).st_size) for p in sources]
+    digest = hashlib.sha256(repr((source_key, vectorizer.n_features)).encode()).hexdigest()[:16]
+    path = os.path.join(cache_dir, f"{model_file_prefix(model_name)}-{digest}.joblib")
+    os.makedirs(cache_dir, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    joblib.dump({
+        'vectorizer': vectorizer, 'model': model, 'acc': acc, 'report': report,
+        'model_name': model_name, 'stop_words': sorted(stop_words),
+    }, temporary)
+    os.replace(temporary, path)
+    return path
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 1024 / 1024 if sys.platform == 'darwin' else maxrss / 1024
+
+
+def main():
+    from nltk.corpus import stopwords
+    from .service import DEFAULT_CACHE_DIR
+
+    parser = argparse.ArgumentParser(description='Train a fake-news model out-of-core')
+    parser.add_argument('--true', required=True, help='CSV of true news')
+    parser.add_argument('--fake', required=True, help='CSV of fake news')
+    parser.add_argument('--model', choices=list(STREAMING_MODELS), default='sgd')
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE)
+    parser.add_argument('--n-features', type=int, default=N_FEATURES)
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args()
+
+    stop_words = set(stopwords.words('english'))
+    try:
+        vectorizer, model, acc, report, seconds = train_streaming(
+            args.true, args.fake, stop_words, args.model, args.chunksize, args.n_features,
+            progress=lambda documents: print(f'\r{documents} documents', end='', flush=True)
+        )
+    except ValueError as exc:
+        print()
+        parser.error(str(exc))
+    path = save_streaming_model(args.cache_dir, args.model, vectorizer, model, acc, report,
+                                stop_words, [args.true, args.fake])
+    peak = peak_rss_mb()
+    print(f'\nTest accuracy {acc * 100:.2f}% in {seconds:.1f} s'
+          + (f', peak RSS {peak:.0f} MB' if peak else '') + f'\nSaved to {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,348 @@
+import glob
+import http.client
+import importlib.util
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import skipUnless
+
+from django.test import SimpleTestCase
+
+ML_STACK = ('joblib', 'numpy', 'pandas', 'scipy', 'sklearn', 'xgboost')
+HAS_ML_STACK = all(importlib.util.find_spec(name) for name in ML_STACK)
+
+if HAS_ML_STACK:
+    import joblib
+    import numpy as np
+    import pandas as pd
+
+    from . import cleaning, service, stats, streaming, training
+
+STOP_WORDS = frozenset({'i', 'a', 'the', 'and', 'is', 'it', 'of'})
+
+
+def legacy_clean_text(text, stop_words=STOP_WORDS):
+    # The per-row cleaning nlp.py used before clean_series
+    text = re.sub(r'[^\w\s]', '', text)
+    text = re.sub(r'\d+', '', text)
+    text = text.lower()
+    text = ' '.join([word for word in text.split() if word not in stop_words])
+    return text.strip()
+
+
+def is_memory_mapped(array):
+    # scipy wraps the loaded arrays in views, which must not be copies
+    while array is not None and not isinstance(array, np.memmap):
+        array = array.base
+    return array is not None
+
+
+def news_corpus(size=200, seed=0):
+    """Real and fake news of words only one label uses, so every model learns them"""
+    rng = random.Random(seed)
+    vocabulary = {1: ['senate', 'budget', 'minister', 'report', 'economy', 'court'],
+                  0: ['shocking', 'secret', 'miracle', 'aliens', 'hoax', 'exposed']}
+    labels = [index % 2 for index in range(size)]
+    texts = [' '.join(rng.choices(vocabulary[label], k=12)) for label in labels]
+    return pd.DataFrame({'text': texts, 'label': labels})
+
+
+@skipUnless(HAS_ML_STACK, 'The news classifier dependencies are not installed')
+class ModelCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_dir = directory.name
+
+    def test_latest_model_path_skips_dashboard_stats(self):
+        """Test that the stats saved for the dashboard are never served as a model"""
+        df = pd.DataFrame({'text': ['breaking news today', 'fake story again'], 'label': [1, 0]})
+        model_path = training.model_cache_path(self.cache_dir, 'fingerprint', "Naive Bayes")
+        joblib.dump({'model_name': "Naive Bayes"}, model_path)
+        # Saved after the model, so newer than it
+        stats.dashboard_stats(df, self.cache_dir, training.dataset_fingerprint(df))
+
+        self.assertEqual(training.latest_model_path(self.cache_dir), model_path)
+
+    def test_latest_model_path_without_models(self):
+        """Test that a cache of only dashboard stats has no model to serve"""
+        df = pd.DataFrame({'text': ['breaking news today'], 'label': [1]})
+        stats.dashboard_stats(df, self.cache_dir, training.dataset_fingerprint(df))
+
+        with self.assertRaises(FileNotFoundError):
+            training.latest_model_path(self.cache_dir)
+
+
+@skipUnless(HAS_ML_STACK, 'The news classifier dependencies are not installed')
+class CleaningTests(SimpleTestCase):
+    samples = [
+        "Breaking: The Senate passed 3 bills, and it's official!",
+        "I   said\tno\n\nTWICE... the end",
+        "  ",
+        "İstanbul is where I live",
+        "The İ and the a",
+        "naïve café, déjà vu",
+        "under_score and-dash 2nd 10,000",
+        "Ⅻ chapters ½ done",
+    ]
+
+    def test_clean_series_matches_clean_text(self):
+        """Test that cleaning a Series gives what the original per-row cleaning gave"""
+        cleaned = cleaning.clean_series(pd.Series(self.samples), STOP_WORDS)
+
+        self.assertEqual(list(cleaned), [legacy_clean_text(text) for text in self.samples])
+
+    def test_clean_text_matches_clean_text(self):
+        """Test that the single-text cleaning agrees with the original"""
+        for text in self.samples:
+            with self.subTest(text=text):
+                self.assertEqual(cleaning.clean_text(text, STOP_WORDS), legacy_clean_text(text))
+
+    def test_combining_marks_are_part_of_their_word(self):
+        """Test that a stop word followed by a combining mark is not removed"""
+        # 'İ'.lower() is 'i' followed by a combining dot above
+        self.assertEqual(cleaning.clean_text("İ", STOP_WORDS), "i\u0307")
+
+
+@skipUnless(HAS_ML_STACK, 'The news classifier dependencies are not installed')
+class TrainingCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_dir = directory.name
+
+    def train(self, df):
+        return training.train_and_evaluate(df, "Naive Bayes", self.cache_dir, STOP_WORDS, cv_jobs=1)
+
+    def test_second_run_loads_from_cache(self):
+        """Test that training the same data again loads the saved model"""
+        df = news_corpus()
+        _, model, acc, report, _, avg_cv, timings = self.train(df)
+        self.assertIn("fit", timings)
+        self.assertNotIn("load from cache", timings)
+
+        _, cached_model, cached_acc, cached_report, _, cached_avg_cv, timings = self.train(df)
+
+        self.assertEqual(list(timings), ["fingerprint", "load from cache"])
+        self.assertEqual((cached_acc, cached_report, cached_avg_cv), (acc, report, avg_cv))
+        self.assertEqual(cached_model.get_params(), model.get_params())
+
+    def test_changed_data_is_trained_again(self):
+        """Test that changing the data changes the fingerprint and misses the cache"""
+        df = news_corpus()
+        self.train(df)
+        changed = df.copy()
+        changed.loc[0, 'text'] += ' senate'
+
+        self.assertNotEqual(training.dataset_fingerprint(changed), training.dataset_fingerprint(df))
+        timings = self.train(changed)[-1]
+        self.assertIn("fit", timings)
+        self.assertNotIn("load from cache", timings)
+        self.assertEqual(len([name for name in os.listdir(self.cache_dir) if name.endswith('.joblib')]), 2)
+
+    def test_features_are_loaded_from_cache(self):
+        """Test that the features of a dataset are vectorized once and memory-mapped after"""
+        df = news_corpus()
+        fingerprint = training.dataset_fingerprint(df)
+        timings = {}
+        features = training.load_features(df, self.cache_dir, fingerprint, timings)
+        self.assertIn("vectorize", timings)
+        self.assertTrue(os.path.isdir(training.features_cache_dir(self.cache_dir, fingerprint)))
+
+        timings = {}
+        cached = training.load_features(None, self.cache_dir, fingerprint, timings)
+
+        self.assertEqual(list(timings), ["load features"])
+        for part in ('data', 'indices', 'indptr'):
+            self.assertTrue(is_memory_mapped(getattr(cached['X_train'], part)), part)
+        self.assertEqual((cached['X_train'] != features['X_train']).nnz, 0)
+        self.assertEqual((cached['X_test'] != features['X_test']).nnz, 0)
+        self.assertEqual(list(cached['y_test']), list(features['y_test']))
+        self.assertEqual(cached['vectorizer'].vocabulary_, features['vectorizer'].vocabulary_)
+
+    def test_changed_data_invalidates_features(self):
+        """Test that changed data is vectorized again into its own cache directory"""
+        df = news_corpus()
+        training.load_features(df, self.cache_dir, training.dataset_fingerprint(df), {})
+        changed = news_corpus(seed=1)
+        fingerprint = training.dataset_fingerprint(changed)
+
+        self.assertNotEqual(training.features_cache_dir(self.cache_dir, fingerprint),
+                            training.features_cache_dir(self.cache_dir, training.dataset_fingerprint(df)))
+        timings = {}
+        features = training.load_features(changed, self.cache_dir, fingerprint, timings)
+        self.assertIn("vectorize", timings)
+        self.assertEqual(len(glob.glob(os.path.join(self.cache_dir, 'features-*'))), 2)
+
+
+@skipUnless(HAS_ML_STACK, 'The news classifier dependencies are not installed')
+class StreamingTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write_corpus(self, df):
+        paths = []
+        for label, name in [(1, 'True.csv'), (0, 'Fake.csv')]:
+            path = os.path.join(self.directory, name)
+            df[df['label'] == label].assign(title='Title').to_csv(path, index=False)
+            paths.append(path)
+        return paths
+
+    def test_train_streaming(self):
+        """Test that a corpus streamed in chunks trains on four in five distinct documents"""
+        df = news_corpus(size=400)
+        # Distinct documents, plus one duplicate which is only read once
+        df['text'] += [f' story{index}' for index in range(len(df))]
+        df = pd.concat([df, df.iloc[:1]], ignore_index=True)
+        true_path, fake_path = self.write_corpus(df)
+
+        for key in streaming.STREAMING_MODELS:
+            with self.subTest(key=key):
+                progress = []
+                vectorizer, model, acc, report, _ = streaming.train_streaming(
+                    true_path, fake_path, STOP_WORDS, key, chunksize=50, n_features=2 ** 12,
+                    progress=progress.append,
+                )
+
+                # 50 rows of each file at a time; the duplicate is the 201st true row
+                self.assertEqual(len(progress), 5)
+                self.assertEqual(progress[-1], 400)
+                self.assertGreater(acc, 0.9)
+                held_out = report['macro avg']['support']
+                self.assertTrue(0 < held_out < 200, held_out)
+                self.assertEqual(list(model.predict(vectorizer.transform(['senate budget', 'aliens hoax']))), [1, 0])
+
+    def test_train_streaming_without_test_documents(self):
+        """Test that a corpus too small for the hash holdout is an error"""
+        candidates = pd.Series([f'senate report {index}' for index in range(50)])
+        hashes = pd.util.hash_pandas_object(candidates, index=False).to_numpy()
+        texts = candidates[hashes % streaming.TEST_MODULUS != 0].iloc[:4].tolist()
+        true_path, fake_path = self.write_corpus(pd.DataFrame({'text': texts, 'label': [1, 1, 0, 0]}))
+
+        with self.assertRaisesMessage(ValueError, 'No test documents among the 4 distinct documents'):
+            streaming.train_streaming(true_path, fake_path, STOP_WORDS, n_features=2 ** 12)
+
+
+class FakePredictor:
+    """Labels each text with itself and predicts its length, recording every batch"""
+    model_name = "Fake"
+
+    def __init__(self, error=None):
+        self.error = error
+        self.batches = []
+
+    def predict(self, texts):
+        self.batches.append(list(texts))
+        if self.error:
+            raise self.error
+        return [{'label': text, 'prediction': len(text), 'probability_real': 0.5} for text in texts]
+
+
+@skipUnless(HAS_ML_STACK, 'The news classifier dependencies are not installed')
+class PredictionServiceTests(SimpleTestCase):
+    def test_parse_texts(self):
+        """Test that JSON, JSON lines and CSV bodies all give their texts"""
+        self.assertEqual(service.parse_texts(b'{"texts": ["a", "b"]}', 'application/json'), ['a', 'b'])
+        self.assertEqual(service.parse_texts(b'["a", "b"]', 'application/json; charset=utf-8'), ['a', 'b'])
+        self.assertEqual(service.parse_texts(b'{"text": "a"}\n\n"b"\n', 'application/x-ndjson'), ['a', 'b'])
+        self.assertEqual(service.parse_texts(b'id,text\n1,a\n2,b\n', 'text/csv'), ['a', 'b'])
+
+    def test_parse_texts_rejects_anything_but_strings(self):
+        """Test that texts must be a list of strings"""
+        for body, content_type in [
+            (b'{"texts": "abc"}', 'application/json'),
+            (b'{"texts": ["a", 1]}', 'application/json'),
+            (b'{"texts": [null]}', 'application/json'),
+            (b'{"text": ["a"]}', 'application/x-ndjson'),
+            (b'3\n', 'application/x-ndjson'),
+        ]:
+            with self.subTest(body=body), self.assertRaises(TypeError):
+                service.parse_texts(body, content_type)
+
+    def test_format_predictions(self):
+        """Test that predictions are answered in the format of the request"""
+        predictions = [{'label': 'real', 'prediction': 1, 'probability_real': 0.9}]
+
+        body, content_type = service.format_predictions(predictions, 'application/json')
+        self.assertEqual(content_type, 'application/json')
+        self.assertEqual(json.loads(body), {'predictions': predictions})
+
+        body, content_type = service.format_predictions(predictions, 'application/x-ndjson')
+        self.assertEqual(content_type, 'application/x-ndjson')
+        self.assertEqual([json.loads(line) for line in body.splitlines()], predictions)
+
+        body, content_type = service.format_predictions(predictions, 'text/csv')
+        self.assertEqual(content_type, 'text/csv')
+        self.assertEqual(body.splitlines(), ['label,prediction,probability_real', 'real,1,0.9'])
+
+    def test_micro_batcher_splits_results_per_request(self):
+        """Test that concurrent requests are predicted together and each gets its own results"""
+        predictor = FakePredictor()
+        # Long enough for every request to join the first batch
+        batcher = service.MicroBatcher(predictor, max_wait=0.5)
+        requests = [['a'], ['bb', 'ccc'], ['dddd']]
+        with ThreadPoolExecutor(len(requests)) as pool:
+            results = list(pool.map(batcher.predict, requests))
+
+        self.assertEqual([[result['label'] for result in texts] for texts in results], requests)
+        self.assertEqual(len(predictor.batches), 1)
+        self.assertCountEqual(predictor.batches[0], ['a', 'bb', 'ccc', 'dddd'])
+
+    def test_micro_batcher_raises_prediction_errors(self):
+        """Test that every request of a failed batch gets the error, and the batcher keeps running"""
+        predictor = FakePredictor(error=ValueError('Boom'))
+        batcher = service.MicroBatcher(predictor, max_wait=0)
+        for _ in range(2):
+            with self.assertRaisesMessage(ValueError, 'Boom'):
+                batcher.predict(['a'])
+
+    def request(self, predictor, method, path, body=None, headers=None):
+        server = service.ThreadingHTTPServer(
+            ('127.0.0.1', 0), service.make_handler(service.MicroBatcher(predictor, max_wait=0))
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        connection = http.client.HTTPConnection(*server.server_address, timeout=5)
+        self.addCleanup(connection.close)
+        connection.request(method, path, body, headers or {})
+        response = connection.getresponse()
+        return response.status, response.getheader('Content-Type'), json.loads(response.read())
+
+    def test_predict_round_trip(self):
+        """Test that texts posted to the server come back classified"""
+        status, content_type, body = self.request(
+            FakePredictor(), 'POST', '/predict', json.dumps({'texts': ['a', 'bb']}),
+            {'Content-Type': 'application/json'},
+        )
+
+        self.assertEqual(status, 200)
+        self.assertEqual(content_type, 'application/json')
+        self.assertEqual([p['prediction'] for p in body['predictions']], [1, 2])
+
+    def test_predict_invalid_body(self):
+        """Test that a body without a list of texts is a bad request"""
+        predictor = FakePredictor()
+        status, _, body = self.request(
+            predictor, 'POST', '/predict', json.dumps({'texts': 'abc'}),
+            {'Content-Type': 'application/json'},
+        )
+
+        self.assertEqual(status, 400)
+        self.assertIn('Expected a list of strings', body['error'])
+        self.assertEqual(predictor.batches, [])
+
+    def test_predict_failure(self):
+        """Test that a failed prediction is a server error"""
+        status, _, body = self.request(
+            FakePredictor(error=ValueError('Boom')), 'POST', '/predict', '"a"\n',
+        )
+
+        self.assertEqual(status, 500)
+        self.assertEqual(body, {'error': 'Prediction failed: Boom'})
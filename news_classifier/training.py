@@ -0,0 +1,273 @@
+"""
+Training, evaluation and persistence of the vectorizer and model.
+
+Trained models are saved with joblib, keyed by a hash of the dataset and
+every setting that affects training, so retraining only happens when one
+of them changes. The split and the TF-IDF matrices are the same for
+every model, so they are computed once per dataset and saved as raw
+``.npy`` arrays that later runs, and the processes of ``compare_all``,
+memory-map instead of reading.
+"""
+import hashlib
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import repeat
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from scipy import sparse
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from sklearn.model_selection import cross_val_score, train_test_split
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.svm import LinearSVC
+from xgboost import XGBClassifier
+
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+CV_FOLDS = 5
+# ✅ تقليل عدد الميزات لتسريع التدريب
+VECTORIZER_PARAMS = {'max_features': 5000, 'min_df': 5, 'max_df': 0.8}
+
+MODEL_NAMES = ["Naive Bayes", "Logistic Regression", "Random Forest", "SVM", "XGBoost"]
+
+# Bump when the contents of the saved files change
+MODEL_BUNDLE_VERSION = 2
+
+
+def build_model(model_name):
+    if model_name == "Naive Bayes":
+        return MultinomialNB()
+    elif model_name == "Logistic Regression":
+        return LogisticRegression(max_iter=1000)
+    elif model_name == "Random Forest":
+        return RandomForestClassifier()
+    elif model_name == "SVM":
+        # ✅ استبدال SVC بـ LinearSVC لتسريع التدريب
+        return LinearSVC()
+    elif model_name == "XGBoost":
+        return XGBClassifier(use_label_encoder=False, eval_metric='logloss')
+    raise ValueError("Invalid model name")
+
+
+def dataset_fingerprint(df):
+    # Hashes every row's text and label without building one big string
+    row_hashes = pd.util.hash_pandas_object(df[['text', 'label']], index=False)
+    return hashlib.sha256(row_hashes.values.tobytes()).hexdigest()
+
+
+def model_cache_path(cache_dir, fingerprint, model_name):
+    settings = repr((
+        fingerprint, model_name, sorted(build_model(model_name).get_params().items()),
+        sorted(VECTORIZER_PARAMS.items()), TEST_SIZE, RANDOM_STATE, CV_FOLDS, MODEL_BUNDLE_VERSION,
+        # Pickled estimators only load in the version that wrote them
+        sklearn.__version__,
+    ))
+    key = hashlib.sha256(settings.encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{model_file_prefix(model_name)}-{key}.joblib")
+
+
+def model_file_prefix(model_name):
+    return model_name.replace(' ', '_').lower()
+
+
+def saved_model_prefixes():
+    """File name prefixes of the models saved by this module and ``streaming``"""
+    # streaming imports this module
+    from .streaming import STREAMING_MODELS
+    return tuple(model_file_prefix(name) + '-' for name in [*MODEL_NAMES, *STREAMING_MODELS.values()])
+
+
+def latest_model_path(cache_dir, model_name=None):
+    """The most recently trained model in ``cache_dir``, of ``model_name`` if given"""
+    # Only saved models: the cache also holds corpora, features and stats
+    prefixes = (model_file_prefix(model_name) + '-',) if model_name else saved_model_prefixes()
+    paths = [
+        os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+        if name.startswith(prefixes) and name.endswith('.joblib')
+    ]
+    if not paths:
+        raise FileNotFoundError(f"No trained model in {cache_dir}; train one in the app first")
+    return max(paths, key=os.path.getmtime)
+
+
+@contextmanager
+def timed(timings, stage):
+    started = time.perf_counter()
+    yield
+    timings[stage] = time.perf_counter() - started
+
+
+def features_cache_dir(cache_dir, fingerprint):
+    settings = repr((
+        fingerprint, sorted(VECTORIZER_PARAMS.items()), TEST_SIZE, RANDOM_STATE,
+        sklearn.__version__,
+    ))
+    return os.path.join(cache_dir, f"features-{hashlib.sha256(settings.encode()).hexdigest()[:16]}")
+
+
+def save_matrix(directory, name, matrix):
+    matrix = matrix.tocsr()
+    # Loaded read-only, so scipy must never need to sort them in place
+    matrix.sum_duplicates()
+    for part in ('data', 'indices', 'indptr'):
+        np.save(os.path.join(directory, f"{name}.{part}.npy"), getattr(matrix, part))
+    np.save(os.path.join(directory, f"{name}.shape.npy"), np.array(matrix.shape))
+
+
+def load_matrix(directory, name):
+    # The arrays are memory-mapped, so every process training off the same
+    # features shares one copy in the page cache
+    parts = [
+        np.load(os.path.join(directory, f"{name}.{part}.npy"), mmap_mode='r')
+        for part in ('data', 'indices', 'indptr')
+    ]
+    shape = tuple(np.load(os.path.join(directory, f"{name}.shape.npy")))
+    return sparse.csr_matrix(tuple(parts), shape=shape, copy=False)
+
+
+def load_features(df, cache_dir, fingerprint, timings):
+    """
+    The fitted vectorizer and the vectorized train/test split of a
+    dataset, shared by every model. Computed once per dataset and
+    vectorizer settings; ``df`` may be ``None`` when they are cached.
+    """
+    directory = features_cache_dir(cache_dir, fingerprint)
+    if os.path.exists(directory):
+        with timed(timings, "load features"):
+            labels = np.load(os.path.join(directory, "labels.npz"))
+            return {
+                'vectorizer': joblib.load(os.path.join(directory, "vectorizer.joblib")),
+                'X_train': load_matrix(directory, "X_train"),
+                'X_test': load_matrix(directory, "X_test"),
+                'y_train': labels['y_train'],
+                'y_test': labels['y_test'],
+            }
+
+    with timed(timings, "split"):
+        X_train, X_test, y_train, y_test = train_test_split(
+            df['text'], df['label'], test_size=TEST_SIZE, random_state=RANDOM_STATE
+        )
+
+    with timed(timings, "vectorize"):
+        vectorizer = TfidfVectorizer(**VECTORIZER_PARAMS)
+        features = {
+            'vectorizer': vectorizer,
+            'X_train': vectorizer.fit_transform(X_train),
+            'X_test': vectorizer.transform(X_test),
+            'y_train': y_train.to_numpy(),
+            'y_test': y_test.to_numpy(),
+        }
+
+    with timed(timings, "save features"):
+        # Written to a temporary directory and renamed, so a concurrent
+        # run never loads half of them
+        temporary = f"{directory}.{os.getpid()}.tmp"
+        os.makedirs(temporary, exist_ok=True)
+        joblib.dump(vectorizer, os.path.join(temporary, "vectorizer.joblib"))
+        save_matrix(temporary, "X_train", features['X_train'])
+        save_matrix(temporary, "X_test", features['X_test'])
+        np.savez(os.path.join(temporary, "labels.npz"),
+                 y_train=features['y_train'], y_test=features['y_test'])
+        try:
+            os.replace(temporary, directory)
+        except OSError:
+            # Another run saved the same features first
+            shutil.rmtree(temporary, ignore_errors=True)
+    return features
+
+
+def train_and_evaluate(df, model_name, cache_dir, stop_words, fingerprint=None, cv_jobs=-1):
+    """
+    Return the vectorizer, the model and their scores, loading them from
+    ``cache_dir`` when this dataset was already trained with the same
+    settings. The last item maps each stage to the seconds it took.
+    ``stop_words`` are those the corpus was cleaned with, saved with the
+    model so the prediction service cleans its input the same way.
+    """
+    timings = {}
+    with timed(timings, "fingerprint"):
+        fingerprint = fingerprint or dataset_fingerprint(df)
+        path = model_cache_path(cache_dir, fingerprint, model_name)
+
+    if os.path.exists(path):
+        with timed(timings, "load from cache"):
+            cached = joblib.load(path)
+        return (cached['vectorizer'], cached['model'], cached['acc'], cached['report'],
+                cached['cm'], cached['avg_cv'], timings)
+
+    features = load_features(df, cache_dir, fingerprint, timings)
+    vectorizer = features['vectorizer']
+    X_train_vectorized, X_test_vectorized = features['X_train'], features['X_test']
+    y_train, y_test = features['y_train'], features['y_test']
+
+    model = build_model(model_name)
+    with timed(timings, "fit"):
+        model.fit(X_train_vectorized, y_train)
+
+    with timed(timings, "evaluate"):
+        predictions = model.predict(X_test_vectorized)
+        acc = accuracy_score(y_test, predictions)
+        report = classification_report(y_test, predictions, output_dict=True)
+        cm = confusion_matrix(y_test, predictions)
+
+    # ✅ تقييم النموذج الحقيقي باستخدام Cross Validation
+    # cross_val_score fits a fresh clone per fold, so the folds run in parallel
+    with timed(timings, "cross-validate"):
+        cross_val_scores = cross_val_score(
+            build_model(model_name), X_train_vectorized, y_train,
+            cv=CV_FOLDS, scoring='accuracy', n_jobs=cv_jobs
+        )
+        avg_cv = np.mean(cross_val_scores)
+
+    with timed(timings, "save to cache"):
+        os.makedirs(cache_dir, exist_ok=True)
+        # Written under a temporary name, so a concurrent rerun never loads
+        # half a file
+        temporary = f"{path}.{os.getpid()}.tmp"
+        joblib.dump({
+            'vectorizer': vectorizer, 'model': model, 'acc': acc,
+            'report': report, 'cm': cm, 'avg_cv': avg_cv,
+            'model_name': model_name, 'stop_words': sorted(stop_words),
+        }, temporary)
+        os.replace(temporary, path)
+
+    return vectorizer, model, acc, report, cm, avg_cv, timings
+
+
+def _train_summary(model_name, cache_dir, stop_words, fingerprint):
+    started = time.perf_counter()
+    _, _, acc, _, _, avg_cv, timings = train_and_evaluate(
+        None, model_name, cache_dir, stop_words, fingerprint,
+        # The models already run in parallel
+        cv_jobs=1,
+    )
+    return {
+        'model': model_name,
+        'test accuracy': acc,
+        'cv accuracy': avg_cv,
+        'seconds': time.perf_counter() - started,
+        'cached': 'load from cache' in timings,
+    }
+
+
+def compare_all(df, cache_dir, stop_words, fingerprint=None, workers=None):
+    """
+    Train every model concurrently, one process each, off the same cached
+    features, and return a row of scores and timings per model
+    """
+    fingerprint = fingerprint or dataset_fingerprint(df)
+    # Vectorize once here, so the workers only load the features
+    load_features(df, cache_dir, fingerprint, {})
+    with ProcessPoolExecutor(workers or min(len(MODEL_NAMES), os.cpu_count() or 1)) as pool:
+        return list(pool.map(
+            _train_summary, MODEL_NAMES, repeat(cache_dir), repeat(sorted(stop_words)),
+            repeat(fingerprint)
+        ))
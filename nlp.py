@@ -1,97 +1,57 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import re
 import nltk
 from nltk.corpus import stopwords
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.svm import LinearSVC
-from xgboost import XGBClassifier
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 import matplotlib.pyplot as plt
 import seaborn as sns
-from collections import Counter
+import io
 import os
+from news_classifier import cleaning, data, stats
+from news_classifier.training import (
+    CV_FOLDS, MODEL_NAMES, compare_all, dataset_fingerprint, train_and_evaluate
+)
 
 nltk.download('stopwords')
 stop_words = set(stopwords.words('english'))
 
+# Cleaned corpora and trained models, keyed by their inputs
+MODEL_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.nlp_cache')
+
 def clean_text(text):
-    text = re.sub(r'[^\w\s]', '', text)
-    text = re.sub(r'\d+', '', text)
-    text = text.lower()
-    text = ' '.join([word for word in text.split() if word not in stop_words])
-    return text.strip()
+    return cleaning.clean_text(text, stop_words)
 
 @st.cache_data
 def load_and_prepare_data(true_path, fake_path):
-    df_true = pd.read_csv(true_path)
-    df_fake = pd.read_csv(fake_path)
-
-    df_true['label'] = 1
-    df_fake['label'] = 0
-
-    df = pd.concat([df_true, df_fake], ignore_index=True)
-
-    df.drop_duplicates(subset='text', inplace=True)
-    df.dropna(subset=['text'], inplace=True)
-
-    df['text'] = df['text'].apply(clean_text)
-    return df
-
-def train_and_evaluate(df, model_name):
-    X = df['text']
-    y = df['label']
-
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-    # ✅ تقليل عدد الميزات لتسريع التدريب
-    vectorizer = TfidfVectorizer(max_features=5000, min_df=5, max_df=0.8)
-    X_train_vectorized = vectorizer.fit_transform(X_train)
-    X_test_vectorized = vectorizer.transform(X_test)
-
-    if model_name == "Naive Bayes":
-        model = MultinomialNB()
-    elif model_name == "Logistic Regression":
-        model = LogisticRegression(max_iter=1000)
-    elif model_name == "Random Forest":
-        model = RandomForestClassifier()
-    elif model_name == "SVM":
-        # ✅ استبدال SVC بـ LinearSVC لتسريع التدريب
-        model = LinearSVC()
-    elif model_name == "XGBoost":
-        model = XGBClassifier(use_label_encoder=False, eval_metric='logloss')
-    else:
-        raise ValueError("Invalid model name")
-
-    model.fit(X_train_vectorized, y_train)
-    predictions = model.predict(X_test_vectorized)
-
-    acc = accuracy_score(y_test, predictions)
-    report = classification_report(y_test, predictions, output_dict=True)
-    cm = confusion_matrix(y_test, predictions)
-
-    # ✅ تقييم النموذج الحقيقي باستخدام Cross Validation
-    cross_val_scores = cross_val_score(model, X_train_vectorized, y_train, cv=5, scoring='accuracy')
-    avg_cv = np.mean(cross_val_scores)
-
-    return vectorizer, model, acc, report, cm, avg_cv
-
-def plot_all_together(df, report, cm):
+    # Cleaned in parallel and cached on disk until either CSV changes; the
+    # fingerprint keys every cache below and is only computed here
+    df = data.load_corpus(true_path, fake_path, stop_words, MODEL_CACHE_DIR)
+    return df, dataset_fingerprint(df)
+
+@st.cache_resource(show_spinner=False)
+def load_model(fingerprint, model_name, _df):
+    # Keeps the trained model in memory across reruns; ``_df`` is not
+    # hashed by Streamlit, the fingerprint stands in for it
+    return train_and_evaluate(_df, model_name, MODEL_CACHE_DIR, stop_words, fingerprint)
+
+@st.cache_data(show_spinner=False)
+def compare_models(fingerprint, _df):
+    return pd.DataFrame(compare_all(_df, MODEL_CACHE_DIR, stop_words, fingerprint))
+
+@st.cache_data(show_spinner=False)
+def load_stats(fingerprint, _df):
+    return stats.dashboard_stats(_df, MODEL_CACHE_DIR, fingerprint)
+
+@st.cache_data(show_spinner=False)
+def plot_all_together(dataset_stats, report, cm):
+    # Drawn once per dataset and model, reruns reuse the PNG
     fig, axes = plt.subplots(2, 2, figsize=(14, 10))
 
-    counts = df['label'].value_counts()
-    labels = ['True', 'Fake']
-    axes[0, 0].pie(counts, labels=labels, autopct='%1.1f%%', colors=['#2ecc71', '#e74c3c'])
+    counts = dataset_stats['label_counts']
+    axes[0, 0].pie([counts[1], counts[0]], labels=['True', 'Fake'], autopct='%1.1f%%',
+                   colors=['#2ecc71', '#e74c3c'])
     axes[0, 0].set_title("News Distribution")
 
-    all_words = ' '.join(df['text']).split()
-    common_words = Counter(all_words).most_common(15)
-    words, freqs = zip(*common_words)
+    words, freqs = zip(*dataset_stats['top_words'])
     sns.barplot(x=list(words), y=list(freqs), ax=axes[0, 1], palette="viridis")
     axes[0, 1].set_title("Top 15 Most Common Words")
     axes[0, 1].tick_params(axis='x', rotation=45)
@@ -109,7 +69,10 @@ def plot_all_together(df, report, cm):
     axes[1, 1].set_ylim(0, 1)
 
     plt.tight_layout()
-    st.pyplot(fig)
+    image = io.BytesIO()
+    fig.savefig(image, format='png')
+    plt.close(fig)
+    return image.getvalue()
 
 def main():
     st.set_page_config(page_title="News Classification App", layout="wide")
@@ -123,23 +86,38 @@ def main():
         return
 
     with st.spinner("Loading data and preparing..."):
-        dataframe = load_and_prepare_data(true_data_path, fake_data_path)
+        dataframe, fingerprint = load_and_prepare_data(true_data_path, fake_data_path)
 
     st.sidebar.title("⚙️ Model Settings")
-    model_choice = st.sidebar.selectbox("Choose a model:", [
-        "Naive Bayes", "Logistic Regression", "Random Forest", "SVM", "XGBoost"
-    ])
+    model_choice = st.sidebar.selectbox("Choose a model:", MODEL_NAMES)
+    compare = st.sidebar.checkbox("Compare all models")
 
     with st.spinner("Training and evaluating..."):
-        vectorizer, model, acc, report, cm, avg_cv = train_and_evaluate(dataframe, model_choice)
+        vectorizer, model, acc, report, cm, avg_cv, timings = load_model(
+            fingerprint, model_choice, dataframe
+        )
 
     st.success("✅ Model trained and evaluated!")
     st.markdown(f"**Selected Model:** `{model_choice}`")
     st.markdown(f"**Test Set Accuracy:** `{acc * 100:.2f}%`")
-    st.markdown(f"**Average Cross-Validation Accuracy (5-Fold):** `{avg_cv * 100:.2f}%`")
+    st.markdown(f"**Average Cross-Validation Accuracy ({CV_FOLDS}-Fold):** `{avg_cv * 100:.2f}%`")
+
+    st.sidebar.subheader("⏱️ Timings")
+    st.sidebar.table(pd.DataFrame(
+        {'seconds': [round(seconds, 3) for seconds in timings.values()]},
+        index=list(timings)
+    ))
+
+    if compare:
+        st.subheader("🏁 Model Comparison")
+        with st.spinner("Training all models..."):
+            comparison = compare_models(fingerprint, dataframe)
+        st.dataframe(comparison.style.format({
+            'test accuracy': '{:.2%}', 'cv accuracy': '{:.2%}', 'seconds': '{:.2f}',
+        }), hide_index=True)
 
     st.subheader("📊 Data Analysis & Evaluation")
-    plot_all_together(dataframe, report, cm)
+    st.image(plot_all_together(load_stats(fingerprint, dataframe), report, cm))
 
     st.subheader("📝 Try the Model")
     user_input = st.text_area("Enter your news text:")
@@ -1,44 +1,61 @@
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
+from smartfit.cache import CatalogCacheMixin
+from smartfit.conditional import ConditionalGetMixin
+from smartfit.fieldsets import SparseFieldsetMixin
+from smartfit.search import search as search_index
 from .models import Recipe
 from .serializers import RecipeListSerializer, RecipeDetailSerializer
 
 
-class RecipeListView(generics.ListAPIView):
+class RecipeListView(SparseFieldsetMixin, CatalogCacheMixin, generics.ListAPIView):
     """
     API view to list all recipes
     """
     queryset = Recipe.objects.all()
     serializer_class = RecipeListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    list_message = 'Recipes retrieved successfully'
+    cache_namespace = 'recipes'
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
         
         # Apply category filter if provided
-        category = request.query_params.get('category', None)
+        category = self.request.query_params.get('category', None)
         if category:
             queryset = queryset.filter(category=category)
             
         # Apply search filter if provided
-        search = request.query_params.get('search', None)
+        search = self.request.query_params.get('search', None)
         if search:
             queryset = queryset.filter(title__icontains=search)
             
-        serializer = self.get_serializer(queryset, many=True)
+        # Apply full-text search if provided (ranked, prefix matching)
+        q = self.request.query_params.get('q', None)
+        if q:
+            queryset = search_index(queryset, q)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
         return Response({
-            'message': 'Recipes retrieved successfully',
-            'data': serializer.data
+            'message': self.list_message,
+            'data': serializer.data,
+            'pagination': self.paginator.get_pagination_data()
         })
 
 
-class RecipeDetailView(generics.RetrieveAPIView):
+class RecipeDetailView(ConditionalGetMixin, CatalogCacheMixin, generics.RetrieveAPIView):
     """
     API view to retrieve a specific recipe with all its details
     """
     queryset = Recipe.objects.all()
     serializer_class = RecipeDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_namespace = 'recipes'
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
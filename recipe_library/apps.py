@@ -6,3 +6,11 @@ class RecipeLibraryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipe_library'
     verbose_name = _('Recipe Library')
+
+    def ready(self):
+        from smartfit import cache, images, search
+        from .models import Recipe, RECIPE_SEARCH_FIELDS
+
+        search.register(Recipe, RECIPE_SEARCH_FIELDS)
+        cache.register('recipes', [Recipe])
+        images.register(Recipe, 'image')
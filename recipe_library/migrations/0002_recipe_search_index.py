@@ -0,0 +1,22 @@
+from django.db import migrations
+
+import smartfit.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe_library', '0001_initial'),
+    ]
+
+    operations = [
+        smartfit.search.CreateSearchIndex(
+            model_name='Recipe',
+            fields={
+                'title': 'A',
+                'ingredients': 'B',
+                'description': 'C',
+                'instructions': 'D',
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:37
+
+import django.db.models.deletion
+import smartfit.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe_library', '0003_recipe_recipe_recent_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSearchDocument',
+            fields=[
+                ('recipe', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='recipe_library.recipe')),
+                ('document', smartfit.search.SearchDocumentField(db_column='recipe_library_recipe_fts')),
+            ],
+            options={
+                'db_table': 'recipe_library_recipe_fts',
+                'managed': False,
+            },
+        ),
+    ]
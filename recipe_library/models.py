@@ -1,5 +1,6 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
+from smartfit.search import SearchDocumentField, fts_table
 
 
 class RecipeCategory(models.TextChoices):
@@ -20,6 +21,15 @@ class RecipeCategory(models.TextChoices):
     OTHER = 'OT', _('Other')
 
 
+# Fields indexed for full-text search, with their weight ('A' ranks highest)
+RECIPE_SEARCH_FIELDS = {
+    'title': 'A',
+    'ingredients': 'B',
+    'description': 'C',
+    'instructions': 'D',
+}
+
+
 class Recipe(models.Model):
     """
     Model for recipes in the recipe library
@@ -87,6 +97,30 @@ class Recipe(models.Model):
         verbose_name = _('Recipe')
         verbose_name_plural = _('Recipes')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='recipe_recent_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], name='recipe_category_recent_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class RecipeSearchDocument(models.Model):
+    """
+    A row of the recipes' FTS5 search index on SQLite, joined by
+    ``smartfit.search``. The table is created by a migration operation.
+    """
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        related_name='search_document'
+    )
+    document = SearchDocumentField(db_column=fts_table(Recipe))
+
+    class Meta:
+        managed = False
+        db_table = fts_table(Recipe)
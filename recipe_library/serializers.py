@@ -1,22 +1,30 @@
 from rest_framework import serializers
+from smartfit.fieldsets import SparseFieldsetSerializerMixin
+from smartfit.images import RenditionsField
 from .models import Recipe
 
 
-class RecipeListSerializer(serializers.ModelSerializer):
+class RecipeListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for listing recipes
     """
     category_display = serializers.CharField(source='get_category_display', read_only=True)
     total_time = serializers.SerializerMethodField()
+    image_renditions = RenditionsField(source='image')
 
     class Meta:
         model = Recipe
         fields = [
             'id', 'title', 'description', 'category', 'category_display',
-            'image', 'preparation_time', 'cooking_time', 'total_time',
-            'calories', 'created_at'
+            'image', 'image_renditions', 'preparation_time', 'cooking_time',
+            'total_time', 'calories', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+        slim_fields = ['id', 'title', 'image_renditions', 'total_time', 'calories']
+        field_columns = {
+            'category_display': ['category'],
+            'total_time': ['preparation_time', 'cooking_time'],
+        }
 
     def get_total_time(self, obj):
         """Calculate total time (prep + cooking)"""
@@ -31,6 +39,7 @@ class RecipeDetailSerializer(serializers.ModelSerializer):
     """
     category_display = serializers.CharField(source='get_category_display', read_only=True)
     total_time = serializers.SerializerMethodField()
+    image_renditions = RenditionsField(source='image')
 
     class Meta:
         model = Recipe
@@ -38,7 +47,7 @@ class RecipeDetailSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'category', 'category_display',
             'ingredients', 'instructions', 'preparation_time', 'cooking_time',
             'total_time', 'servings', 'calories', 'protein', 'carbs', 'fat',
-            'image', 'video_url', 'created_at', 'updated_at'
+            'image', 'image_renditions', 'video_url', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
@@ -1,3 +1,93 @@
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from .models import Recipe
 
-# Create your tests here.
+User = get_user_model()
+
+
+class RecipeSearchAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.list_url = reverse('recipe_library:api:list')
+        self.user = User.objects.create_user(
+            email='cook@example.com',
+            name='Cook',
+            password='CookPassword123!'
+        )
+        self.client.force_authenticate(user=self.user)
+
+        Recipe.objects.create(
+            title='Grilled Chicken Salad',
+            description='A light lunch',
+            ingredients='Chicken breast, lettuce, tomatoes',
+            instructions='Grill the chicken and toss with the vegetables'
+        )
+        Recipe.objects.create(
+            title='Oat Pancakes',
+            description='Protein breakfast',
+            ingredients='Oats, eggs, banana, a pinch of cinnamon',
+            instructions='Blend and cook on a hot pan'
+        )
+        Recipe.objects.create(
+            title='Lentil Soup',
+            description='Warm dinner, pairs well with chicken skewers',
+            ingredients='Lentils, onion, cumin',
+            instructions='Simmer for 30 minutes'
+        )
+
+    def search(self, query):
+        response = self.client.get(self.list_url, {'q': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [recipe['title'] for recipe in response.data['data']]
+
+    def test_search_ranks_title_matches_first(self):
+        """Test that a title match outranks a match in the description"""
+        self.assertEqual(self.search('chicken'), ['Grilled Chicken Salad', 'Lentil Soup'])
+
+    def test_search_matches_prefixes(self):
+        """Test that partially typed words already match"""
+        self.assertEqual(self.search('pan'), ['Oat Pancakes'])
+        self.assertEqual(self.search('chick sal'), ['Grilled Chicken Salad'])
+
+    def test_search_covers_ingredients_and_instructions(self):
+        """Test that ingredients and instructions are searchable"""
+        self.assertEqual(self.search('cinnamon'), ['Oat Pancakes'])
+        self.assertEqual(self.search('simmer'), ['Lentil Soup'])
+
+    def test_search_index_follows_updates_and_deletes(self):
+        """Test that the search index is kept in sync with the recipes"""
+        recipe = Recipe.objects.get(title='Oat Pancakes')
+        recipe.title = 'Buckwheat Crepes'
+        recipe.save()
+        self.assertEqual(self.search('crepes'), ['Buckwheat Crepes'])
+        self.assertEqual(self.search('pancakes'), [])
+
+        recipe.delete()
+        self.assertEqual(self.search('crepes'), [])
+
+    def test_search_without_terms(self):
+        """Test that a query without any words returns no results"""
+        self.assertEqual(self.search('!!!'), [])
+
+    def test_search_results_are_paginated(self):
+        """Test that ranked results can be paged through with cursors"""
+        for index in range(5):
+            Recipe.objects.create(
+                title=f'Chicken Bowl {index}',
+                description='Bowl',
+                ingredients='Chicken',
+                instructions='Assemble'
+            )
+        titles = []
+        url = f'{self.list_url}?q=chicken&page_size=2'
+        while url:
+            response = self.client.get(url)
+            titles.extend(recipe['title'] for recipe in response.data['data'])
+            url = response.data['pagination']['next']
+
+        self.assertEqual(len(titles), 7)
+        self.assertEqual(len(set(titles)), 7)
+        self.assertEqual(titles[-1], 'Lentil Soup')
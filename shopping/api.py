@@ -3,7 +3,12 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 from django.db import transaction
+from django.db.models import Prefetch
 from decimal import Decimal
+from smartfit.cache import CatalogCacheMixin
+from smartfit.conditional import ConditionalGetMixin
+from smartfit.fieldsets import SparseFieldsetMixin
+from smartfit.search import search as search_index
 from .models import Product, Cart, CartItem, Order, OrderItem
 from .serializers import (
     ProductListSerializer,
@@ -15,46 +20,68 @@ from .serializers import (
 )
 
 
-class ProductListView(generics.ListAPIView):
+def get_cart_data(cart):
+    """
+    Serialize a cart, loading its totals, items and their products up front
+    so every field of the response reuses the same rows
+    """
+    cart = Cart.objects.with_totals().get(pk=cart.pk)
+    return CartSerializer(cart).data
+
+
+class ProductListView(SparseFieldsetMixin, CatalogCacheMixin, generics.ListAPIView):
     """
     API view to list all products
     """
     queryset = Product.objects.filter(is_active=True)
     serializer_class = ProductListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    list_message = 'Products retrieved successfully'
+    cache_namespace = 'products'
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
         
         # Apply category filter if provided
-        category = request.query_params.get('category', None)
+        category = self.request.query_params.get('category', None)
         if category:
             queryset = queryset.filter(category=category)
             
         # Apply search filter if provided
-        search = request.query_params.get('search', None)
+        search = self.request.query_params.get('search', None)
         if search:
             queryset = queryset.filter(name__icontains=search)
             
+        # Apply full-text search if provided (ranked, prefix matching)
+        q = self.request.query_params.get('q', None)
+        if q:
+            queryset = search_index(queryset, q)
+            
         # Apply featured filter if provided
-        featured = request.query_params.get('featured', None)
+        featured = self.request.query_params.get('featured', None)
         if featured and featured.lower() == 'true':
             queryset = queryset.filter(is_featured=True)
-            
-        serializer = self.get_serializer(queryset, many=True)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
         return Response({
-            'message': 'Products retrieved successfully',
-            'data': serializer.data
+            'message': self.list_message,
+            'data': serializer.data,
+            'pagination': self.paginator.get_pagination_data()
         })
 
 
-class ProductDetailView(generics.RetrieveAPIView):
+class ProductDetailView(ConditionalGetMixin, CatalogCacheMixin, generics.RetrieveAPIView):
     """
     API view to retrieve a specific product with all its details
     """
     queryset = Product.objects.filter(is_active=True)
     serializer_class = ProductDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_namespace = 'products'
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -73,7 +100,7 @@ class CartView(APIView):
 
     def get(self, request):
         """Get user's cart or create if it doesn't exist"""
-        cart, created = Cart.objects.get_or_create(user=request.user)
+        cart, created = Cart.objects.with_totals().get_or_create(user=request.user)
         serializer = CartSerializer(cart)
         return Response({
             'message': 'Cart retrieved successfully',
@@ -119,7 +146,7 @@ class CartItemView(APIView):
             
             return Response({
                 'message': f'{product.name} added to cart',
-                'data': CartSerializer(cart).data
+                'data': get_cart_data(cart)
             }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -153,7 +180,7 @@ class CartItemView(APIView):
         
         return Response({
             'message': 'Cart item updated',
-            'data': CartSerializer(cart).data
+            'data': get_cart_data(cart)
         })
     
     def delete(self, request, pk=None):
@@ -169,7 +196,7 @@ class CartItemView(APIView):
         
         return Response({
             'message': 'Item removed from cart',
-            'data': CartSerializer(cart).data
+            'data': get_cart_data(cart)
         })
 
 
@@ -182,16 +209,21 @@ class CheckoutView(APIView):
     @transaction.atomic
     def post(self, request):
         """Process checkout"""
-        # Get user's cart
+        # Lock the user's cart, then its items, before reading them: a
+        # second checkout of the same cart waits for this one, and edits of
+        # the items wait until the order is placed, so the quantities read
+        # here are the ones ordered
         try:
-            cart = Cart.objects.get(user=request.user)
+            cart = Cart.objects.select_for_update().get(user=request.user)
         except Cart.DoesNotExist:
             return Response({
                 'error': 'Your cart is empty'
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        cart_items = list(cart.items.select_for_update())
+        
         # Check if cart has items
-        if cart.items.count() == 0:
+        if not cart_items:
             return Response({
                 'error': 'Your cart is empty'
             }, status=status.HTTP_400_BAD_REQUEST)
@@ -201,17 +233,39 @@ class CheckoutView(APIView):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        # Calculate total amount
-        total_amount = Decimal('0.00')
-        cart_items = cart.items.all()
+        # Lock the product rows until the order is placed. Rows are locked in
+        # ID order so concurrent checkouts cannot deadlock each other. Cart
+        # edits lock no products, so they cannot deadlock with a checkout.
+        quantities = {item.product_id: item.quantity for item in cart_items}
+        products = {
+            product.id: product
+            for product in Product.objects.select_for_update().filter(
+                id__in=quantities
+            ).order_by('id')
+        }
         
         # Check stock for all items
         for item in cart_items:
+            item.product = products[item.product_id]
             if item.product.stock < item.quantity:
                 return Response({
                     'error': f'Not enough stock for {item.product.name}. Only {item.product.stock} available.'
                 }, status=status.HTTP_400_BAD_REQUEST)
-            total_amount += item.get_total_price
+        
+        # Update stock for all products in one statement. The update is
+        # guarded by the stock check itself, so a concurrent checkout that
+        # got there first (e.g. on databases without row locks) makes it
+        # touch fewer rows instead of overselling.
+        if Product.objects.decrement_stock(quantities) != len(quantities):
+            transaction.set_rollback(True)
+            return Response({
+                'error': 'Some items in your cart are no longer in stock.'
+            }, status=status.HTTP_409_CONFLICT)
+        
+        # Calculate total amount from the locked prices
+        total_amount = sum(
+            (item.get_total_price for item in cart_items), Decimal('0.00')
+        )
         
         # Create order
         order = Order.objects.create(
@@ -227,22 +281,23 @@ class CheckoutView(APIView):
             total_amount=total_amount
         )
         
-        # Create order items and update stock
-        for item in cart_items:
-            OrderItem.objects.create(
+        # Create order items
+        OrderItem.objects.bulk_create([
+            OrderItem(
                 order=order,
                 product=item.product,
                 quantity=item.quantity,
                 price=item.product.get_final_price
             )
-            
-            # Update product stock
-            item.product.stock -= item.quantity
-            item.product.save()
+            for item in cart_items
+        ])
         
-        # Clear cart
-        cart.items.all().delete()
+        # Clear the ordered items; an item added meanwhile stays in the cart
+        CartItem.objects.filter(id__in=[item.id for item in cart_items]).delete()
         
+        order = Order.objects.prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.select_related('product'))
+        ).get(pk=order.pk)
         return Response({
             'message': 'Order placed successfully',
             'data': OrderSerializer(order).data
@@ -257,14 +312,18 @@ class OrderListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        return Order.objects.filter(user=self.request.user).prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.select_related('product'))
+        )
     
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
         return Response({
             'message': 'Orders retrieved successfully',
-            'data': serializer.data
+            'data': serializer.data,
+            'pagination': self.paginator.get_pagination_data()
         })
 
 
@@ -276,7 +335,9 @@ class OrderDetailView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        return Order.objects.filter(user=self.request.user).prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.select_related('product'))
+        )
     
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -6,3 +6,11 @@ class ShoppingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shopping'
     verbose_name = _('Shopping')
+
+    def ready(self):
+        from smartfit import cache, images, search
+        from .models import Product, PRODUCT_SEARCH_FIELDS
+
+        search.register(Product, PRODUCT_SEARCH_FIELDS)
+        cache.register('products', [Product])
+        images.register(Product, 'image')
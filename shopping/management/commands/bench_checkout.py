@@ -0,0 +1,114 @@
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Sum
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from shopping.api import CheckoutView
+from shopping.models import Product, Cart, CartItem, OrderItem
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire parallel checkouts against the same low-stock product and report '
+        'throughput and oversell count. Benchmark rows are removed afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checkouts', type=int, default=50,
+                            help='Number of shoppers checking out (default: 50)')
+        parser.add_argument('--workers', type=int, default=8,
+                            help='Number of parallel checkouts (default: 8)')
+        parser.add_argument('--stock', type=int, default=10,
+                            help='Initial stock of the contested product (default: 10)')
+        parser.add_argument('--quantity', type=int, default=1,
+                            help='Quantity each shopper buys (default: 1)')
+
+    def handle(self, *args, **options):
+        run_id = uuid.uuid4().hex[:8]
+        product = Product.objects.create(
+            name=f'bench-checkout-{run_id}',
+            description='Checkout benchmark product',
+            price=Decimal('10.00'),
+            stock=options['stock']
+        )
+        users = []
+        try:
+            for index in range(options['checkouts']):
+                user = User.objects.create_user(
+                    email=f'bench-checkout-{run_id}-{index}@example.com',
+                    name=f'Checkout Benchmark {index}'
+                )
+                cart = Cart.objects.create(user=user)
+                CartItem.objects.create(cart=cart, product=product, quantity=options['quantity'])
+                users.append(user)
+
+            results = self.run_checkouts(users, options['workers'])
+            self.report(product, options, results)
+        finally:
+            OrderItem.objects.filter(product=product).delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+            product.delete()
+
+    def run_checkouts(self, users, workers):
+        factory = APIRequestFactory()
+        view = CheckoutView.as_view()
+        checkout_data = {
+            'full_name': 'Checkout Benchmark',
+            'email': 'bench@example.com',
+            'phone': '0100000000',
+            'address': '1 Benchmark Street',
+            'city': 'Cairo',
+            'country': 'Egypt'
+        }
+
+        def checkout(user):
+            request = factory.post('/shop/api/checkout/', checkout_data, format='json')
+            force_authenticate(request, user=user)
+            try:
+                return view(request).status_code
+            except Exception as e:
+                return type(e).__name__
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            statuses = list(executor.map(checkout, users))
+        return statuses, time.perf_counter() - started
+
+    def report(self, product, options, results):
+        statuses, elapsed = results
+        succeeded = statuses.count(201)
+        rejected = sum(1 for code in statuses if code in (400, 409))
+        failed = len(statuses) - succeeded - rejected
+
+        product.refresh_from_db()
+        sold = OrderItem.objects.filter(product=product).aggregate(
+            total=Sum('quantity')
+        )['total'] or 0
+        oversold = max(0, sold - options['stock'])
+
+        self.stdout.write(f"Checkouts:        {len(statuses)} ({options['workers']} workers)")
+        self.stdout.write(f'Elapsed:          {elapsed:.3f}s')
+        self.stdout.write(f'Throughput:       {len(statuses) / elapsed:.1f} checkouts/s')
+        self.stdout.write(f'Succeeded:        {succeeded}')
+        self.stdout.write(f'Rejected (stock): {rejected}')
+        self.stdout.write(f'Failed (errors):  {failed}')
+        errors = Counter(code for code in statuses if not isinstance(code, int) or code >= 500)
+        for error, count in errors.most_common():
+            self.stdout.write(f'  {error}: {count}')
+        self.stdout.write(f"Units sold:       {sold} of {options['stock']} in stock")
+        self.stdout.write(f'Remaining stock:  {product.stock}')
+        if oversold:
+            self.stdout.write(self.style.ERROR(f'Oversold:         {oversold}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Oversold:         0'))
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+import smartfit.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopping', '0001_initial'),
+    ]
+
+    operations = [
+        smartfit.search.CreateSearchIndex(
+            model_name='Product',
+            fields={
+                'name': 'A',
+                'description': 'B',
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:37
+
+import django.db.models.deletion
+import smartfit.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopping', '0003_order_order_user_recent_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchDocument',
+            fields=[
+                ('product', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='shopping.product')),
+                ('document', smartfit.search.SearchDocumentField(db_column='shopping_product_fts')),
+            ],
+            options={
+                'db_table': 'shopping_product_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -1,7 +1,13 @@
 from django.db import models
+from django.db.models import F, Q, Sum, Value, Case, When, Prefetch
+from django.db.models.functions import Coalesce, NullIf, Now
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
+from smartfit import cache as catalog_cache
+from smartfit.search import SearchDocumentField, fts_table
 from decimal import Decimal
+from functools import reduce
+import operator
 
 
 class ProductCategory(models.TextChoices):
@@ -17,6 +23,46 @@ class ProductCategory(models.TextChoices):
     OTHER = 'OT', _('Other')
 
 
+# Fields indexed for full-text search, with their weight ('A' ranks highest)
+PRODUCT_SEARCH_FIELDS = {
+    'name': 'A',
+    'description': 'B',
+}
+
+
+class ProductQuerySet(models.QuerySet):
+    """
+    QuerySet for products
+    """
+    def decrement_stock(self, quantities):
+        """
+        Decrement the stock of several products in a single UPDATE.
+
+        ``quantities`` maps product IDs to the quantity to remove. A product
+        whose stock is lower than its quantity is left untouched, so the
+        caller can compare the returned row count with ``len(quantities)``
+        to detect a shortfall and roll back. ``update()`` sends no signals,
+        so the cached product responses are invalidated here.
+        """
+        if not quantities:
+            return 0
+        in_stock = reduce(operator.or_, (
+            Q(pk=product_id, stock__gte=quantity)
+            for product_id, quantity in quantities.items()
+        ))
+        updated = self.filter(in_stock).update(
+            stock=Case(
+                *(When(pk=product_id, then=F('stock') - quantity)
+                  for product_id, quantity in quantities.items()),
+                default=F('stock'),
+                output_field=models.PositiveIntegerField()
+            ),
+            updated_at=Now()
+        )
+        catalog_cache.bump('products')
+        return updated
+
+
 class Product(models.Model):
     """
     Model for products in the shopping list
@@ -49,10 +95,31 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         verbose_name = _('Product')
         verbose_name_plural = _('Products')
         ordering = ['-created_at']
+        # The catalog only ever lists active products, newest first, so the
+        # indexes are partial on is_active and end with the cursor keyset.
+        indexes = [
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=Q(is_active=True),
+                name='product_active_recent_idx'
+            ),
+            models.Index(
+                fields=['category', '-created_at', '-id'],
+                condition=Q(is_active=True),
+                name='product_active_category_idx'
+            ),
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=Q(is_active=True, is_featured=True),
+                name='product_active_featured_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -73,6 +140,67 @@ class Product(models.Model):
         return 0
 
 
+class ProductSearchDocument(models.Model):
+    """
+    A row of the products' FTS5 search index on SQLite, joined by
+    ``smartfit.search``. The table is created by a migration operation.
+    """
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        related_name='search_document'
+    )
+    document = SearchDocumentField(db_column=fts_table(Product))
+
+    class Meta:
+        managed = False
+        db_table = fts_table(Product)
+
+
+def cart_line_total(prefix=''):
+    """
+    Database expression for the total price of a cart line, using the
+    discount price when one is set (matching Product.get_final_price)
+    """
+    final_price = Coalesce(
+        NullIf(F(f'{prefix}product__discount_price'), Value(0)),
+        F(f'{prefix}product__price')
+    )
+    return models.ExpressionWrapper(
+        final_price * F(f'{prefix}quantity'),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2)
+    )
+
+
+def cart_summary(prefix=''):
+    """Aggregates for the total price and item count of a cart"""
+    return {
+        'cart_total': Coalesce(
+            Sum(cart_line_total(prefix)),
+            Value(Decimal('0.00')),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2)
+        ),
+        'cart_items_count': Coalesce(Sum(f'{prefix}quantity'), Value(0)),
+    }
+
+
+class CartQuerySet(models.QuerySet):
+    """
+    QuerySet for shopping carts
+    """
+    def with_totals(self):
+        """
+        Annotate each cart with its total and item count, and load its items
+        together with their products
+        """
+        return self.annotate(**cart_summary('items__')).prefetch_related(
+            Prefetch('items', queryset=CartItem.objects.select_related('product'))
+        )
+
+
 class Cart(models.Model):
     """
     Model for user's shopping cart
@@ -85,6 +213,8 @@ class Cart(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CartQuerySet.as_manager()
+
     class Meta:
         verbose_name = _('Cart')
         verbose_name_plural = _('Carts')
@@ -92,19 +222,24 @@ class Cart(models.Model):
     def __str__(self):
         return f"{self.user.name}'s Cart"
 
+    def get_cart_summary(self):
+        """Calculate total price and item count of the cart in one query"""
+        if hasattr(self, 'cart_total') and hasattr(self, 'cart_items_count'):
+            return {
+                'cart_total': self.cart_total,
+                'cart_items_count': self.cart_items_count,
+            }
+        return self.items.aggregate(**cart_summary())
+
     @property
     def get_cart_total(self):
         """Calculate total price of all items in cart"""
-        cart_items = self.items.all()
-        total = sum(item.get_total_price for item in cart_items)
-        return total
+        return self.get_cart_summary()['cart_total']
 
     @property
     def get_cart_items_count(self):
         """Count total number of items in cart"""
-        cart_items = self.items.all()
-        count = sum(item.quantity for item in cart_items)
-        return count
+        return self.get_cart_summary()['cart_items_count']
 
 
 class CartItem(models.Model):
@@ -181,6 +316,9 @@ class Order(models.Model):
         verbose_name = _('Order')
         verbose_name_plural = _('Orders')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='order_user_recent_idx'),
+        ]
 
     def __str__(self):
         return f"Order #{self.id} - {self.user.name}"
@@ -1,23 +1,32 @@
 from rest_framework import serializers
+from smartfit.fieldsets import SparseFieldsetSerializerMixin
+from smartfit.images import RenditionsField
 from .models import Product, Cart, CartItem, Order, OrderItem
 
 
-class ProductListSerializer(serializers.ModelSerializer):
+class ProductListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for listing products
     """
     category_display = serializers.CharField(source='get_category_display', read_only=True)
     discount_percentage = serializers.SerializerMethodField()
     final_price = serializers.SerializerMethodField()
+    image_renditions = RenditionsField(source='image')
 
     class Meta:
         model = Product
         fields = [
             'id', 'name', 'description', 'category', 'category_display',
             'price', 'discount_price', 'discount_percentage', 'final_price',
-            'image', 'is_featured', 'is_active', 'created_at'
+            'image', 'image_renditions', 'is_featured', 'is_active', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+        slim_fields = ['id', 'name', 'image_renditions', 'final_price', 'discount_percentage']
+        field_columns = {
+            'category_display': ['category'],
+            'discount_percentage': ['price', 'discount_price'],
+            'final_price': ['price', 'discount_price'],
+        }
 
     def get_discount_percentage(self, obj):
         return obj.get_discount_percentage
@@ -33,13 +42,15 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     category_display = serializers.CharField(source='get_category_display', read_only=True)
     discount_percentage = serializers.SerializerMethodField()
     final_price = serializers.SerializerMethodField()
+    image_renditions = RenditionsField(source='image')
 
     class Meta:
         model = Product
         fields = [
             'id', 'name', 'description', 'category', 'category_display',
             'price', 'discount_price', 'discount_percentage', 'final_price',
-            'stock', 'image', 'is_featured', 'is_active', 'created_at', 'updated_at'
+            'stock', 'image', 'image_renditions', 'is_featured', 'is_active',
+            'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
@@ -1,3 +1,327 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from .models import Product, Cart, CartItem, Order
 
-# Create your tests here.
+User = get_user_model()
+
+
+class ProductListAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.product_list_url = reverse('shopping:api:product_list')
+        self.user = User.objects.create_user(
+            email='browser@example.com',
+            name='Browser',
+            password='BrowserPassword123!'
+        )
+        self.client.force_authenticate(user=self.user)
+
+        for index in range(23):
+            Product.objects.create(
+                name=f'Product {index:02d}',
+                description='Test product',
+                price=Decimal('10.00'),
+                stock=10
+            )
+
+    def test_list_is_paginated(self):
+        """Test that the product list returns the first page with a next cursor"""
+        response = self.client.get(self.product_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['message'], 'Products retrieved successfully')
+        self.assertEqual(len(response.data['data']), 20)
+        self.assertIsNotNone(response.data['pagination']['next'])
+        self.assertIsNone(response.data['pagination']['previous'])
+
+    def test_cursor_walks_every_product_once(self):
+        """Test that following the cursors returns each product exactly once"""
+        names = []
+        url = f'{self.product_list_url}?page_size=5'
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            names.extend(product['name'] for product in response.data['data'])
+            url = response.data['pagination']['next']
+
+        self.assertEqual(len(names), 23)
+        self.assertEqual(len(set(names)), 23)
+        # Newest first
+        self.assertEqual(names[0], 'Product 22')
+        self.assertEqual(names[-1], 'Product 00')
+
+
+def create_image_file(name, size=(1600, 1200)):
+    """Return an uploaded PNG of the given size"""
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (200, 80, 40)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class ProductImageRenditionTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.media_root = media_root
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='gallery@example.com',
+            name='Gallery',
+            password='GalleryPassword123!'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.product = Product.objects.create(
+            name='Dumbbell',
+            description='Adjustable dumbbell',
+            price=Decimal('30.00'),
+            stock=3,
+            image=create_image_file('dumbbell.png')
+        )
+
+    def test_renditions_are_written_by_the_worker(self):
+        """Test that saving a product queues a job writing its resized renditions"""
+        call_command('run_worker', '--burst', stdout=StringIO())
+
+        for name, box in [('thumb', 160), ('card', 480), ('full', 1200)]:
+            for fmt in ['webp', 'jpeg']:
+                path = f'{self.media_root}/renditions/{self.product.image.name}.{name}.{fmt}'
+                with self.subTest(rendition=name, format=fmt), Image.open(path) as image:
+                    self.assertEqual(image.size, (box, box * 3 // 4))
+
+    def test_list_exposes_renditions(self):
+        """Test that the product list exposes a srcset for each format"""
+        response = self.client.get(reverse('shopping:api:product_list'))
+        renditions = response.data['data'][0]['image_renditions']
+
+        self.assertEqual(set(renditions), {'webp', 'jpeg'})
+        self.assertTrue(renditions['webp']['thumb'].endswith('.png.thumb.webp'))
+        self.assertEqual(
+            renditions['webp']['srcset'],
+            f"{renditions['webp']['thumb']} 160w, "
+            f"{renditions['webp']['card']} 480w, "
+            f"{renditions['webp']['full']} 1200w"
+        )
+
+    def test_product_without_image_has_no_renditions(self):
+        """Test that a product without an image has no renditions"""
+        self.product.image = None
+        self.product.save()
+        response = self.client.get(reverse('shopping:api:product_detail', kwargs={'pk': self.product.id}))
+        self.assertIsNone(response.data['data']['image_renditions'])
+
+
+class CartAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.cart_url = reverse('shopping:api:cart')
+        self.cart_item_url = reverse('shopping:api:cart_item_add')
+        self.user = User.objects.create_user(
+            email='shopper@example.com',
+            name='Shopper',
+            password='ShopperPassword123!'
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.protein = Product.objects.create(
+            name='Whey Protein',
+            description='Protein powder',
+            price=Decimal('50.00'),
+            discount_price=Decimal('40.00'),
+            stock=10
+        )
+        self.bands = Product.objects.create(
+            name='Resistance Bands',
+            description='Set of bands',
+            price=Decimal('15.50'),
+            stock=10
+        )
+        self.cart = Cart.objects.create(user=self.user)
+
+    def test_cart_totals_use_discount_price(self):
+        """Test that the cart total uses discount prices and quantities"""
+        CartItem.objects.create(cart=self.cart, product=self.protein, quantity=2)
+        CartItem.objects.create(cart=self.cart, product=self.bands, quantity=3)
+
+        response = self.client.get(self.cart_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = response.data['data']
+        self.assertEqual(data['total'], Decimal('126.50'))
+        self.assertEqual(data['items_count'], 5)
+        self.assertEqual(len(data['items']), 2)
+
+    def test_empty_cart_totals(self):
+        """Test that an empty cart reports zero totals"""
+        response = self.client.get(self.cart_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['total'], Decimal('0.00'))
+        self.assertEqual(response.data['data']['items_count'], 0)
+
+    def test_cart_query_count_is_constant(self):
+        """Test that the cart is serialized without a query per item"""
+        for index in range(8):
+            product = Product.objects.create(
+                name=f'Product {index}',
+                description='Test product',
+                price=Decimal('10.00'),
+                stock=10
+            )
+            CartItem.objects.create(cart=self.cart, product=product, quantity=1)
+
+        # Cart with its totals, items joined with their products
+        with self.assertNumQueries(2):
+            response = self.client.get(self.cart_url)
+        self.assertEqual(response.data['data']['items_count'], 8)
+        self.assertEqual(response.data['data']['total'], Decimal('80.00'))
+
+    def test_add_item_returns_updated_totals(self):
+        """Test that adding an item returns the cart with updated totals"""
+        CartItem.objects.create(cart=self.cart, product=self.bands, quantity=1)
+
+        response = self.client.post(
+            self.cart_item_url,
+            {'product_id': self.protein.id, 'quantity': 1},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['data']['total'], Decimal('55.50'))
+        self.assertEqual(response.data['data']['items_count'], 2)
+
+
+class CheckoutAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.checkout_url = reverse('shopping:api:checkout')
+        self.user = User.objects.create_user(
+            email='buyer@example.com',
+            name='Buyer',
+            password='BuyerPassword123!'
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.product = Product.objects.create(
+            name='Kettlebell',
+            description='16kg kettlebell',
+            price=Decimal('60.00'),
+            discount_price=Decimal('45.00'),
+            stock=5
+        )
+        self.cart = Cart.objects.create(user=self.user)
+        self.checkout_data = {
+            'full_name': 'Buyer',
+            'email': 'buyer@example.com',
+            'phone': '0100000000',
+            'address': '1 Nile Street',
+            'city': 'Cairo',
+            'country': 'Egypt'
+        }
+
+    def test_checkout_creates_order(self):
+        """Test that checkout creates an order, decrements stock and clears the cart"""
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=2)
+
+        response = self.client.post(self.checkout_url, self.checkout_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        order = Order.objects.get(user=self.user)
+        self.assertEqual(order.total_amount, Decimal('90.00'))
+        self.assertEqual(order.items.get().price, Decimal('45.00'))
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+        self.assertFalse(self.cart.items.exists())
+
+    def test_checkout_refreshes_cached_product_stock(self):
+        """Test that a checkout invalidates the cached product detail"""
+        product_url = reverse('shopping:api:product_detail', kwargs={'pk': self.product.id})
+        self.client.get(product_url)
+        self.assertEqual(self.client.get(product_url)['X-Cache'], 'HIT')
+
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=2)
+        self.client.post(self.checkout_url, self.checkout_data, format='json')
+
+        response = self.client.get(product_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['data']['stock'], 3)
+
+    def test_checkout_with_empty_cart(self):
+        """Test that checkout fails when the cart is empty"""
+        response = self.client.post(self.checkout_url, self.checkout_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+    def test_checkout_with_insufficient_stock(self):
+        """Test that checkout fails without side effects when stock is too low"""
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=6)
+
+        response = self.client.post(self.checkout_url, self.checkout_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 5)
+        self.assertTrue(self.cart.items.exists())
+
+    def test_checkout_query_count_is_constant(self):
+        """Test that checkout does not issue queries per cart line"""
+        def checkout_queries(lines):
+            for index in range(lines):
+                product = Product.objects.create(
+                    name=f'Plate {lines}-{index}',
+                    description='Weight plate',
+                    price=Decimal('20.00'),
+                    stock=5
+                )
+                CartItem.objects.create(cart=self.cart, product=product, quantity=1)
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(self.checkout_url, self.checkout_data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(len(response.data['data']['items']), lines)
+            return len(context.captured_queries)
+
+        self.assertEqual(checkout_queries(1), checkout_queries(6))
+
+
+class ProductStockTests(TestCase):
+    def setUp(self):
+        self.dumbbell = Product.objects.create(
+            name='Dumbbell', description='10kg', price=Decimal('30.00'), stock=3
+        )
+        self.mat = Product.objects.create(
+            name='Yoga Mat', description='Non-slip', price=Decimal('20.00'), stock=1
+        )
+
+    def test_decrement_stock(self):
+        """Test that stock is decremented for all products in one update"""
+        updated = Product.objects.decrement_stock({self.dumbbell.id: 2, self.mat.id: 1})
+        self.assertEqual(updated, 2)
+
+        self.dumbbell.refresh_from_db()
+        self.mat.refresh_from_db()
+        self.assertEqual(self.dumbbell.stock, 1)
+        self.assertEqual(self.mat.stock, 0)
+
+    def test_decrement_stock_skips_products_without_enough_stock(self):
+        """Test that products without enough stock are not oversold"""
+        updated = Product.objects.decrement_stock({self.dumbbell.id: 2, self.mat.id: 2})
+        self.assertEqual(updated, 1)
+
+        self.mat.refresh_from_db()
+        self.assertEqual(self.mat.stock, 1)
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class SmartFitConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'smartfit'
+    verbose_name = 'SmartFit'
+
+    def ready(self):
+        from . import db
+        connection_created.connect(db.configure_sqlite, dispatch_uid='smartfit_sqlite_pragmas')
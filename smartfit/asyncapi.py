@@ -0,0 +1,60 @@
+"""
+Async API views, which an ASGI server can serve with
+``SMARTFIT_ASYNC_VIEWS=1`` (see ``smartfit.asgi``).
+
+DRF views are synchronous, so ``AsyncAPIViewMixin`` gives a view an async
+``dispatch``: authentication, permissions and throttling still run as
+DRF's ``initial()`` in a worker thread, and an ``async def`` handler is
+awaited on the event loop. Handlers must then only touch the database
+through the async ORM (``aget()``, ``async for``); a lazy relation loaded
+during serialization raises ``SynchronousOnlyOperation``, so the querysets
+of these views load everything their serializers read up front.
+
+Only the user profile has an async view. The catalog lists page with
+DRF's cursor pagination, which runs its query inline and synchronously,
+so an async version could only call it through ``sync_to_async``: that
+is what Django already does with the sync views under ASGI.
+
+URLconfs route with ``select_view``, which picks the async version when
+``settings.ASYNC_VIEWS`` is on (``SMARTFIT_ASYNC_VIEWS=1``). It is off by
+default, and must stay off under WSGI, where every async view would run
+in its own event loop.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+def select_view(view, async_view, **initkwargs):
+    """The view function of ``async_view`` with ``ASYNC_VIEWS`` on, else of ``view``"""
+    return (async_view if settings.ASYNC_VIEWS else view).as_view(**initkwargs)
+
+
+class AsyncAPIViewMixin:
+    """Dispatch a DRF view on the event loop, awaiting async handlers"""
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
@@ -0,0 +1,106 @@
+"""
+Response cache for read-mostly catalog endpoints.
+
+Catalog models are registered from their app's ``ready()`` under a
+namespace, e.g. every model in the diet plan tree under ``'diet_plans'``.
+Each namespace has a version token stored in the ``catalog`` cache, and
+every cached response key includes it. ``post_save``/``post_delete`` on
+any registered model replaces the token, which makes all responses cached
+for the namespace unreachable at once; they then age out of the cache
+without having to be found and deleted one by one.
+
+Code that changes catalog rows without sending signals (``update()``,
+``bulk_create()``, raw SQL) must call ``bump()`` itself.
+"""
+import hashlib
+import uuid
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.utils import translation
+from rest_framework import status
+from rest_framework.response import Response
+
+CACHE_ALIAS = 'catalog'
+
+# Registered models and the namespace each one invalidates
+_registry = {}
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def register(namespace, models):
+    """Invalidate ``namespace`` whenever a row of one of ``models`` changes"""
+    for model in models:
+        _registry[model] = namespace
+        post_save.connect(_invalidate, sender=model, dispatch_uid=f'cache_save_{model._meta.label}')
+        post_delete.connect(_invalidate, sender=model, dispatch_uid=f'cache_delete_{model._meta.label}')
+
+
+def get_version(namespace):
+    """Return the current version token of a namespace"""
+    key = f'version:{namespace}'
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        # A missing token (first use or evicted) starts a new version, so
+        # entries cached under an older token are never served again
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump(namespace):
+    """Invalidate every response cached for a namespace"""
+    get_cache().set(f'version:{namespace}', uuid.uuid4().hex, timeout=None)
+
+
+def response_cache_key(namespace, request):
+    """
+    Cache key of a GET request: the namespace version, the active
+    language and the absolute URL with its query params in a stable order.
+    """
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    url = request.build_absolute_uri(request.path)
+    fingerprint = hashlib.md5(f'{url}?{params}'.encode()).hexdigest()
+    return f'response:{namespace}:{get_version(namespace)}:{translation.get_language()}:{fingerprint}'
+
+
+def _invalidate(sender, **kwargs):
+    namespace = _registry[sender]
+    bump(namespace)
+    # Bump again once the transaction commits, in case another request
+    # cached the old rows between the change and the commit
+    transaction.on_commit(lambda: bump(namespace))
+
+
+class CatalogCacheMixin:
+    """
+    Serve successful GET responses of a catalog view from the catalog cache.
+
+    Authentication and permissions are still checked on every request,
+    only the queries and serialization are skipped on a hit.
+    """
+    cache_namespace = None
+
+    def get(self, request, *args, **kwargs):
+        cache = get_cache()
+        key = response_cache_key(self.cache_namespace, request)
+        data = cache.get(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
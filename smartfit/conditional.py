@@ -0,0 +1,93 @@
+"""
+Conditional GET (ETag / Last-Modified) for catalog detail endpoints.
+
+The validators of a resource are computed from its object tree with a
+single query: the latest ``updated_at`` and the number of rows along
+each related path, each path aggregated in a subquery of its own so the
+paths are never joined with one another. Counting the rows catches
+deletions, which do not move the latest ``updated_at``. When the
+client's copy is current
+the view answers ``304 Not Modified`` without loading or serializing the
+object.
+"""
+import hashlib
+from functools import lru_cache
+
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.utils import translation
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """
+    Answer conditional GETs of a detail view from the object tree's freshness.
+
+    ``freshness_paths`` lists the related lookups whose rows are part of
+    the response, e.g. ``('weeks', 'weeks__meals')`` for a diet plan.
+    """
+    freshness_paths = ()
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators()
+        if validators is None:
+            # Unknown object, the view answers with its usual 404
+            return super().get(request, *args, **kwargs)
+
+        etag, last_modified = validators
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # Clients may keep the response, but must revalidate it on every use
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_validators(self):
+        """Return the ETag and Last-Modified timestamp of the requested object"""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.get_queryset()
+        aggregates = freshness_aggregates(queryset.model, tuple(self.freshness_paths))
+        rows = queryset.filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        ).order_by().annotate(**aggregates).values(*aggregates, modified=F('updated_at'))[:1]
+        if not rows:
+            return None
+        freshness = rows[0]
+
+        last_modified = max(
+            value for name, value in freshness.items()
+            if name.startswith('modified') and value is not None
+        )
+        fingerprint = ':'.join(
+            [f'{name}={value}' for name, value in sorted(freshness.items())] +
+            [translation.get_language()]
+        )
+        etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+        return f'W/{etag}', int(last_modified.timestamp())
+
+
+@lru_cache(maxsize=None)
+def freshness_aggregates(model, paths):
+    """
+    Subqueries of the latest ``updated_at`` and the row count along each
+    of ``paths``, for the outer query's object. Each joins only its own
+    path. Built once per model, as building them takes longer than the
+    query of a small plan.
+    """
+    aggregates = {}
+    for index, path in enumerate(paths):
+        aggregates[f'modified_{index}'] = path_aggregate(model, Max(f'{path}__updated_at'))
+        aggregates[f'rows_{index}'] = path_aggregate(model, Count(path, distinct=True))
+    return aggregates
+
+
+def path_aggregate(model, aggregate):
+    """``aggregate`` over the related rows of the outer query's object"""
+    return Subquery(
+        model._default_manager.filter(pk=OuterRef('pk')).order_by()
+        .values('pk').annotate(value=aggregate).values('value')
+    )
@@ -0,0 +1,18 @@
+"""
+Per-connection setup of the database.
+
+``configure_sqlite`` is connected to ``connection_created`` in
+``SmartFitConfig.ready()`` and runs ``settings.SQLITE_PRAGMAS`` on every
+new SQLite connection. Pragmas such as ``synchronous`` and ``mmap_size``
+only last as long as the connection; ``journal_mode=WAL`` is stored in
+the database file, setting it again is a no-op.
+"""
+from django.conf import settings
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,95 @@
+"""
+Sparse fieldsets for the catalog list endpoints.
+
+A list request can ask for some of the fields of its rows only, either
+by name with ``?fields=id,name,final_price`` or with ``?view=slim``, the
+preset of the serializer's ``Meta.slim_fields`` for the mobile list
+screens. The other fields are removed from the serializer, so their
+``SerializerMethodField`` methods never run, and the SELECT is trimmed
+with ``.only()`` to the columns the remaining fields read.
+
+Each serializer field reads the column of its ``source`` when that is a
+concrete model field; ``Meta.field_columns`` names the columns of the
+others (display strings and method fields). Fields reading neither, like
+the count annotations of the plan lists, need no column.
+"""
+from rest_framework.exceptions import ValidationError
+
+SLIM = 'slim'
+FULL = 'full'
+
+
+class SparseFieldsetSerializerMixin:
+    """Keep only the fields named by the ``fields`` argument, if given"""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def get_columns(cls, fields):
+        """The model columns read by ``fields``, with the primary key"""
+        model = cls.Meta.model
+        concrete = {field.name for field in model._meta.concrete_fields}
+        field_columns = getattr(cls.Meta, 'field_columns', {})
+        declared = cls._declared_fields
+        columns = {model._meta.pk.name}
+        for name in fields:
+            if name in field_columns:
+                columns.update(field_columns[name])
+            elif name in declared:
+                source = declared[name].source or name
+                if source in concrete:
+                    columns.add(source)
+            elif name in concrete:
+                columns.add(name)
+        return columns
+
+
+class SparseFieldsetMixin:
+    """
+    Serve the ``?fields=`` and ``?view=slim`` sparse fieldsets of a list
+    view whose serializer has ``SparseFieldsetSerializerMixin``
+    """
+
+    def get_fieldset(self):
+        """The requested field names, or ``None`` for every field"""
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = self.parse_fieldset()
+        return self._fieldset
+
+    def parse_fieldset(self):
+        meta = self.get_serializer_class().Meta
+        fields = self.request.query_params.get('fields')
+        if fields:
+            names = [name.strip() for name in fields.split(',') if name.strip()]
+            unknown = [name for name in names if name not in meta.fields]
+            if unknown:
+                raise ValidationError({'fields': f"Unknown fields: {', '.join(unknown)}"})
+            return names
+
+        view = self.request.query_params.get('view', FULL)
+        if view == SLIM:
+            return list(meta.slim_fields)
+        if view != FULL:
+            raise ValidationError({'view': f'Must be "{SLIM}" or "{FULL}"'})
+        return None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_fieldset()
+        if fields is None:
+            return queryset
+        columns = self.get_serializer_class().get_columns(fields)
+        # Cursors are built from the ordering columns of the page's rows
+        concrete = {field.name for field in queryset.model._meta.concrete_fields}
+        for name in getattr(self.pagination_class, 'ordering', ()):
+            if name.lstrip('-') in concrete:
+                columns.add(name.lstrip('-'))
+        return queryset.only(*columns)
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_fieldset())
+        return super().get_serializer(*args, **kwargs)
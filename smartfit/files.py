@@ -0,0 +1,201 @@
+"""
+Static and media file serving.
+
+Replaces ``django.views.static.serve`` with views that send caching
+headers and answer revalidations with ``304 Not Modified``:
+
+- Content-hashed static files (see ``smartfit.storage``) are cached for
+  a year as immutable; other files are revalidated after a short max-age.
+- A pre-compressed ``.br``/``.gz`` copy is sent when the client accepts it.
+- Single byte ranges are answered with ``206 Partial Content``, so video
+  thumbnails and large images can be resumed.
+
+With ``SENDFILE_BACKEND`` set, the response body is handed over to the
+web server instead of being streamed through the Python worker:
+``'x-sendfile'`` (Apache mod_xsendfile, lighttpd) sends the file's path,
+``'x-accel-redirect'`` (nginx) sends a URL under ``SENDFILE_URL`` that
+an ``internal`` location maps to the same directory. Standalone,
+``FileResponse`` uses the server's ``wsgi.file_wrapper``, which most WSGI
+servers implement with ``sendfile()``.
+"""
+import mimetypes
+import posixpath
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+# Cache lifetimes, in seconds
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+STATIC_MAX_AGE = 60 * 5
+MEDIA_MAX_AGE = 60 * 60 * 24
+
+# Pre-compressed variants in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def serve_static(request, path):
+    """Serve a collected static file"""
+    immutable = path in getattr(staticfiles_storage, 'immutable_names', ())
+    if immutable:
+        cache_control = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    else:
+        cache_control = f'public, max-age={STATIC_MAX_AGE}'
+    return serve_file(
+        request, path, settings.STATIC_ROOT, 'static',
+        cache_control=cache_control, compressed=True
+    )
+
+
+def serve_media(request, path):
+    """Serve an uploaded media file"""
+    return serve_file(
+        request, path, settings.MEDIA_ROOT, 'media',
+        cache_control=f'max-age={MEDIA_MAX_AGE}'
+    )
+
+
+def serve_file(request, path, document_root, location, cache_control, compressed=False):
+    """
+    Serve ``path`` from ``document_root``. ``location`` names the root
+    under ``SENDFILE_URL`` for X-Accel-Redirect.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    fullpath = Path(safe_join(document_root, path))
+    if not fullpath.is_file():
+        raise Http404(f'"{path}" does not exist')
+    filename = fullpath.name
+
+    content_type, encoding = mimetypes.guess_type(str(fullpath))
+    content_type = content_type or 'application/octet-stream'
+    backend = getattr(settings, 'SENDFILE_BACKEND', None)
+
+    # nginx does not pass Content-Encoding through X-Accel-Redirect, it
+    # picks pre-compressed files itself with gzip_static
+    if compressed and backend != 'x-accel-redirect':
+        fullpath, path, encoding = negotiate_encoding(request, fullpath, path, encoding)
+
+    stat = fullpath.stat()
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}-{encoding or "identity"}')
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is None:
+        if backend:
+            response = sendfile_response(backend, fullpath, location, path, content_type)
+        else:
+            byte_range = None
+            if request.META.get('HTTP_IF_RANGE', etag) == etag:
+                byte_range = parse_range(request.META.get('HTTP_RANGE'), stat.st_size)
+            response = file_response(fullpath, stat.st_size, content_type, filename, byte_range)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = cache_control
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if compressed:
+        patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+def negotiate_encoding(request, fullpath, path, encoding):
+    """Pick the smallest pre-compressed variant the client accepts"""
+    if encoding:
+        return fullpath, path, encoding
+    accepted = {
+        value.split(';')[0].strip()
+        for value in request.META.get('HTTP_ACCEPT_ENCODING', '').split(',')
+    }
+    for name, suffix in ENCODINGS:
+        variant = fullpath.with_name(fullpath.name + suffix)
+        if name in accepted and variant.is_file():
+            return variant, path + suffix, name
+    return fullpath, path, None
+
+
+def sendfile_response(backend, fullpath, location, path, content_type):
+    """An empty response telling the web server which file to send"""
+    response = HttpResponse(content_type=content_type)
+    if backend == 'x-accel-redirect':
+        prefix = getattr(settings, 'SENDFILE_URL', '/_internal/')
+        response['X-Accel-Redirect'] = f"{prefix.rstrip('/')}/{location}/{path}"
+    elif backend == 'x-sendfile':
+        response['X-Sendfile'] = str(fullpath)
+    else:
+        raise ValueError(f'Unknown SENDFILE_BACKEND: {backend!r}')
+    return response
+
+
+def file_response(fullpath, size, content_type, filename, byte_range=None):
+    """
+    Stream the file, or a single byte range of it. ``filename`` is the
+    name of the requested file, which differs from a compressed variant's.
+    """
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    f = fullpath.open('rb')
+    if byte_range is None:
+        response = FileResponse(f, content_type=content_type, filename=filename)
+    else:
+        start, end = byte_range
+        f.seek(start)
+        response = FileResponse(
+            RangeFile(f, end - start + 1), content_type=content_type,
+            filename=filename, status=206
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def parse_range(header, size):
+    """
+    Return ``(start, end)`` of a single-range ``Range`` header, ``None``
+    to send the whole file, or ``False`` if the range is unsatisfiable.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        # Multiple ranges or other units, fall back to the whole file
+        return None
+    start, end = match.groups()
+    if not start:
+        if not end or int(end) == 0:
+            return False
+        # Suffix range, the last ``end`` bytes
+        return max(size - int(end), 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+class RangeFile:
+    """File wrapper that reads at most ``length`` bytes from the current position"""
+    def __init__(self, f, length):
+        self.f = f
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.f.close()
@@ -0,0 +1,262 @@
+"""
+Resized renditions of uploaded images.
+
+Every image gets a ``thumb``, ``card`` and ``full`` rendition in WebP and
+JPEG, scaled down to fit the rendition's box (never up). Renditions live
+under ``MEDIA_ROOT/renditions/`` next to a copy of the original's path,
+e.g. ``shopping/products/kettlebell.png`` has its card WebP at
+``renditions/shopping/products/kettlebell.png.card.webp``.
+
+When a registered model is saved with a new upload, a ``process_image``
+job is queued on the ``images`` queue (see ``jobs.queue``) that strips
+the photo's metadata if asked to and writes its renditions, so the
+upload request does not wait for them. Until the job has run, and for
+images uploaded before this existed, ``serve_rendition`` writes a missing
+or outdated rendition the first time it is requested, but only for
+images in the upload directory of a field registered with renditions,
+so private photos, registered with ``renditions=False``, never get public
+copies. Serializers expose the URLs through ``RenditionsField``.
+"""
+import os
+import posixpath
+import re
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.db.models.signals import post_save, pre_save
+from django.http import Http404
+from django.utils._os import safe_join
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+from jobs.queue import enqueue
+from smartfit.files import MEDIA_MAX_AGE, serve_file
+
+RENDITIONS_DIR = 'renditions'
+
+# Bounding box of each rendition, smallest first
+RENDITIONS = {
+    'thumb': (160, 160),
+    'card': (480, 480),
+    'full': (1200, 1200),
+}
+
+# Output formats with their Pillow format name and save options
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+RENDITION_RE = re.compile(
+    rf"^(?P<original>.+)\.(?P<name>{'|'.join(RENDITIONS)})\.(?P<format>{'|'.join(FORMATS)})$"
+)
+
+# Upload directory of each registered field, and whether its images have
+# renditions
+UPLOAD_DIRS = {}
+
+
+def register(model, *fields, strip_metadata=False, renditions=True):
+    """
+    Queue the processing of new uploads to ``fields`` whenever a ``model``
+    row is saved: removing EXIF and other metadata, such as the location a
+    photo was taken at, if ``strip_metadata``, and writing the renditions
+    if ``renditions``. The queued jobs are returned by ``upload_jobs``.
+    """
+    uid = f'images_{model._meta.label}_{"_".join(fields)}'
+    for field in fields:
+        directory = upload_dir(model, field)
+        # A directory shared with a field without renditions has none
+        UPLOAD_DIRS[directory] = UPLOAD_DIRS.get(directory, True) and renditions
+
+    def find_uploads(sender, instance, raw=False, **kwargs):
+        # A file assigned by a form or serializer is saved to the storage
+        # by the field, after this signal, unless it is already committed
+        instance.__dict__.setdefault('_new_uploads', {})[uid] = [] if raw else [
+            field for field in fields
+            if getattr(instance, field) and not getattr(instance, field)._committed
+        ]
+
+    def queue_processing(sender, instance, **kwargs):
+        instance._upload_jobs = upload_jobs(instance) + [
+            enqueue(
+                process_image, queue='images',
+                model=model._meta.label, pk=instance.pk, field=field,
+                name=getattr(instance, field).name,
+                strip_metadata=strip_metadata, renditions=renditions,
+            )
+            for field in instance.__dict__.get('_new_uploads', {}).pop(uid, [])
+        ]
+
+    pre_save.connect(find_uploads, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(queue_processing, sender=model, weak=False, dispatch_uid=uid)
+
+
+def upload_dir(model, field):
+    """Media-relative directory the uploads of a model's file field are saved in"""
+    upload_to = model._meta.get_field(field).upload_to
+    if callable(upload_to):
+        raise ImproperlyConfigured(f'{model._meta.label}.{field} needs a string upload_to')
+    if '%' in upload_to:
+        # Dated directories, such as 'photos/%Y/'
+        return upload_to.split('%')[0]
+    return posixpath.join(upload_to, '')
+
+
+def has_renditions(original):
+    """Whether the media file ``original`` was uploaded to a field with renditions"""
+    if posixpath.normpath(original) != original:
+        # Such as 'products/../body_measurements/photo.jpg'
+        return False
+    directories = [directory for directory in UPLOAD_DIRS if original.startswith(directory)]
+    return bool(directories) and UPLOAD_DIRS[max(directories, key=len)]
+
+
+def upload_jobs(instance):
+    """Jobs queued for the uploads saved with ``instance``"""
+    return getattr(instance, '_upload_jobs', [])
+
+
+def process_image(model, pk, field, name, strip_metadata=False, renditions=True):
+    """Job processing the upload ``name`` of a model instance's image field"""
+    instance = apps.get_model(model)._base_manager.filter(pk=pk).first()
+    if instance is None or getattr(instance, field).name != name:
+        # Deleted, or replaced by a newer upload with a job of its own
+        return {'skipped': True}
+    stripped = strip_image_metadata(name) if strip_metadata else False
+    if renditions:
+        generate_renditions(name)
+    return {'metadata_removed': stripped, 'renditions': renditions}
+
+
+def strip_image_metadata(original):
+    """
+    Rewrite a media file without its EXIF and XMP metadata, applying its
+    EXIF orientation first. Returns whether the file had any.
+    """
+    path = safe_join(settings.MEDIA_ROOT, original)
+    with Image.open(path) as image:
+        if getattr(image, 'is_animated', False):
+            return False
+        if not (image.getexif() or 'exif' in image.info or 'xmp' in image.info):
+            return False
+        pil_format = image.format
+        options = {}
+        if 'icc_profile' in image.info:
+            options['icc_profile'] = image.info['icc_profile']
+        if pil_format == 'JPEG':
+            options['quality'] = 95
+        # Pillow only writes metadata passed to save(), so this drops it
+        save_atomically(ImageOps.exif_transpose(image), path, pil_format, **options)
+    return True
+
+
+def rendition_name(original, name, fmt):
+    """Media-relative path of a rendition of the ``original`` media file"""
+    return f'{RENDITIONS_DIR}/{original}.{name}.{fmt}'
+
+
+def generate_renditions(original):
+    """Write every missing or outdated rendition of a media file"""
+    for name in RENDITIONS:
+        for fmt in FORMATS:
+            ensure_rendition(original, name, fmt)
+
+
+def ensure_rendition(original, name, fmt):
+    """
+    Return the path of a rendition, writing it first if it is missing or
+    older than its original. Raises ``OSError`` if the original does not
+    exist or is not an image.
+    """
+    if original.startswith(f'{RENDITIONS_DIR}/'):
+        raise FileNotFoundError('Renditions have no renditions')
+    source = safe_join(settings.MEDIA_ROOT, original)
+    target = safe_join(settings.MEDIA_ROOT, rendition_name(original, name, fmt))
+    source_mtime = os.stat(source).st_mtime
+    try:
+        if os.stat(target).st_mtime >= source_mtime:
+            return target
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    pil_format, options = FORMATS[fmt]
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(RENDITIONS[name], Image.LANCZOS)
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        if fmt == 'webp' and has_alpha:
+            image = image.convert('RGBA')
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        save_atomically(image, target, pil_format, **options)
+    return target
+
+
+def save_atomically(image, path, pil_format, **options):
+    """
+    Save ``image`` through a temporary file, so concurrent requests never
+    serve a half-written file
+    """
+    temporary = f'{path}.{uuid.uuid4().hex}.tmp'
+    try:
+        image.save(temporary, pil_format, **options)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def serve_rendition(request, path):
+    """Serve a rendition, generating it on first request"""
+    match = RENDITION_RE.match(path)
+    if not match:
+        raise Http404('Unknown rendition')
+    if not has_renditions(match['original']):
+        raise Http404('Unknown image')
+    try:
+        ensure_rendition(match['original'], match['name'], match['format'])
+    except OSError:
+        # Missing original, or a file Pillow cannot read
+        raise Http404('Unknown image')
+    return serve_file(
+        request, f'{RENDITIONS_DIR}/{path}', settings.MEDIA_ROOT, 'media',
+        cache_control=f'max-age={MEDIA_MAX_AGE}'
+    )
+
+
+class RenditionsField(serializers.ReadOnlyField):
+    """
+    Rendition URLs of an image field, one map per format, for example::
+
+        {
+            "webp": {
+                "thumb": ".../kettlebell.png.thumb.webp",
+                "card": ".../kettlebell.png.card.webp",
+                "full": ".../kettlebell.png.full.webp",
+                "srcset": ".../kettlebell.png.thumb.webp 160w, ..."
+            },
+            "jpeg": {...}
+        }
+    """
+    def to_representation(self, value):
+        if not value:
+            return None
+        request = self.context.get('request')
+        renditions = {}
+        for fmt in FORMATS:
+            urls = {}
+            for name in RENDITIONS:
+                url = default_storage.url(rendition_name(value.name, name, fmt))
+                urls[name] = request.build_absolute_uri(url) if request else url
+            # Widths are those of the bounding boxes, which landscape images
+            # fill; opening every image for its real size would cost more
+            urls['srcset'] = ', '.join(
+                f'{urls[name]} {width}w' for name, (width, height) in RENDITIONS.items()
+            )
+            renditions[fmt] = urls
+        return renditions
@@ -0,0 +1,245 @@
+import asyncio
+import io
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import Profile
+from diet_plans.models import DietPlan
+from recipe_library.models import Recipe
+from shopping.models import Product
+from smartfit import cache
+from workouts.models import WorkoutPlan
+
+ENDPOINTS = {
+    'products': 'shopping:api:product_list',
+    'recipes': 'recipe_library:api:list',
+    'diet_plans': 'diet_plans:api:list',
+    'workout_plans': 'workouts:api:plan_list',
+    'profile': 'accounts:api:profile',
+}
+
+# Rows of each catalog model created for the run, then deleted
+SEEDED = [
+    (Product, 'name', {'description': 'Benchmark product', 'price': Decimal('10.00'), 'stock': 10}),
+    (Recipe, 'title', {'description': 'Benchmark recipe', 'ingredients': 'Oats', 'instructions': 'Mix'}),
+    (DietPlan, 'name', {'description': 'Benchmark diet plan'}),
+    (WorkoutPlan, 'name', {'description': 'Benchmark workout plan'}),
+]
+
+DUMMY_CATALOG_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    cache.CACHE_ALIAS: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the catalog lists and the profile under WSGI and ASGI (where '
+        'the profile has an async view), reporting requests per second and latency '
+        'percentiles. Each server runs in-process in its own subprocess; pass '
+        '--url to load a running server instead. Benchmark rows are deleted '
+        'afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000,
+                            help='Requests per endpoint (default: 2000)')
+        parser.add_argument('--concurrency', type=int, default=32,
+                            help='Requests in flight at once (default: 32)')
+        parser.add_argument('--endpoint', action='append', choices=list(ENDPOINTS),
+                            help='Endpoint to load, repeatable (default: all)')
+        parser.add_argument('--rows', type=int, default=50,
+                            help='Rows of each catalog model to create (default: 50)')
+        parser.add_argument('--cache', action='store_true',
+                            help='Serve catalog lists from the response cache '
+                                 '(default: off, so every request reaches the database)')
+        parser.add_argument('--url',
+                            help='Base URL of a running server, e.g. http://localhost:8000')
+        parser.add_argument('--server', choices=['wsgi', 'asgi'], help='Run one server only')
+        parser.add_argument('--user', help='Email of the user to authenticate as')
+
+    def handle(self, *args, **options):
+        options['endpoint'] = options['endpoint'] or list(ENDPOINTS)
+        if options['user']:
+            self.run(options)
+            return
+
+        marker = f'bench-asgi-{uuid.uuid4().hex[:8]}'
+        user = self.seed(marker, options['rows'])
+        try:
+            options['user'] = user.email
+            if options['url'] or options['server']:
+                self.run(options)
+            else:
+                for server in ('wsgi', 'asgi'):
+                    self.run_subprocess(server, options)
+        finally:
+            self.clean_up(marker)
+
+    def seed(self, marker, rows):
+        for model, name_field, fields in SEEDED:
+            model.objects.bulk_create([
+                model(**{name_field: f'{marker} {index}'}, **fields) for index in range(rows)
+            ])
+        for namespace in ('products', 'recipes', 'diet_plans', 'workout_plans'):
+            cache.bump(namespace)
+        user = get_user_model().objects.create_user(
+            email=f'{marker}@example.com', name='Benchmark', password=uuid.uuid4().hex
+        )
+        Profile.objects.create(user=user)
+        return user
+
+    def clean_up(self, marker):
+        for model, name_field, fields in SEEDED:
+            model.objects.filter(**{f'{name_field}__startswith': marker}).delete()
+        get_user_model().objects.filter(email=f'{marker}@example.com').delete()
+
+    def run_subprocess(self, server, options):
+        # Views are picked when the URLconf is imported, so each server
+        # needs a fresh process
+        command = [
+            sys.executable, sys.argv[0], 'bench_asgi', '--server', server,
+            '--user', options['user'],
+            '--requests', str(options['requests']),
+            '--concurrency', str(options['concurrency']),
+        ]
+        for endpoint in options['endpoint']:
+            command += ['--endpoint', endpoint]
+        if options['cache']:
+            command.append('--cache')
+        env = dict(os.environ, SMARTFIT_ASYNC_VIEWS='1' if server == 'asgi' else '0')
+        self.stdout.flush()
+        if subprocess.run(command, env=env).returncode:
+            raise CommandError(f'The {server} benchmark failed')
+
+    def run(self, options):
+        user = get_user_model().objects.get(email=options['user'])
+        token = str(RefreshToken.for_user(user).access_token)
+        if options['url']:
+            label, load = options['url'], self.load_url
+        else:
+            label = options['server'] or ('asgi' if os.environ.get('SMARTFIT_ASYNC_VIEWS') == '1' else 'wsgi')
+            load = self.load_asgi if label == 'asgi' else self.load_wsgi
+
+        self.stdout.write(
+            f"\n{label}: {options['requests']} requests per endpoint, "
+            f"{options['concurrency']} concurrent, catalog cache {'on' if options['cache'] else 'off'}"
+        )
+        caches = override_settings() if options['cache'] else override_settings(CACHES=DUMMY_CATALOG_CACHE)
+        with caches:
+            for endpoint in options['endpoint']:
+                path = reverse(ENDPOINTS[endpoint])
+                # Warm up the URLconf, connections and code paths
+                load(options, path, token, 1, min(options['concurrency'], 10))
+                started = time.perf_counter()
+                latencies = load(options, path, token, options['concurrency'], options['requests'])
+                self.report(endpoint, latencies, time.perf_counter() - started)
+
+    def load_wsgi(self, options, path, token, concurrency, count):
+        handler = WSGIHandler()
+
+        def request():
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '',
+                'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+                'HTTP_AUTHORIZATION': f'Bearer {token}', 'SERVER_PROTOCOL': 'HTTP/1.1',
+                'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+                'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+            }
+            statuses = []
+            response = handler(environ, lambda status, headers, exc_info=None: statuses.append(status))
+            b''.join(response)
+            response.close()
+            return statuses[0]
+
+        return self.load_threads(request, concurrency, count)
+
+    def load_url(self, options, path, token, concurrency, count):
+        url = options['url'].rstrip('/') + path
+
+        def request():
+            with urllib.request.urlopen(urllib.request.Request(
+                url, headers={'Authorization': f'Bearer {token}'}
+            )) as response:
+                response.read()
+                return f'{response.status}'
+
+        return self.load_threads(request, concurrency, count)
+
+    def load_threads(self, request, concurrency, count):
+        def timed(_):
+            started = time.perf_counter()
+            status = request()
+            if not status.startswith('200'):
+                raise CommandError(f'Unexpected response: {status}')
+            return time.perf_counter() - started
+
+        with ThreadPoolExecutor(concurrency) as pool:
+            return list(pool.map(timed, range(count)))
+
+    def load_asgi(self, options, path, token, concurrency, count):
+        application = get_asgi_application()
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'localhost'), (b'authorization', f'Bearer {token}'.encode())],
+            'server': ('localhost', 80), 'client': ('127.0.0.1', 50000),
+        }
+
+        async def request():
+            received = False
+            messages = []
+
+            async def receive():
+                nonlocal received
+                if received:
+                    # The client never disconnects, Django stops listening
+                    # once the response is sent
+                    await asyncio.Event().wait()
+                received = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+            async def send(message):
+                messages.append(message)
+
+            started = time.perf_counter()
+            await application(dict(scope), receive, send)
+            elapsed = time.perf_counter() - started
+            if messages[0]['status'] != 200:
+                raise CommandError(f"Unexpected response: {messages[0]['status']}")
+            return elapsed
+
+        async def worker(share, latencies):
+            for _ in range(share):
+                latencies.append(await request())
+
+        async def main():
+            latencies = []
+            shares = [count // concurrency + (index < count % concurrency) for index in range(concurrency)]
+            await asyncio.gather(*(worker(share, latencies) for share in shares))
+            return latencies
+
+        return asyncio.run(main())
+
+    def report(self, label, latencies, elapsed):
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f'{label:<14} {len(latencies) / elapsed:>8.0f} req/s   '
+            f'p50 {percentiles[49] * 1000:>7.1f} ms   p99 {percentiles[98] * 1000:>7.1f} ms'
+        )
@@ -0,0 +1,85 @@
+import random
+import shutil
+import tempfile
+from decimal import Decimal
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from PIL import Image
+
+from shopping.models import Product
+from smartfit.images import FORMATS, RENDITIONS, generate_renditions, rendition_name
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the image bytes a product list page downloads with the '
+        'originals against each rendition. Runs on a temporary media root '
+        'inside a rolled-back transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=20,
+                            help='Products on the page (default: 20)')
+        parser.add_argument('--width', type=int, default=2400,
+                            help='Width of the uploaded photos (default: 2400)')
+        parser.add_argument('--height', type=int, default=1600,
+                            help='Height of the uploaded photos (default: 1600)')
+
+    def handle(self, *args, **options):
+        media_root = tempfile.mkdtemp()
+        try:
+            with override_settings(MEDIA_ROOT=media_root), transaction.atomic():
+                products = self.create_products(options['products'], options['width'], options['height'])
+                self.report(products)
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            shutil.rmtree(media_root)
+
+    def create_products(self, count, width, height):
+        rng = random.Random(42)
+        products = []
+        for i in range(count):
+            image = Image.new('RGB', (width, height))
+            image.putdata([
+                (x * 255 // width, y * 255 // height, rng.randrange(256))
+                for y in range(height) for x in range(width)
+            ])
+            content = ContentFile(b'', name=f'bench-{i}.jpg')
+            image.save(content, 'JPEG', quality=90)
+            product = Product(name=f'Bench product {i}', description='Benchmark',
+                              price=Decimal('10.00'), stock=1)
+            product.image.save(content.name, content)
+            # Run the work of the queued processing job here
+            generate_renditions(product.image.name)
+            products.append(product)
+        return products
+
+    def report(self, products):
+        count = len(products)
+        original = sum(default_storage.size(p.image.name) for p in products)
+        self.stdout.write(f'{count} products, {original / count / 1024:.0f} KB per original\n')
+        self.stdout.write(f"{'image':<14} {'page total':>12} {'per image':>12} {'saved':>8}")
+        self.row('original', original, count, original)
+        for name in RENDITIONS:
+            for fmt in FORMATS:
+                total = sum(
+                    default_storage.size(rendition_name(p.image.name, name, fmt))
+                    for p in products
+                )
+                self.row(f'{name}.{fmt}', total, count, original)
+
+    def row(self, label, total, count, original):
+        self.stdout.write(
+            f'{label:<14} {total / 1024:>9.0f} KB {total / count / 1024:>9.1f} KB '
+            f'{100 - total * 100 / original:>7.1f}%'
+        )
@@ -0,0 +1,101 @@
+import io
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.urls import reverse
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from diet_plans.api import DietPlanDetailView
+from diet_plans.models import MealType
+from shopping.api import OrderListView
+from smartfit import renderers, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's JSON renderer and parser with those of "
+        'smartfit.renderers on the largest responses: a diet plan with a meal '
+        'of every type each day, and a page of order history. The rows are '
+        'created in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--weeks', type=int, default=4,
+                            help='Weeks of the diet plan (default: 4)')
+        parser.add_argument('--orders', type=int, default=100,
+                            help='Orders on the page (default: 100, the maximum page size)')
+        parser.add_argument('--items', type=int, default=10,
+                            help='Items of each order (default: 10)')
+        parser.add_argument('--repeat', type=int, default=200,
+                            help='Renders and parses of each payload (default: 200)')
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            raise CommandError('orjson is not installed, both renderers would be the same')
+
+        with transaction.atomic():
+            payloads = self.build_payloads(options)
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{options['repeat']} runs each, time per run")
+        for label, data in payloads:
+            self.compare(label, data, options['repeat'])
+
+    def build_payloads(self, options):
+        """The data of the diet plan detail and order list responses"""
+        plan = seed.seed_diet_plans(1, weeks=options['weeks'], meals_per_day=len(MealType.values),
+                                    prefix='Benchmark diet plan')[0]
+        products = seed.seed_products(options['items'], prefix='Benchmark product')
+        user = get_user_model().objects.create_user(
+            email='bench-json@example.com', name='Benchmark', password=None
+        )
+        seed.seed_orders([user], options['orders'], products, items_per_order=options['items'])
+
+        factory = APIRequestFactory()
+
+        def get(view, path, **kwargs):
+            request = factory.get(path, HTTP_HOST='localhost')
+            force_authenticate(request, user=user)
+            response = view.as_view()(request, **kwargs)
+            if response.status_code != 200:
+                raise CommandError(f'{path} answered {response.status_code}')
+            return response.data
+
+        meals = options['weeks'] * 7 * len(MealType.values)
+        return [
+            (f'diet plan ({meals} meals)', get(
+                DietPlanDetailView, reverse('diet_plans:api:detail', kwargs={'pk': plan.pk}), pk=plan.pk
+            )),
+            (f"orders ({options['orders']} x {options['items']} items)", get(
+                OrderListView, f"{reverse('shopping:api:order_list')}?page_size={options['orders']}"
+            )),
+        ]
+
+    def compare(self, label, data, repeat):
+        body = JSONRenderer().render(data)
+        if renderers.FastJSONRenderer().render(data) != body:
+            raise CommandError(f'The renderers disagree on the {label}')
+
+        self.stdout.write(f'\n{label}: {len(body) / 1024:.0f} KiB')
+        for action, slow, fast in [
+            ('render', lambda: JSONRenderer().render(data),
+             lambda: renderers.FastJSONRenderer().render(data)),
+            ('parse', lambda: JSONParser().parse(io.BytesIO(body)),
+             lambda: renderers.FastJSONParser().parse(io.BytesIO(body))),
+        ]:
+            slow_time, fast_time = self.time(slow, repeat), self.time(fast, repeat)
+            self.stdout.write(
+                f'  {action:<7} json {slow_time * 1000:>7.2f} ms   orjson {fast_time * 1000:>7.2f} ms'
+                f'   {slow_time / fast_time:>5.1f}x'
+            )
+
+    def time(self, function, repeat):
+        function()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        return (time.perf_counter() - started) / repeat
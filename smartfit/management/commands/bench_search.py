@@ -0,0 +1,96 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from recipe_library.models import Recipe
+from smartfit import search
+
+FOOD_WORDS = (
+    'chicken beef salmon tuna tofu lentil bean chickpea quinoa rice oat barley '
+    'spinach kale broccoli carrot tomato onion garlic ginger pepper cumin '
+    'paprika cinnamon yogurt cheese egg milk almond walnut peanut honey lemon '
+    'lime mango banana apple berry avocado olive sesame coconut mint basil '
+    'grill roast bake simmer steam blend toss whisk marinate sear chop slice'
+).split()
+
+SYLLABLES = 'ba ka la ma na ra sa ta za bo ko lo mo no ro so to ze mi ri'.split()
+
+
+def build_vocabulary(rng, size=5000):
+    """Food words plus generated words, so terms have realistic selectivity"""
+    words = set(FOOD_WORDS)
+    while len(words) < size:
+        words.add(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare full-text recipe search with the icontains path at several '
+        'table sizes. Runs inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000],
+                            help='Numbers of recipes to benchmark (default: 10000 100000)')
+        parser.add_argument('--queries', type=int, default=30,
+                            help='Queries timed per strategy (default: 30)')
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        self.words = build_vocabulary(rng)
+        terms = [rng.choice(self.words) for _ in range(options['queries'])]
+        prefixes = [term[:3] for term in terms]
+
+        with transaction.atomic():
+            created = 0
+            for size in sorted(options['sizes']):
+                self.seed(rng, size - created)
+                created = size
+                search.rebuild_index(Recipe)
+
+                self.stdout.write(f'\n{size} recipes')
+                self.report('icontains (title)', terms, lambda term: Recipe.objects.filter(
+                    title__icontains=term
+                ))
+                self.report('icontains (all fields)', terms, lambda term: Recipe.objects.filter(
+                    Q(title__icontains=term) | Q(description__icontains=term) |
+                    Q(ingredients__icontains=term) | Q(instructions__icontains=term)
+                ))
+                self.report('full-text (ranked)', terms, lambda term: search.search(
+                    Recipe.objects.all(), term
+                ))
+                self.report('full-text (prefix)', prefixes, lambda term: search.search(
+                    Recipe.objects.all(), term
+                ))
+            transaction.set_rollback(True)
+
+    def seed(self, rng, count):
+        batch = []
+        for index in range(count):
+            batch.append(Recipe(
+                title=' '.join(rng.choices(self.words, k=3)).title(),
+                description=' '.join(rng.choices(self.words, k=12)),
+                ingredients=', '.join(rng.choices(self.words, k=8)),
+                instructions=' '.join(rng.choices(self.words, k=30)),
+            ))
+            if len(batch) == 1000:
+                Recipe.objects.bulk_create(batch)
+                batch = []
+        Recipe.objects.bulk_create(batch)
+
+    def report(self, label, terms, build_queryset):
+        timings = []
+        for term in terms:
+            started = time.perf_counter()
+            # First page, as served by the list endpoint
+            list(build_queryset(term)[:20])
+            timings.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f'  {label:<24} median {statistics.median(timings):8.2f} ms   '
+            f'max {max(timings):8.2f} ms'
+        )
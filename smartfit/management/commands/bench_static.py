@@ -0,0 +1,91 @@
+import os
+import random
+import shutil
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.views.static import serve
+from PIL import Image
+
+from smartfit.files import serve_media
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare image requests per second through django.views.static.serve '
+        'and smartfit.files. The benchmark image is removed afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000,
+                            help='Requests per scenario (default: 2000)')
+        parser.add_argument('--width', type=int, default=800,
+                            help='Width of the benchmark JPEG (default: 800)')
+        parser.add_argument('--height', type=int, default=600,
+                            help='Height of the benchmark JPEG (default: 600)')
+
+    def handle(self, *args, **options):
+        directory = os.path.join(settings.MEDIA_ROOT, f'bench-static-{uuid.uuid4().hex[:8]}')
+        os.makedirs(directory)
+        try:
+            path = self.create_image(directory, options['width'], options['height'])
+            self.stdout.write(f'Image: {os.path.getsize(path) / 1024:.0f} KB, '
+                              f"{options['requests']} requests per scenario\n")
+            self.run_scenarios(os.path.relpath(path, settings.MEDIA_ROOT), options['requests'])
+        finally:
+            shutil.rmtree(directory)
+
+    def create_image(self, directory, width, height):
+        rng = random.Random(42)
+        image = Image.new('RGB', (width, height))
+        image.putdata([
+            (x * 255 // width, y * 255 // height, rng.randrange(256))
+            for y in range(height) for x in range(width)
+        ])
+        path = os.path.join(directory, 'photo.jpg')
+        image.save(path, 'JPEG', quality=85)
+        return path
+
+    def run_scenarios(self, path, count):
+        factory = RequestFactory()
+        url = f'/media/{path}'
+
+        def before(**headers):
+            return serve(factory.get(url, **headers), path, document_root=settings.MEDIA_ROOT)
+
+        def after(**headers):
+            return serve_media(factory.get(url, **headers), path)
+
+        response = after()
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        response.close()
+
+        self.report('before: full download', count, before)
+        self.report('before: If-Modified-Since', count, lambda: before(
+            HTTP_IF_MODIFIED_SINCE=last_modified
+        ))
+        self.report('after: full download', count, after)
+        self.report('after: If-None-Match', count, lambda: after(HTTP_IF_NONE_MATCH=etag))
+        self.report('after: byte range (64 KB)', count, lambda: after(HTTP_RANGE='bytes=0-65535'))
+        with override_settings(SENDFILE_BACKEND='x-accel-redirect'):
+            self.report('after: X-Accel-Redirect', count, after)
+
+    def report(self, label, count, request):
+        transferred = 0
+        started = time.perf_counter()
+        for _ in range(count):
+            response = request()
+            if response.streaming:
+                transferred += sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                transferred += len(response.content)
+            response.close()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f'{label:<28} {count / elapsed:>9.0f} req/s   '
+            f'{transferred / count / 1024:>7.1f} KB/response'
+        )
@@ -0,0 +1,185 @@
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from shopping.models import Cart, Product
+
+# Environment of each database profile, see DATABASES in the settings
+PROFILES = {
+    'sqlite': {'SMARTFIT_DB': 'sqlite', 'SMARTFIT_ENV': 'development'},
+    'sqlite-production': {'SMARTFIT_DB': 'sqlite', 'SMARTFIT_ENV': 'production'},
+    'postgres': {'SMARTFIT_DB': 'postgres', 'SMARTFIT_ENV': 'development'},
+    'postgres-production': {'SMARTFIT_DB': 'postgres', 'SMARTFIT_ENV': 'production'},
+}
+
+# Registrations measure the database, not PBKDF2
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare concurrent write throughput (registrations and cart adds) '
+        'of the database profiles. Each profile runs in its own subprocess; '
+        'SQLite profiles use a fresh temporary database, PostgreSQL profiles '
+        'the migrated POSTGRES_* database, from which the benchmark rows are '
+        'deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000,
+                            help='Requests per scenario (default: 1000)')
+        parser.add_argument('--concurrency', type=int, default=16,
+                            help='Requests in flight at once (default: 16)')
+        parser.add_argument('--profile', action='append', choices=list(PROFILES),
+                            help='Profile to run, repeatable (default: sqlite, sqlite-production)')
+        parser.add_argument('--run', action='store_true',
+                            help='Run the scenarios against the configured database')
+
+    def handle(self, *args, **options):
+        if options['run']:
+            self.run(options['requests'], options['concurrency'])
+            return
+
+        profiles = options['profile'] or ['sqlite', 'sqlite-production']
+        directory = tempfile.mkdtemp()
+        try:
+            template = None
+            for profile in profiles:
+                env = dict(os.environ, **PROFILES[profile])
+                if env['SMARTFIT_DB'] == 'sqlite':
+                    if template is None:
+                        template = os.path.join(directory, 'template.sqlite3')
+                        self.manage(['migrate', '--verbosity', '0'], dict(env, SQLITE_PATH=template))
+                    env['SQLITE_PATH'] = os.path.join(directory, f'{profile}.sqlite3')
+                    shutil.copyfile(template, env['SQLITE_PATH'])
+
+                self.stdout.write(f'\n{profile}')
+                self.stdout.flush()
+                self.manage([
+                    'bench_writes', '--run',
+                    '--requests', str(options['requests']),
+                    '--concurrency', str(options['concurrency']),
+                ], env)
+        finally:
+            shutil.rmtree(directory)
+
+    def manage(self, arguments, env):
+        if subprocess.run([sys.executable, sys.argv[0], *arguments], env=env).returncode:
+            raise CommandError(f"manage.py {' '.join(arguments)} failed")
+
+    def run(self, requests, concurrency):
+        settings_dict = connection.settings_dict
+        self.stdout.write(
+            f"{connection.vendor}, CONN_MAX_AGE={settings_dict['CONN_MAX_AGE']}, "
+            f"{self.describe_connection()}; {requests} requests, {concurrency} concurrent"
+        )
+        marker = f'bench-writes-{uuid.uuid4().hex[:8]}'
+        with override_settings(PASSWORD_HASHERS=FAST_HASHERS):
+            try:
+                self.run_scenarios(marker, requests, concurrency)
+            finally:
+                get_user_model().objects.filter(email__startswith=marker).delete()
+                Product.objects.filter(name__startswith=marker).delete()
+
+    def describe_connection(self):
+        if connection.vendor != 'sqlite':
+            return 'server-side durability'
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+            cursor.execute('PRAGMA synchronous')
+            synchronous = {0: 'OFF', 1: 'NORMAL', 2: 'FULL', 3: 'EXTRA'}[cursor.fetchone()[0]]
+        connection.close()
+        return f'journal_mode={journal_mode}, synchronous={synchronous}'
+
+    def run_scenarios(self, marker, requests, concurrency):
+        handler = WSGIHandler()
+        numbers = count()
+
+        def register():
+            number = next(numbers)
+            return self.post(handler, reverse('accounts:api:register'), {
+                'email': f'{marker}-{number}@example.com', 'name': f'User {number}',
+                'password': 'BenchPassword123!', 'password2': 'BenchPassword123!',
+            })
+
+        products = Product.objects.bulk_create([
+            Product(name=f'{marker} {index}', description='Benchmark product',
+                    price=Decimal('10.00'), stock=1000000)
+            for index in range(50)
+        ])
+        shoppers = [
+            get_user_model().objects.create_user(
+                email=f'{marker}-shopper-{index}@example.com', name='Shopper',
+                password=uuid.uuid4().hex
+            )
+            for index in range(concurrency)
+        ]
+        Cart.objects.bulk_create([Cart(user=user) for user in shoppers])
+        tokens = [str(RefreshToken.for_user(user).access_token) for user in shoppers]
+        connection.close()
+
+        def add_to_cart():
+            number = next(numbers)
+            return self.post(handler, reverse('shopping:api:cart_item_add'), {
+                'product_id': products[number % len(products)].pk, 'quantity': 1,
+            }, token=tokens[number % len(tokens)])
+
+        self.report('registrations', requests, concurrency, register)
+        self.report('cart adds', requests, concurrency, add_to_cart)
+
+    def post(self, handler, path, data, token=None):
+        body = json.dumps(data).encode()
+        environ = {
+            'REQUEST_METHOD': 'POST', 'PATH_INFO': path, 'QUERY_STRING': '',
+            'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(body)),
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+            'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body), 'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+        }
+        if token:
+            environ['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        statuses = []
+        response = handler(environ, lambda status, headers, exc_info=None: statuses.append(status))
+        b''.join(response)
+        response.close()
+        return int(statuses[0].split()[0])
+
+    def report(self, label, requests, concurrency, request):
+        def timed(_):
+            started = time.perf_counter()
+            status = request()
+            return time.perf_counter() - started, status
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(timed, range(requests)))
+        elapsed = time.perf_counter() - started
+
+        latencies = [latency for latency, status in results]
+        errors = sum(1 for latency, status in results if status >= 300)
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f'  {label:<14} {requests / elapsed:>7.0f} req/s   '
+            f'p50 {percentiles[49] * 1000:>7.1f} ms   p99 {percentiles[98] * 1000:>7.1f} ms   '
+            f'{errors} errors'
+        )
@@ -0,0 +1,141 @@
+import re
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve, reverse
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from diet_plans.models import DietPlanCategory
+from recipe_library.models import RecipeCategory
+from shopping.models import ProductCategory
+from workouts.models import WorkoutCategory, DifficultyLevel, VideoTutorial
+
+User = get_user_model()
+
+# (method, url name, request data) for every list or lookup endpoint whose
+# query shape depends on the indexes. Callables are evaluated at run time.
+ENDPOINTS = [
+    ('get', 'shopping:api:product_list', {}),
+    ('get', 'shopping:api:product_list', {'category': ProductCategory.values[0]}),
+    ('get', 'shopping:api:product_list', {'featured': 'true'}),
+    ('get', 'shopping:api:cart', {}),
+    ('get', 'shopping:api:order_list', {}),
+    ('get', 'workouts:api:plan_list', {}),
+    ('get', 'workouts:api:plan_list', {'category': WorkoutCategory.values[0]}),
+    ('get', 'workouts:api:plan_list', {'difficulty': DifficultyLevel.values[0]}),
+    ('get', 'workouts:api:plan_list', {'featured': 'true'}),
+    ('get', 'workouts:api:user_workout_list', {}),
+    ('get', 'workouts:api:video_library', {}),
+    ('post', 'workouts:api:save_tutorial', {
+        'tutorial_id': lambda: VideoTutorial.objects.filter(
+            is_active=True
+        ).values_list('pk', flat=True).first() or 0
+    }),
+    ('get', 'recipe_library:api:list', {}),
+    ('get', 'recipe_library:api:list', {'category': RecipeCategory.values[0]}),
+    ('get', 'diet_plans:api:list', {}),
+    ('get', 'diet_plans:api:list', {'category': DietPlanCategory.values[0]}),
+]
+
+# Plan lines that read every row of a table. A SQLite "SCAN <table> USING
+# INDEX" walks an index in order and stops at the page size, so only a
+# bare scan counts.
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'^SCAN (?!CONSTANT ROW)(\S+)$'),
+    'postgresql': re.compile(r'Seq Scan on (\S+)'),
+}
+
+# Plan lines that sort the result in a temporary structure instead of
+# reading it in index order.
+SORT_PATTERNS = {
+    'sqlite': re.compile(r'USE TEMP B-TREE FOR (ORDER BY|GROUP BY)'),
+    'postgresql': re.compile(r'^\s*(->\s*)?Sort\b'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Run EXPLAIN on the queries behind each list endpoint and flag full '
+        'table scans. Runs inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fail-on-scan', action='store_true',
+                            help='Exit with an error if any full scan is found')
+        parser.add_argument('--verbose-sql', action='store_true',
+                            help='Print each query in full instead of truncated')
+
+    def handle(self, *args, **options):
+        self.verbose_sql = options['verbose_sql']
+        scans = []
+        # Bypass the catalog cache, a hit would skip the queries to explain
+        catalog_cache = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+        with override_settings(CACHES={**settings.CACHES, 'catalog': catalog_cache}), \
+                transaction.atomic():
+            user = User.objects.create_user(
+                email='explain-endpoints@example.com',
+                name='Explain Endpoints'
+            )
+            for method, url_name, data in ENDPOINTS:
+                data = {key: value() if callable(value) else value
+                        for key, value in data.items()}
+                scans.extend(self.explain_endpoint(user, method, url_name, data))
+            transaction.set_rollback(True)
+
+        self.stdout.write('')
+        if scans:
+            self.stdout.write(self.style.ERROR(f'{len(scans)} full scan(s) found:'))
+            for endpoint, table in scans:
+                self.stdout.write(f'  {endpoint}: {table}')
+            if options['fail_on_scan']:
+                raise CommandError('Full table scans found')
+        else:
+            self.stdout.write(self.style.SUCCESS('No full table scans found'))
+
+    def explain_endpoint(self, user, method, url_name, data):
+        """Call the endpoint, then explain every SELECT it ran"""
+        factory = APIRequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        path = reverse(url_name)
+        if method == 'get':
+            request = factory.get(path, data)
+        else:
+            request = factory.post(path, data, format='json')
+        force_authenticate(request, user=user)
+        match = resolve(path)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = match.func(request, *match.args, **match.kwargs)
+
+        endpoint = f"{method.upper()} {request.get_full_path()}"
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{endpoint} [{response.status_code}]'))
+
+        scans = []
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            self.stdout.write(f'  {sql if self.verbose_sql else sql[:120]}')
+            for line in self.explain(sql):
+                full_scan = self.match(FULL_SCAN_PATTERNS, line)
+                if full_scan:
+                    scans.append((endpoint, full_scan.group(1)))
+                    self.stdout.write(self.style.ERROR(f'    {line}  <- full scan'))
+                elif self.match(SORT_PATTERNS, line):
+                    self.stdout.write(self.style.WARNING(f'    {line}  <- sort'))
+                else:
+                    self.stdout.write(f'    {line}')
+        return scans
+
+    def explain(self, sql):
+        """Return the query plan of ``sql`` as a list of lines"""
+        prefix = connection.ops.explain_query_prefix()
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}')
+            return [str(row[-1]) for row in cursor.fetchall()]
+
+    def match(self, patterns, line):
+        pattern = patterns.get(connection.vendor)
+        return pattern.search(line) if pattern else None
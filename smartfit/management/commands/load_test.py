@@ -0,0 +1,221 @@
+import json
+import math
+import random
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+SEARCH_TERMS = ['protein', 'product', 'shaker', 'chicken', 'vegan', 'description']
+
+# Requests of the traffic mixes, as (method, path, data), picked among the
+# ids found on the server
+TASKS = {
+    'product_list': lambda ids, rng: ('GET', reverse('shopping:api:product_list'), None),
+    'product_search': lambda ids, rng: (
+        'GET', f"{reverse('shopping:api:product_list')}?q={rng.choice(SEARCH_TERMS)}", None
+    ),
+    'product_detail': lambda ids, rng: (
+        'GET', reverse('shopping:api:product_detail', kwargs={'pk': rng.choice(ids['products'])}), None
+    ),
+    'recipe_list': lambda ids, rng: ('GET', reverse('recipe_library:api:list'), None),
+    'recipe_detail': lambda ids, rng: (
+        'GET', reverse('recipe_library:api:detail', kwargs={'pk': rng.choice(ids['recipes'])}), None
+    ),
+    'workout_plan_list': lambda ids, rng: ('GET', reverse('workouts:api:plan_list'), None),
+    'workout_plan_detail': lambda ids, rng: (
+        'GET', reverse('workouts:api:plan_detail', kwargs={'pk': rng.choice(ids['workout_plans'])}), None
+    ),
+    'diet_plan_list': lambda ids, rng: ('GET', reverse('diet_plans:api:list'), None),
+    'diet_plan_detail': lambda ids, rng: (
+        'GET', reverse('diet_plans:api:detail', kwargs={'pk': rng.choice(ids['diet_plans'])}), None
+    ),
+    'profile': lambda ids, rng: ('GET', reverse('accounts:api:profile'), None),
+    'cart': lambda ids, rng: ('GET', reverse('shopping:api:cart'), None),
+    'cart_add': lambda ids, rng: (
+        'POST', reverse('shopping:api:cart_item_add'),
+        {'product_id': rng.choice(ids['products']), 'quantity': 1}
+    ),
+    'order_list': lambda ids, rng: ('GET', reverse('shopping:api:order_list'), None),
+}
+
+# Relative weights of the tasks in each traffic mix
+MIXES = {
+    # Mostly catalog reads, as seen from the mobile app
+    'browse': {
+        'product_list': 20, 'product_search': 10, 'product_detail': 15,
+        'recipe_list': 10, 'recipe_detail': 8, 'workout_plan_list': 8,
+        'workout_plan_detail': 6, 'diet_plan_list': 6, 'diet_plan_detail': 5,
+        'profile': 6, 'cart': 3, 'cart_add': 2, 'order_list': 1,
+    },
+    # Shoppers: product pages, cart writes and order history
+    'shopping': {
+        'product_list': 15, 'product_search': 15, 'product_detail': 25,
+        'cart': 15, 'cart_add': 20, 'order_list': 5, 'profile': 5,
+    },
+}
+
+# Lists read once to find the ids the tasks request
+CATALOG = {
+    'products': 'shopping:api:product_list',
+    'recipes': 'recipe_library:api:list',
+    'workout_plans': 'workouts:api:plan_list',
+    'diet_plans': 'diet_plans:api:list',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay a traffic mix against a running server (by default the dev '
+        'server on http://localhost:8000) with concurrent virtual users, and '
+        'report throughput and latency percentiles per request type. Users log '
+        'in as the <prefix>-<index>@example.com users created by seed_scale. '
+        'Cart adds write to the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000',
+                            help='Base URL of the server (default: http://localhost:8000)')
+        parser.add_argument('--mix', choices=list(MIXES), default='browse',
+                            help='Traffic mix (default: browse)')
+        parser.add_argument('--concurrency', type=int, default=10,
+                            help='Virtual users, each sending one request at a time (default: 10)')
+        parser.add_argument('--duration', type=float, default=30,
+                            help='Seconds to run for (default: 30)')
+        parser.add_argument('--requests', type=int,
+                            help='Stop after this many requests instead')
+        parser.add_argument('--think', type=float, default=0,
+                            help='Mean pause of a virtual user between requests, in ms (default: 0)')
+        parser.add_argument('--users', type=int, default=100,
+                            help='Seeded users to log in as, in turn (default: 100)')
+        parser.add_argument('--prefix', default='scale',
+                            help='Prefix of the seeded user emails (default: scale)')
+        parser.add_argument('--password', default='SmartFitLoad123!',
+                            help='Password of the seeded users (default: SmartFitLoad123!)')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed, to replay the same traffic (default: 0)')
+
+    def handle(self, *args, **options):
+        self.base_url = options['url'].rstrip('/')
+        mix = MIXES[options['mix']]
+        try:
+            status, token = self.log_in(options, 0)
+        except urllib.error.URLError as e:
+            raise CommandError(f'Cannot reach {self.base_url}: {e.reason}. Is the server running?')
+        if token is None:
+            raise CommandError(f"Logging in as {options['prefix']}-0@example.com failed with status "
+                               f"{status}, were the users created by seed_scale?")
+        ids = self.find_ids(token)
+        missing = [name for name, found in ids.items() if not found]
+        if missing:
+            raise CommandError(f"No {', '.join(missing)} on the server, run seed_scale first")
+
+        self.stdout.write(
+            f"{options['mix']} mix against {self.base_url}: {options['concurrency']} virtual users, "
+            + (f"{options['requests']} requests" if options['requests'] else f"{options['duration']:g} s")
+        )
+        # Virtual users log in first, password hashing is not part of the mix
+        logins = []
+
+        def log_in(index):
+            started = time.perf_counter()
+            status, token = self.log_in(options, index)
+            logins.append((time.perf_counter() - started, status))
+            return token
+
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            tokens = [token for token in pool.map(log_in, range(options['concurrency'])) if token]
+        if not tokens:
+            raise CommandError('No virtual user could log in')
+
+        results = {name: [] for name in mix}
+        sent = count()
+        names, weights = list(mix), list(mix.values())
+
+        def virtual_user(index):
+            rng = random.Random(options['seed'] * 1000003 + index)
+            while True:
+                if options['requests']:
+                    if next(sent) >= options['requests']:
+                        return
+                elif time.perf_counter() >= deadline:
+                    return
+                name = rng.choices(names, weights)[0]
+                method, path, data = TASKS[name](ids, rng)
+                started = time.perf_counter()
+                status = self.send(method, path, data, tokens[index])[0]
+                results[name].append((time.perf_counter() - started, status))
+                if options['think']:
+                    time.sleep(rng.expovariate(1000 / options['think']))
+
+        started = time.perf_counter()
+        deadline = started + options['duration']
+        with ThreadPoolExecutor(len(tokens)) as pool:
+            list(pool.map(virtual_user, range(len(tokens))))
+        self.report(logins, results, time.perf_counter() - started)
+
+    def send(self, method, path, data=None, token=None):
+        """Send a request, return its status and body"""
+        headers = {'Accept': 'application/json'}
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers['Content-Type'] = 'application/json'
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers,
+                                         method=method)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code, None
+
+    def log_in(self, options, index):
+        """Log in as the seeded user ``index``, return the status and access token"""
+        email = f"{options['prefix']}-{index % options['users']}@example.com"
+        status, body = self.send('POST', reverse('accounts:api:token_obtain_pair'),
+                                 {'email': email, 'password': options['password']})
+        return status, json.loads(body)['access'] if status == 200 else None
+
+    def find_ids(self, token):
+        ids = {}
+        for name, route in CATALOG.items():
+            status, body = self.send('GET', f'{reverse(route)}?page_size=100', token=token)
+            ids[name] = [row['id'] for row in json.loads(body)['data']] if status == 200 else []
+        return ids
+
+    def report(self, logins, results, elapsed):
+        total = sum(len(requests) for requests in results.values())
+        errors = sum(1 for requests in results.values() for _, status in requests if status >= 400)
+        self.stdout.write(
+            f'{total} requests in {elapsed:.1f} s: {total / elapsed:.0f} req/s, {errors} errors\n'
+        )
+        self.stdout.write(f"{'request':<20} {'count':>6} {'errors':>6} {'p50 ms':>8} "
+                          f"{'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        self.report_line('log_in', logins)
+        everything = []
+        for name, requests in results.items():
+            if requests:
+                self.report_line(name, requests)
+                everything.extend(requests)
+        if everything:
+            self.report_line('all', everything)
+
+    def report_line(self, name, requests):
+        latencies = sorted(latency * 1000 for latency, _ in requests)
+        errors = sum(1 for _, status in requests if status >= 400)
+        self.stdout.write(
+            f'{name:<20} {len(latencies):>6} {errors:>6} {percentile(latencies, 50):>8.1f} '
+            f'{percentile(latencies, 90):>8.1f} {percentile(latencies, 99):>8.1f} {latencies[-1]:>8.1f}'
+        )
+
+
+def percentile(ordered, rank):
+    """Nearest-rank percentile of a sorted list"""
+    return ordered[max(0, math.ceil(rank / 100 * len(ordered)) - 1)]
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from smartfit import search
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the full-text search documents of every searchable model. '
+        'Needed after bulk imports, which bypass the model signals.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default',
+                            help='Database to rebuild the index for (default: default)')
+
+    def handle(self, *args, **options):
+        for model in search.get_registered_models():
+            with transaction.atomic(using=options['database']):
+                search.rebuild_index(model, using=options['database'])
+            self.stdout.write(f'Rebuilt search index for {model._meta.label}')
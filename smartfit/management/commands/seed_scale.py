@@ -0,0 +1,64 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from smartfit import seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the database with production-like volumes: users with profiles, '
+        'carts and order histories, products, recipes, workout plans with days, '
+        'exercises and videos, and diet plans with weeks and meals. Rows are '
+        'created with bulk_create; users are <prefix>-<index>@example.com, all '
+        'with --password, for load_test to log in as.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100,
+                            help='Users to create (default: 100)')
+        parser.add_argument('--products', type=int, default=1000,
+                            help='Products to create (default: 1000)')
+        parser.add_argument('--recipes', type=int,
+                            help='Recipes to create (default: as many as products)')
+        parser.add_argument('--plans', type=int, default=50,
+                            help='Workout plans and diet plans to create, each (default: 50)')
+        parser.add_argument('--orders', type=int, default=5,
+                            help='Orders of each user (default: 5)')
+        parser.add_argument('--cart-items', type=int, default=3,
+                            help='Items in the cart of each user (default: 3)')
+        parser.add_argument('--prefix', default='scale',
+                            help='Prefix of the user emails (default: scale)')
+        parser.add_argument('--password', default='SmartFitLoad123!',
+                            help='Password of every user (default: SmartFitLoad123!)')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if get_user_model().objects.filter(email__startswith=f'{prefix}-').exists():
+            raise CommandError(f'Users {prefix}-* already exist, pick another --prefix')
+        recipes = options['products'] if options['recipes'] is None else options['recipes']
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            products = seed.seed_products(options['products'])
+            seed.seed_recipes(recipes)
+            workout_plans = seed.seed_workout_plans(options['plans'])
+            diet_plans = seed.seed_diet_plans(options['plans'])
+            users = seed.seed_users(options['users'], options['password'], prefix=prefix,
+                                    diet_plans=diet_plans, workout_plans=workout_plans)
+            if products:
+                seed.seed_carts(users, products, options['cart_items'])
+                seed.seed_orders(users, options['orders'], products)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(users)} users, {len(products)} products, {recipes} recipes, "
+            f"{len(workout_plans)} workout plans and {len(diet_plans)} diet plans "
+            f"in {time.perf_counter() - started:.1f} s"
+        ))
+        if users:
+            self.stdout.write(
+                f"Users are {prefix}-0@example.com to {prefix}-{len(users) - 1}@example.com, "
+                f"password {options['password']}"
+            )
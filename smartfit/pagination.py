@@ -0,0 +1,32 @@
+from rest_framework.pagination import CursorPagination
+
+
+class StandardCursorPagination(CursorPagination):
+    """
+    Keyset (cursor) pagination for list endpoints, newest first.
+
+    Pages are selected with a range filter on the ordering position encoded
+    in the cursor rather than an OFFSET, so a deep page costs the same as
+    the first one. DRF filters on the first ordering column only, here
+    ``created_at``: rows created in the same instant as the page boundary
+    are skipped with an offset stored in the cursor, and ``id`` merely
+    keeps their order stable. Full-text search results (see
+    ``smartfit.search``) are paged by relevance instead.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations:
+            return ('-search_rank', '-id')
+        return super().get_ordering(request, queryset, view)
+
+    def get_pagination_data(self):
+        """Return the pagination block of the response envelope"""
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'page_size': self.page_size,
+        }
@@ -0,0 +1,332 @@
+"""
+Per-request profiling for production.
+
+With ``PROFILING_ENABLED``, ``ProfilingMiddleware`` measures every request:
+the number of SQL queries and the time spent in them, the time spent
+building serializer ``.data``, the total time and the response size. Each
+response gets them as a ``Server-Timing`` header, readable in the
+browser's network panel::
+
+    Server-Timing: db;dur=4.2;desc="3 queries", serialize;dur=1.8, total;dur=9.6
+
+The measurements are added to histograms per view, which are written to
+the default cache every ``PROFILING_FLUSH_SECONDS`` so that
+``ProfilingStatsView`` (admin users only) can merge those of every worker
+process. With a per-process cache (local memory), it only sees the
+process that answers it.
+
+Queries slower than ``PROFILING_SLOW_QUERY_MS`` are logged to the
+``smartfit.profiling`` logger, a ``PROFILING_SLOW_QUERY_SAMPLE_RATE``
+fraction of them, without their parameters.
+
+Queries are measured by an execute wrapper on every database connection,
+which finds the measurements of the request in a context variable. It is
+installed on the connections of the thread each request starts in (under
+ASGI, the thread its ``sync_to_async`` calls run in) and on every
+connection opened later, so the queries of async views are counted too. Serializer time is measured by
+wrapping DRF's ``BaseSerializer.data``; nested serializers are counted as
+part of the outermost one. Both are installed once the middleware is
+loaded: when profiling is off the middleware removes itself and nothing
+is wrapped.
+"""
+import functools
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import permissions, serializers
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger('smartfit.profiling')
+
+# Upper bounds of the histogram buckets of each metric, the last one is open
+BUCKETS = {
+    'total_ms': (5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+    'db_ms': (1, 2, 5, 10, 25, 50, 100, 250, 1000),
+    'serializer_ms': (1, 2, 5, 10, 25, 50, 100, 250, 1000),
+    'queries': (0, 1, 2, 3, 5, 10, 20, 50, 100),
+    'bytes': (1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+}
+
+CACHE_PREFIX = 'profiling'
+# Histograms of a process that stopped flushing are dropped after this
+WORKER_TIMEOUT = 15 * 60
+SLOW_QUERY_MAX_LENGTH = 2000
+
+_current = ContextVar('profiling_request', default=None)
+
+
+class RequestProfile:
+    """Measurements of the request being served"""
+    __slots__ = ('queries', 'db_time', 'serializer_time', 'serializing', 'view')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+        self.view = None
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += duration
+            if (duration * 1000 >= settings.PROFILING_SLOW_QUERY_MS
+                    and random.random() < settings.PROFILING_SLOW_QUERY_SAMPLE_RATE):
+                logger.warning(
+                    'Slow query (%.1f ms) in %s: %s',
+                    duration * 1000, self.view or 'unknown view', sql[:SLOW_QUERY_MAX_LENGTH]
+                )
+
+
+class Histograms:
+    """Histograms of the metrics of each view, for one process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        self.last_flush = time.monotonic()
+        self.worker = f'{socket.gethostname()}:{os.getpid()}'
+
+    def record(self, view, metrics):
+        with self.lock:
+            stats = self.views.get(view)
+            if stats is None:
+                stats = self.views[view] = new_view_stats()
+            add(stats, metrics)
+            due = time.monotonic() - self.last_flush >= settings.PROFILING_FLUSH_SECONDS
+            if due:
+                self.last_flush = time.monotonic()
+        if due:
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                view: {
+                    'requests': stats['requests'],
+                    'metrics': {name: dict(metric, buckets=list(metric['buckets']))
+                                for name, metric in stats['metrics'].items()},
+                }
+                for view, stats in self.views.items()
+            }
+
+    def flush(self):
+        """Write this process's histograms to the cache for ``collect``"""
+        cache.set(f'{CACHE_PREFIX}:{self.worker}', self.snapshot(), WORKER_TIMEOUT)
+        workers = cache.get(f'{CACHE_PREFIX}:workers') or set()
+        if self.worker not in workers:
+            cache.set(f'{CACHE_PREFIX}:workers', workers | {self.worker}, WORKER_TIMEOUT)
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+
+
+histograms = Histograms()
+
+
+def new_view_stats():
+    return {
+        'requests': 0,
+        'metrics': {
+            name: {'sum': 0, 'max': 0, 'buckets': [0] * (len(bounds) + 1)}
+            for name, bounds in BUCKETS.items()
+        },
+    }
+
+
+def add(stats, metrics):
+    stats['requests'] += 1
+    for name, value in metrics.items():
+        metric = stats['metrics'][name]
+        metric['sum'] += value
+        metric['max'] = max(metric['max'], value)
+        bounds = BUCKETS[name]
+        index = 0
+        while index < len(bounds) and value > bounds[index]:
+            index += 1
+        metric['buckets'][index] += 1
+
+
+def merge(into, stats):
+    into['requests'] += stats['requests']
+    for name, metric in stats['metrics'].items():
+        target = into['metrics'][name]
+        target['sum'] += metric['sum']
+        target['max'] = max(target['max'], metric['max'])
+        target['buckets'] = [a + b for a, b in zip(target['buckets'], metric['buckets'])]
+
+
+def collect():
+    """The histograms of every worker process that flushed recently, merged"""
+    histograms.flush()
+    workers = sorted(cache.get(f'{CACHE_PREFIX}:workers') or ())
+    snapshots = cache.get_many([f'{CACHE_PREFIX}:{worker}' for worker in workers])
+    views = {}
+    for snapshot in snapshots.values():
+        for view, stats in snapshot.items():
+            merge(views.setdefault(view, new_view_stats()), stats)
+    return [key.split(':', 1)[1] for key in snapshots], views
+
+
+def profile_execute(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile.execute(execute, sql, params, many, context)
+
+
+def install_execute_wrapper(connection, **kwargs):
+    if profile_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(profile_execute)
+
+
+def install_execute_wrappers(**kwargs):
+    # Sent in the thread that runs the request's ORM work, also under ASGI
+    for connection in connections.all():
+        install_execute_wrapper(connection)
+
+
+def time_queries():
+    """Count the queries of every connection towards the request running them"""
+    request_started.connect(install_execute_wrappers, dispatch_uid='profiling_execute_wrappers')
+    connection_created.connect(install_execute_wrapper, dispatch_uid='profiling_execute_wrapper')
+    install_execute_wrappers()
+
+
+def time_serializer_data():
+    """Count the time spent in ``serializer.data`` towards the request"""
+    data = serializers.BaseSerializer.data
+    if getattr(data.fget, 'profiled', False):
+        return
+
+    @functools.wraps(data.fget)
+    def profiled_data(self):
+        profile = _current.get()
+        if profile is None or profile.serializing:
+            return data.fget(self)
+        profile.serializing = True
+        started = time.perf_counter()
+        try:
+            return data.fget(self)
+        finally:
+            profile.serializer_time += time.perf_counter() - started
+            profile.serializing = False
+
+    profiled_data.profiled = True
+    serializers.BaseSerializer.data = property(profiled_data)
+
+
+class ProfilingMiddleware:
+    """
+    Measure each request, add a ``Server-Timing`` header and record the
+    measurements in the histograms of its view
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        time_queries()
+        time_serializer_data()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile, started)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = _current.get()
+        if profile is not None:
+            profile.view = request.resolver_match.view_name
+
+    def finish(self, request, response, profile, started):
+        total = time.perf_counter() - started
+        if response.streaming:
+            size = int(response.get('Content-Length') or 0)
+        else:
+            size = len(response.content)
+        response['Server-Timing'] = (
+            f'db;dur={profile.db_time * 1000:.1f};desc="{profile.queries} queries", '
+            f'serialize;dur={profile.serializer_time * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}'
+        )
+        histograms.record(profile.view or 'unresolved', {
+            'total_ms': total * 1000,
+            'db_ms': profile.db_time * 1000,
+            'serializer_ms': profile.serializer_time * 1000,
+            'queries': profile.queries,
+            'bytes': size,
+        })
+        return response
+
+
+class ProfilingStatsView(APIView):
+    """
+    API view to read the request histograms of every view, merged across
+    worker processes. Only available to admin users.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        workers, views = collect()
+        data = {}
+        for view, stats in sorted(views.items()):
+            requests = stats['requests']
+            data[view] = {
+                'requests': requests,
+                'metrics': {
+                    name: {
+                        'mean': round(metric['sum'] / requests, 2) if requests else 0,
+                        'max': round(metric['max'], 2),
+                        'histogram': [
+                            {'le': bound, 'count': count}
+                            for bound, count in zip((*BUCKETS[name], None), metric['buckets'])
+                        ],
+                    }
+                    for name, metric in stats['metrics'].items()
+                },
+            }
+        return Response({
+            'message': 'Profiling statistics retrieved successfully',
+            'data': {'workers': workers, 'views': data},
+        })
@@ -0,0 +1,72 @@
+"""
+JSON rendering and parsing with orjson, when the package is installed.
+
+``FastJSONRenderer`` and ``FastJSONParser`` are drop-in replacements for
+DRF's ``JSONRenderer`` and ``JSONParser``, two to three times faster on
+large responses like a diet plan with all its meals or a page of orders
+(see ``manage.py bench_json``). The
+output is byte for byte the same for compact JSON: values orjson does not
+serialize itself (``Decimal``, lazy translations, and datetimes, which
+orjson would format differently) are converted by DRF's encoder, and
+U+2028 and U+2029 are escaped as DRF does. Indented responses, like
+those of the browsable API, are rendered by DRF since orjson only
+indents by two spaces. NaN and infinite floats, which DRF refuses to
+render, become ``null``. Without orjson both classes behave as DRF's.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+UTF8 = ('utf-8', 'utf8')
+
+drf_default = JSONEncoder().default
+
+
+def encode_default(obj):
+    """Convert what orjson does not serialize, as DRF's encoder does"""
+    # Decimals of method fields are by far the most common, skip DRF's
+    # chain of type checks for them
+    if type(obj) is Decimal:
+        return float(obj)
+    return drf_default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Render compact JSON with orjson"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=encode_default, option=OPTIONS)
+        # Keep the output a strict JavaScript subset, like DRF
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastJSONParser(JSONParser):
+    """Parse UTF-8 JSON request bodies with orjson"""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower() not in UTF8:
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
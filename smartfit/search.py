@@ -0,0 +1,278 @@
+"""
+Full-text search for catalog models.
+
+Models are registered from their app's ``ready()`` together with the
+fields to index and a weight for each field ('A' is the most important,
+'D' the least). On SQLite every registered model gets an FTS5 table,
+created by a ``CreateSearchIndex`` migration operation and kept in sync
+through ``post_save``/``post_delete`` signals. The table is joined through
+an unmanaged model over it, with a ``OneToOneField`` to the searchable
+model on ``rowid`` (``related_name='search_document'``) and a
+``SearchDocumentField`` named ``document``. On PostgreSQL the search
+runs against a weighted ``to_tsvector`` expression covered by a GIN index.
+Other databases fall back to ``icontains`` matching.
+
+Every query term is matched as a prefix, so partially typed words already
+find results, and results are ranked by relevance (BM25 on SQLite,
+``ts_rank`` on PostgreSQL).
+"""
+import re
+
+from django.db import connections, models
+from django.db.migrations.operations.base import Operation
+from django.db.models import F, FloatField, BooleanField, Func, Lookup, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_save, post_delete
+
+# Relative weight of each field class in the SQLite BM25 ranking
+SQLITE_WEIGHTS = {'A': 10.0, 'B': 4.0, 'C': 2.0, 'D': 1.0}
+
+# PostgreSQL text search configuration used for documents and queries
+POSTGRES_CONFIG = 'english'
+
+# Longer queries are truncated to this number of terms
+MAX_TERMS = 8
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+# Registered models and the fields they index, in index column order
+_registry = {}
+
+
+class SearchDocumentField(models.TextField):
+    """
+    The hidden column of an FTS5 table, named after the table: the left
+    side of ``MATCH`` and the first argument of ``bm25()``
+    """
+
+
+@SearchDocumentField.register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', (*lhs_params, *rhs_params)
+
+
+def register(model, fields):
+    """
+    Make a model searchable.
+
+    ``fields`` maps field names to a weight from 'A' to 'D'. It must match
+    the fields given to the model's ``CreateSearchIndex`` migration.
+    """
+    _registry[model] = dict(fields)
+    post_save.connect(_update_document, sender=model, dispatch_uid=f'search_save_{model._meta.label}')
+    post_delete.connect(_delete_document, sender=model, dispatch_uid=f'search_delete_{model._meta.label}')
+
+
+def get_backend(connection):
+    """Return the search backend used for a database connection"""
+    if connection.vendor == 'sqlite':
+        return 'sqlite'
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    return 'fallback'
+
+
+def fts_table(model):
+    """Name of the FTS5 table holding a model's search documents"""
+    return f'{model._meta.db_table}_fts'
+
+
+def get_terms(query):
+    """Split a search query into lowercase word terms"""
+    return TERM_RE.findall(query.lower())[:MAX_TERMS]
+
+
+def search(queryset, query):
+    """
+    Filter a queryset down to the rows matching ``query``.
+
+    The rows are annotated with ``search_rank`` (higher is more relevant)
+    and ordered by it, most relevant first.
+    """
+    model = queryset.model
+    fields = _registry[model]
+    terms = get_terms(query)
+    if not terms:
+        return queryset.none()
+
+    connection = connections[queryset.db]
+    backend = get_backend(connection)
+
+    if backend == 'sqlite':
+        # Join the FTS5 table once, so BM25 statistics are computed a single
+        # time per query; a correlated subquery would run the MATCH again
+        # for every candidate row
+        match = ' '.join(f'"{term}"*' for term in terms)
+        weights = [Value(SQLITE_WEIGHTS[weight]) for weight in fields.values()]
+        queryset = queryset.filter(search_document__document__match=match).annotate(
+            # bm25() is lower for better matches, so negate it
+            search_rank=-Func(
+                F('search_document__document'), *weights, function='bm25', output_field=FloatField()
+            )
+        )
+    elif backend == 'postgresql':
+        vector = postgres_vector_sql(connection, model, fields, qualify=True)
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        queryset = queryset.filter(
+            RawSQL(
+                f"({vector}) @@ to_tsquery('{POSTGRES_CONFIG}', %s)",
+                (tsquery,),
+                output_field=BooleanField()
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"ts_rank({vector}, to_tsquery('{POSTGRES_CONFIG}', %s))",
+                (tsquery,),
+                output_field=FloatField()
+            )
+        )
+    else:
+        condition = Q()
+        for term in terms:
+            term_condition = Q()
+            for field in fields:
+                term_condition |= Q(**{f'{field}__icontains': term})
+            condition &= term_condition
+        queryset = queryset.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+    return queryset.order_by('-search_rank', '-pk')
+
+
+def postgres_vector_sql(connection, model, fields, qualify=False):
+    """SQL for the weighted tsvector of a model's indexed fields"""
+    qn = connection.ops.quote_name
+    parts = []
+    for name, weight in fields.items():
+        column = qn(model._meta.get_field(name).column)
+        if qualify:
+            column = f'{qn(model._meta.db_table)}.{column}'
+        parts.append(
+            f"setweight(to_tsvector('{POSTGRES_CONFIG}', coalesce({column}, '')), '{weight}')"
+        )
+    return ' || '.join(parts)
+
+
+def sqlite_fill_sql(connection, model, fields):
+    """SQL copying the indexed fields of every row into a model's FTS5 table"""
+    qn = connection.ops.quote_name
+    columns = [qn(model._meta.get_field(name).column) for name in fields]
+    values = [f"coalesce({column}, '')" for column in columns]
+    return (
+        f'INSERT INTO {qn(fts_table(model))} (rowid, {", ".join(columns)}) '
+        f'SELECT {qn(model._meta.pk.column)}, {", ".join(values)} '
+        f'FROM {qn(model._meta.db_table)}'
+    )
+
+
+def rebuild_index(model, using='default'):
+    """Rebuild the search documents of a model from its table"""
+    connection = connections[using]
+    if get_backend(connection) != 'sqlite':
+        # PostgreSQL keeps its GIN index up to date by itself
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {connection.ops.quote_name(fts_table(model))}')
+        cursor.execute(sqlite_fill_sql(connection, model, _registry[model]))
+
+
+def _update_document(sender, instance, using, raw=False, **kwargs):
+    connection = connections[using]
+    if get_backend(connection) != 'sqlite':
+        return
+    qn = connection.ops.quote_name
+    fields = _registry[sender]
+    table = qn(fts_table(sender))
+    columns = ', '.join(qn(sender._meta.get_field(name).column) for name in fields)
+    placeholders = ', '.join(['%s'] * (len(fields) + 1))
+    values = [getattr(instance, name) or '' for name in fields]
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', (instance.pk,))
+        cursor.execute(
+            f'INSERT INTO {table} (rowid, {columns}) VALUES ({placeholders})',
+            (instance.pk, *values)
+        )
+
+
+def _delete_document(sender, instance, using, **kwargs):
+    connection = connections[using]
+    if get_backend(connection) != 'sqlite':
+        return
+    table = connection.ops.quote_name(fts_table(sender))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', (instance.pk,))
+
+
+class CreateSearchIndex(Operation):
+    """
+    Migration operation creating the search index of a model: an FTS5 table
+    filled from the existing rows on SQLite, a GIN expression index on
+    PostgreSQL and nothing on other databases.
+    """
+    reversible = True
+
+    def __init__(self, model_name, fields):
+        self.model_name = model_name
+        self.fields = dict(fields)
+
+    def deconstruct(self):
+        return (self.__class__.__name__, [], {
+            'model_name': self.model_name,
+            'fields': self.fields,
+        })
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        connection = schema_editor.connection
+        backend = get_backend(connection)
+        qn = schema_editor.quote_name
+        if backend == 'sqlite':
+            columns = [qn(model._meta.get_field(name).column) for name in self.fields]
+            schema_editor.execute(
+                f'CREATE VIRTUAL TABLE {qn(fts_table(model))} USING fts5('
+                f'{", ".join(columns)}, '
+                f"tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            )
+            schema_editor.execute(sqlite_fill_sql(connection, model, self.fields))
+        elif backend == 'postgresql':
+            vector = postgres_vector_sql(connection, model, self.fields)
+            schema_editor.execute(
+                f'CREATE INDEX {qn(self.index_name(model))} ON {qn(model._meta.db_table)} '
+                f'USING GIN (({vector}))'
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        backend = get_backend(schema_editor.connection)
+        if backend == 'sqlite':
+            schema_editor.execute(f'DROP TABLE {schema_editor.quote_name(fts_table(model))}')
+        elif backend == 'postgresql':
+            schema_editor.execute(f'DROP INDEX {schema_editor.quote_name(self.index_name(model))}')
+
+    def index_name(self, model):
+        return f'{model._meta.db_table}_search_idx'
+
+    def describe(self):
+        return f'Create search index for {self.model_name}'
+
+    @property
+    def migration_name_fragment(self):
+        return f'{self.model_name.lower()}_search_index'
+
+
+def get_registered_models():
+    """Return the searchable models"""
+    return list(_registry)
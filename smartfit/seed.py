@@ -0,0 +1,187 @@
+"""
+Bulk creation of realistic data volumes, for ``manage.py seed_scale``,
+benchmarks and the query budget tests (``smartfit.tests_budgets``).
+
+Rows are created with ``bulk_create``, one statement per model and batch,
+so no signals are sent: the search index is rebuilt and the catalog cache
+bumped at the end of each function instead. The catalog functions take
+the ``prefix`` of the names of the rows they create.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from accounts.models import FitnessGoal, Gender, Profile
+from diet_plans.models import DietPlan, DietPlanMeal, DietPlanWeek, MealType
+from recipe_library.models import Recipe
+from shopping.models import Cart, CartItem, Order, OrderItem, Product, ProductCategory
+from smartfit import cache, search
+from workouts.models import (
+    Exercise, UserWorkout, VideoTutorial, WorkoutDay, WorkoutExercise, WorkoutPlan,
+)
+
+BATCH_SIZE = 500
+
+
+def seed_products(count, prefix='Product'):
+    categories = ProductCategory.values
+    products = Product.objects.bulk_create([
+        Product(
+            name=f'{prefix} {index}',
+            description=f'Description of {prefix.lower()} {index}',
+            category=categories[index % len(categories)],
+            price=Decimal(10 + index % 90),
+            discount_price=Decimal(5 + index % 5) if index % 4 == 0 else None,
+            stock=100,
+            is_featured=index % 10 == 0,
+        )
+        for index in range(count)
+    ], batch_size=BATCH_SIZE)
+    search.rebuild_index(Product)
+    cache.bump('products')
+    return products
+
+
+def seed_recipes(count, prefix='Recipe'):
+    recipes = Recipe.objects.bulk_create([
+        Recipe(
+            title=f'{prefix} {index}',
+            description=f'Description of {prefix.lower()} {index}',
+            ingredients='Chicken, rice, broccoli, olive oil',
+            instructions='Cook the rice, grill the chicken and steam the broccoli',
+            preparation_time=10 + index % 20,
+            cooking_time=15 + index % 30,
+            calories=300 + index % 400,
+        )
+        for index in range(count)
+    ], batch_size=BATCH_SIZE)
+    search.rebuild_index(Recipe)
+    cache.bump('recipes')
+    return recipes
+
+
+def seed_diet_plans(count, weeks=4, meals_per_day=3, prefix='Diet Plan'):
+    """Diet plans with ``weeks`` weeks of ``meals_per_day`` meals a day"""
+    plans = DietPlan.objects.bulk_create([
+        DietPlan(name=f'{prefix} {index}', description=f'Description of diet plan {index}',
+                 duration_weeks=weeks)
+        for index in range(count)
+    ], batch_size=BATCH_SIZE)
+    plan_weeks = DietPlanWeek.objects.bulk_create([
+        DietPlanWeek(diet_plan=plan, week_number=week_number)
+        for plan in plans for week_number in range(1, weeks + 1)
+    ], batch_size=BATCH_SIZE)
+    meal_types = MealType.values
+    DietPlanMeal.objects.bulk_create([
+        DietPlanMeal(
+            week=week, day_of_week=day, meal_type=meal_types[meal % len(meal_types)],
+            name=f'Meal {day}-{meal}', description='Balanced meal with slow carbs and lean protein',
+            ingredients='80 g rolled oats, 2 eggs, 50 g spinach, 1 banana, 10 g almonds, cinnamon',
+            preparation='Simmer the oats for 5 minutes, scramble the eggs with the spinach, '
+                        'then top the oats with the sliced banana, almonds and cinnamon.',
+            calories=450, protein=Decimal('32.5'), carbs=Decimal('48.0'), fat=Decimal('14.5'),
+        )
+        for week in plan_weeks for day in range(1, 8) for meal in range(meals_per_day)
+    ], batch_size=BATCH_SIZE)
+    cache.bump('diet_plans')
+    return plans
+
+
+def seed_workout_plans(count, days=3, exercises_per_day=4, videos=2, prefix='Workout Plan'):
+    """Workout plans with their days, exercises and video tutorials"""
+    exercises = Exercise.objects.bulk_create([
+        Exercise(name=f'{prefix} exercise {index}', description='Compound lift',
+                 instructions='Keep your back straight')
+        for index in range(exercises_per_day * days)
+    ], batch_size=BATCH_SIZE)
+    plans = WorkoutPlan.objects.bulk_create([
+        WorkoutPlan(name=f'{prefix} {index}', description=f'Description of workout plan {index}')
+        for index in range(count)
+    ], batch_size=BATCH_SIZE)
+    plan_days = WorkoutDay.objects.bulk_create([
+        WorkoutDay(workout_plan=plan, day_number=day_number, name=f'Day {day_number}')
+        for plan in plans for day_number in range(1, days + 1)
+    ], batch_size=BATCH_SIZE)
+    WorkoutExercise.objects.bulk_create([
+        WorkoutExercise(
+            workout_day=day,
+            exercise=exercises[(day.day_number - 1) * exercises_per_day + order],
+            order=order + 1,
+        )
+        for day in plan_days for order in range(exercises_per_day)
+    ], batch_size=BATCH_SIZE)
+    VideoTutorial.objects.bulk_create([
+        VideoTutorial(
+            workout_plan=plan, title=f'Video {order}', description='Technique walkthrough',
+            video_url=f'https://example.com/videos/{plan.pk}/{order}', order=order,
+        )
+        for plan in plans for order in range(1, videos + 1)
+    ], batch_size=BATCH_SIZE)
+    cache.bump('workout_plans')
+    return plans
+
+
+def seed_users(count, password, prefix='user', diet_plans=(), workout_plans=()):
+    """
+    Users ``<prefix>-<index>@example.com`` with profiles, following the
+    given plans in turn. The password is hashed once for all of them.
+    """
+    password = make_password(password)
+    users = get_user_model().objects.bulk_create([
+        get_user_model()(email=f'{prefix}-{index}@example.com', name=f'{prefix.title()} {index}',
+                         password=password)
+        for index in range(count)
+    ], batch_size=BATCH_SIZE)
+    genders, goals = Gender.values, FitnessGoal.values
+    Profile.objects.bulk_create([
+        Profile(
+            user=user, age=18 + index % 50, gender=genders[index % len(genders)],
+            fitness_goal=goals[index % len(goals)],
+            height=Decimal(150 + index % 50), weight=Decimal(50 + index % 60),
+            diet_plan=diet_plans[index % len(diet_plans)] if diet_plans else None,
+            workout_plan=workout_plans[index % len(workout_plans)] if workout_plans else None,
+        )
+        for index, user in enumerate(users)
+    ], batch_size=BATCH_SIZE)
+    if workout_plans:
+        UserWorkout.objects.bulk_create([
+            UserWorkout(user=user, workout_plan=workout_plans[index % len(workout_plans)])
+            for index, user in enumerate(users)
+        ], batch_size=BATCH_SIZE)
+    return users
+
+
+def seed_carts(users, products, items_per_cart=3):
+    """A cart for each of ``users`` holding ``items_per_cart`` of ``products``"""
+    carts = Cart.objects.bulk_create([Cart(user=user) for user in users], batch_size=BATCH_SIZE)
+    CartItem.objects.bulk_create([
+        CartItem(cart=cart, product=products[(index * items_per_cart + item) % len(products)],
+                 quantity=1 + item % 2)
+        for index, cart in enumerate(carts) for item in range(min(items_per_cart, len(products)))
+    ], batch_size=BATCH_SIZE)
+    return carts
+
+
+def seed_orders(users, count, products, items_per_order=5):
+    """``count`` orders for each of ``users``, each with ``items_per_order`` of ``products``"""
+    customers = [user for user in users for _ in range(count)]
+    lines = [
+        [(products[(index * items_per_order + item) % len(products)], 1 + item % 3)
+         for item in range(items_per_order)]
+        for index in range(len(customers))
+    ]
+    orders = Order.objects.bulk_create([
+        Order(
+            user=user, full_name=user.name, email=user.email, phone='+201000000000',
+            address='1 Nile Street', city='Cairo', country='Egypt',
+            total_amount=sum((product.price * quantity for product, quantity in order_lines),
+                             Decimal('0.00')),
+        )
+        for user, order_lines in zip(customers, lines)
+    ], batch_size=BATCH_SIZE)
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product=product, quantity=quantity, price=product.price)
+        for order, order_lines in zip(orders, lines) for product, quantity in order_lines
+    ], batch_size=BATCH_SIZE)
+    return orders
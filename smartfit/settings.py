@@ -15,6 +15,14 @@ SECRET_KEY = 'django-insecure-fbr_s@l3&_*8+_lfpy0g$8p3$yqaw56b*d!4&@81l&^nv^p%7)
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# Deployment environment, 'development' or 'production'
+SMARTFIT_ENV = os.environ.get('SMARTFIT_ENV', 'development')
+
+# Route the user profile to its async view (see smartfit.asyncapi). Only for
+# ASGI servers, and off by default: on SQLite it measured slower than the
+# sync view (see bench_asgi)
+ASYNC_VIEWS = os.environ.get('SMARTFIT_ASYNC_VIEWS') == '1'
+
 ALLOWED_HOSTS = ['localhost']
 
 
@@ -27,18 +35,22 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'smartfit',
     'accounts',
     'additional_forms',
     'diet_plans',
     'recipe_library',
     'shopping',
     'workouts',
+    'jobs',
     'rest_framework',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
 ]
 
 MIDDLEWARE = [
+    # First, so its total includes the other middleware
+    'smartfit.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,11 +84,110 @@ WSGI_APPLICATION = 'smartfit.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SMARTFIT_DB selects the database, 'sqlite' (SQLITE_PATH, default
+# db.sqlite3) or 'postgres' (the POSTGRES_* variables). In production,
+# connections are kept open between requests for DB_CONN_MAX_AGE seconds
+# and checked before they are reused, and SQLite runs with SQLITE_PRAGMAS.
+SMARTFIT_DB = os.environ.get('SMARTFIT_DB', 'sqlite')
+
+DB_CONN_MAX_AGE = int(os.environ.get(
+    'DB_CONN_MAX_AGE', 600 if SMARTFIT_ENV == 'production' else 0
+))
+
+if SMARTFIT_DB == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'smartfit'),
+            'USER': os.environ.get('POSTGRES_USER', 'smartfit'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': 5,
+            },
+        }
     }
+    if os.environ.get('POSTGRES_POOL') == '1':
+        # A psycopg connection pool per process (needs psycopg[pool]),
+        # which replaces persistent connections
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('POSTGRES_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('POSTGRES_POOL_MAX_SIZE', 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Take the write lock when a transaction starts, so concurrent
+                # writers (e.g. checkouts) wait for each other instead of
+                # failing with "database is locked" when upgrading a read lock
+                'transaction_mode': 'IMMEDIATE',
+                # Seconds a writer waits for the lock before giving up
+                'timeout': 20,
+            },
+        }
+    }
+
+# Set on every new SQLite connection (see smartfit.db). In WAL mode readers
+# no longer wait for writers, and synchronous=NORMAL only syncs the log at
+# checkpoints: a power loss may drop the last commits, but never corrupts
+# the database. Reads go through a memory map of up to 256 MB.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+} if SMARTFIT_ENV == 'production' else {}
+
+
+# Per-request profiling (see smartfit.profiling): query count, DB and
+# serializer time and response size of every request, as Server-Timing
+# headers and per-view histograms for admins at /profiling/api/
+PROFILING_ENABLED = os.environ.get('SMARTFIT_PROFILING') == '1'
+# Queries at least this slow are logged, a sample of them
+PROFILING_SLOW_QUERY_MS = int(os.environ.get('PROFILING_SLOW_QUERY_MS', 100))
+PROFILING_SLOW_QUERY_SAMPLE_RATE = float(os.environ.get('PROFILING_SLOW_QUERY_SAMPLE_RATE', 0.1))
+# How often each process writes its histograms to the default cache
+PROFILING_FLUSH_SECONDS = 10
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# The catalog cache holds catalog API responses (see smartfit.cache). The
+# local-memory backend is a per-process LRU; set CATALOG_CACHE=file to share
+# one cache between worker processes through CATALOG_CACHE_LOCATION.
+CATALOG_CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'smartfit-catalog'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache',
+             os.path.join(BASE_DIR, 'cache', 'catalog')),
+}
+CATALOG_CACHE_BACKEND, CATALOG_CACHE_LOCATION = CATALOG_CACHE_BACKENDS[
+    os.environ.get('CATALOG_CACHE', 'locmem')
+]
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'smartfit-default',
+    },
+    'catalog': {
+        'BACKEND': CATALOG_CACHE_BACKEND,
+        'LOCATION': os.environ.get('CATALOG_CACHE_LOCATION', CATALOG_CACHE_LOCATION),
+        # Entries are invalidated by version bumps, the timeout only bounds
+        # how long unreachable entries of old versions linger
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
 }
 
 
@@ -125,7 +236,38 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
-STATICFILES_DIRS = [os.path.join(BASE_DIR, 'smartfit/static')]
+# smartfit/static is collected by the app directories finder, since
+# smartfit is an installed app
+
+# In production collectstatic writes content-hashed, pre-compressed files
+# that smartfit.files serves with far-future cache headers
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'smartfit.storage.CompressedManifestStaticFilesStorage'
+            if SMARTFIT_ENV == 'production'
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+
+# Hand file bodies over to the web server: None (stream from Python),
+# 'x-sendfile' (Apache, lighttpd) or 'x-accel-redirect' (nginx, with an
+# internal location serving STATIC_ROOT and MEDIA_ROOT under SENDFILE_URL)
+SENDFILE_BACKEND = os.environ.get('SENDFILE_BACKEND') or None
+SENDFILE_URL = '/_internal/'
+
+# Background jobs (see jobs.queue): jobs of each queue running at once
+# across all `manage.py run_worker` processes, and seconds after which a
+# running job whose worker disappeared is retried
+JOB_QUEUE_CONCURRENCY = {
+    'default': 4,
+    'images': 2,
+}
+JOB_TIMEOUT = 600
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -140,6 +282,18 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'smartfit.pagination.StandardCursorPagination',
+    'PAGE_SIZE': 20,
+    # orjson when it is installed, see smartfit.renderers
+    'DEFAULT_RENDERER_CLASSES': [
+        'smartfit.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'smartfit.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 # JWT settings
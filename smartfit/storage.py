@@ -0,0 +1,69 @@
+"""
+Static files storage for production.
+
+``collectstatic`` writes every file under a content-hashed name, so the
+files can be cached forever, and stores gzip (and, when the ``brotli``
+package is installed, brotli) compressed copies of text assets next to
+them. ``smartfit.files`` serves the smallest variant the client accepts
+without compressing anything per request.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.utils.functional import cached_property
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Extensions worth compressing; images and fonts are already compressed
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html', '.xml',
+)
+
+# Files smaller than this gain too little from compression
+MIN_COMPRESS_SIZE = 512
+
+
+def compress_file(path):
+    """
+    Write ``path.gz`` (and ``path.br``) next to ``path`` when they are
+    smaller than the original.
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+    if len(content) < MIN_COMPRESS_SIZE:
+        return []
+
+    variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(content)))
+
+    written = []
+    for suffix, compressed in variants:
+        if len(compressed) < len(content):
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+            written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage that also writes pre-compressed copies of the hashed
+    text assets.
+    """
+    def post_process(self, paths, dry_run=False, **options):
+        compressed = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if (not dry_run and isinstance(hashed_name, str) and
+                    hashed_name.endswith(COMPRESSIBLE_EXTENSIONS) and hashed_name not in compressed):
+                compress_file(self.path(hashed_name))
+                compressed.add(hashed_name)
+            yield name, hashed_name, processed
+
+    @cached_property
+    def immutable_names(self):
+        """Names of the content-hashed files, which can be cached forever"""
+        return frozenset(self.hashed_files.values())
@@ -0,0 +1,492 @@
+import datetime
+import gzip
+import io
+import uuid
+import os
+import re
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+from django.utils.translation import gettext_lazy
+from PIL import Image
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.api import UserProfileAsyncView, UserProfileView
+from accounts.models import Profile
+from diet_plans.models import DietPlan
+from diet_plans.serializers import DietPlanListSerializer
+from recipe_library.models import Recipe
+from recipe_library.serializers import RecipeListSerializer
+from shopping.models import CartItem, Order, Product
+from shopping.serializers import ProductListSerializer
+from smartfit import profiling, renderers, seed
+from smartfit.cache import get_cache
+from workouts.models import WorkoutPlan
+from workouts.serializers import WorkoutPlanListSerializer
+
+# Serves an async view whatever SMARTFIT_ASYNC_VIEWS is
+urlpatterns = [
+    path('async/profile/', UserProfileAsyncView.as_view(), name='async_profile'),
+    path('', include('smartfit.urls')),
+]
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Pragmas are set on SQLite')
+class SQLitePragmaTests(TestCase):
+    def connect(self):
+        """Open a new connection to a temporary database file"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        wrapper = connections['default'].__class__(
+            {**connection.settings_dict, 'NAME': os.path.join(directory, 'db.sqlite3')},
+            alias='pragma_test'
+        )
+        wrapper.ensure_connection()
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_production_pragmas_are_set_on_connect(self):
+        """Test that new connections use WAL, synchronous=NORMAL and mmap"""
+        with self.settings(SQLITE_PRAGMAS={
+            'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'mmap_size': 1024 * 1024,
+        }):
+            wrapper = self.connect()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        # NORMAL
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertEqual(self.pragma(wrapper, 'mmap_size'), 1024 * 1024)
+
+    def test_no_pragmas_keep_sqlite_defaults(self):
+        """Test that the development profile leaves the journal mode alone"""
+        with self.settings(SQLITE_PRAGMAS={}):
+            wrapper = self.connect()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'delete')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Query plans are checked on SQLite')
+class ExplainEndpointsCommandTests(TestCase):
+    def test_list_endpoints_do_not_scan_full_tables(self):
+        """Test that every list endpoint is served from an index"""
+        out = StringIO()
+        call_command('explain_endpoints', '--fail-on-scan', stdout=out)
+        self.assertIn('No full table scans found', out.getvalue())
+
+    def test_list_endpoints_read_pages_in_index_order(self):
+        """Test that no list endpoint sorts its rows in a temporary structure"""
+        out = StringIO()
+        call_command('explain_endpoints', stdout=out)
+        self.assertNotIn('USE TEMP B-TREE', out.getvalue())
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class SeedScaleCommandTests(TestCase):
+    def test_seeds_requested_volumes(self):
+        """Test that seed_scale creates the requested users, catalog and histories"""
+        call_command('seed_scale', '--users', '4', '--products', '6', '--plans', '2',
+                     '--orders', '3', stdout=StringIO())
+
+        self.assertEqual(get_user_model().objects.filter(email__startswith='scale-').count(), 4)
+        self.assertEqual(Profile.objects.exclude(diet_plan=None).exclude(workout_plan=None).count(), 4)
+        self.assertEqual(Product.objects.count(), 6)
+        self.assertEqual(Recipe.objects.count(), 6)
+        self.assertEqual(WorkoutPlan.objects.count(), 2)
+        self.assertEqual(DietPlan.objects.count(), 2)
+        self.assertEqual(Order.objects.count(), 12)
+        self.assertEqual(CartItem.objects.count(), 12)
+
+    def test_seeded_users_can_log_in(self):
+        """Test that the seeded users log in with the given password"""
+        call_command('seed_scale', '--users', '2', '--products', '1', '--plans', '1',
+                     '--password', 'LoadPassword123!', stdout=StringIO())
+
+        response = APIClient().post(reverse('accounts:api:token_obtain_pair'), {
+            'email': 'scale-1@example.com', 'password': 'LoadPassword123!',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.data)
+
+    def test_existing_prefix_is_refused(self):
+        """Test that seeding the same prefix twice fails instead of clashing emails"""
+        call_command('seed_scale', '--users', '1', '--products', '0', '--plans', '0',
+                     stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('seed_scale', '--users', '1', '--products', '0', '--plans', '0',
+                         stdout=StringIO())
+
+
+class FileServingTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.media_root = os.path.join(root, 'media')
+        self.static_root = os.path.join(root, 'static')
+        os.makedirs(self.media_root)
+        os.makedirs(self.static_root)
+
+        self.content = bytes(range(256)) * 40
+        with open(os.path.join(self.media_root, 'photo.jpg'), 'wb') as f:
+            f.write(self.content)
+        self.css = b'body { margin: 0; }\n' * 100
+        with open(os.path.join(self.static_root, 'app.css'), 'wb') as f:
+            f.write(self.css)
+        with open(os.path.join(self.static_root, 'app.css.gz'), 'wb') as f:
+            f.write(gzip.compress(self.css))
+
+    def get(self, url, **headers):
+        with self.settings(MEDIA_ROOT=self.media_root, STATIC_ROOT=self.static_root):
+            return self.client.get(url, SERVER_NAME='localhost', **headers)
+
+    def test_media_is_served_with_validators(self):
+        """Test that media files carry caching headers and revalidate with 304"""
+        response = self.get('/media/photo.jpg')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertIn('max-age=', response['Cache-Control'])
+
+        response = self.get('/media/photo.jpg', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_byte_range_is_partial_content(self):
+        """Test that a single byte range is answered with 206"""
+        response = self.get('/media/photo.jpg', HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[100:200])
+
+        response = self.get('/media/photo.jpg', HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_precompressed_static_variant(self):
+        """Test that the gzip copy is sent to clients accepting gzip only"""
+        response = self.get('/static/app.css', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.css)
+
+        response = self.get('/static/app.css')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_sendfile_offload(self):
+        """Test that the body is left to the web server when offloading"""
+        with self.settings(SENDFILE_BACKEND='x-accel-redirect'):
+            response = self.get('/media/photo.jpg')
+        self.assertEqual(response['X-Accel-Redirect'], '/_internal/media/photo.jpg')
+        self.assertEqual(response.content, b'')
+
+        with self.settings(SENDFILE_BACKEND='x-sendfile'):
+            response = self.get('/media/photo.jpg')
+        self.assertEqual(response['X-Sendfile'], os.path.join(self.media_root, 'photo.jpg'))
+
+    def test_missing_file_is_not_found(self):
+        """Test that unknown files return 404"""
+        self.assertEqual(self.get('/media/missing.jpg').status_code, 404)
+
+
+class RenditionServingTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        for directory in ('products/images', 'body_measurements', 'uploads'):
+            os.makedirs(os.path.join(media_root, directory))
+            Image.new('RGB', (900, 300), (10, 120, 200)).save(
+                os.path.join(media_root, directory, 'banner.jpg'), 'JPEG'
+            )
+        self.media_root = media_root
+
+    def get(self, url):
+        with self.settings(MEDIA_ROOT=self.media_root):
+            return self.client.get(url)
+
+    def test_missing_rendition_is_generated_on_request(self):
+        """Test that a rendition is written the first time it is requested"""
+        response = self.get('/media/renditions/products/images/banner.jpg.card.webp')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        with Image.open(io.BytesIO(b''.join(response.streaming_content))) as image:
+            self.assertEqual(image.size, (480, 160))
+        self.assertTrue(os.path.exists(os.path.join(
+            self.media_root, 'renditions', 'products', 'images', 'banner.jpg.card.webp'
+        )))
+
+    def test_unknown_renditions_are_not_found(self):
+        """Test that unknown rendition names, formats and originals return 404"""
+        for url in [
+            '/media/renditions/products/images/banner.jpg.huge.webp',
+            '/media/renditions/products/images/banner.jpg.card.gif',
+            '/media/renditions/products/images/missing.jpg.card.webp',
+            '/media/renditions/renditions/products/images/banner.jpg.card.webp.thumb.webp',
+        ]:
+            with self.subTest(url=url):
+                self.assertEqual(self.get(url).status_code, 404)
+
+    def test_images_without_renditions_are_not_served(self):
+        """Test that private and unregistered uploads never get renditions"""
+        for url in [
+            # Registered with renditions=False
+            '/media/renditions/body_measurements/banner.jpg.card.webp',
+            '/media/renditions/products/images/../../body_measurements/banner.jpg.card.webp',
+            # No registered field uploads there
+            '/media/renditions/uploads/banner.jpg.card.webp',
+        ]:
+            with self.subTest(url=url):
+                self.assertEqual(self.get(url).status_code, 404)
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'renditions')))
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='mobile@example.com', name='Mobile', password='MobilePassword123!'
+        )
+        self.client.force_authenticate(user=self.user)
+        for index in range(5):
+            Product.objects.create(
+                name=f'Kettlebell {index}', description='Cast iron', category='EQ',
+                price=Decimal('30.00'), discount_price=Decimal('24.00'), stock=5
+            )
+            Recipe.objects.create(
+                title=f'Chicken Bowl {index}', description='Bowl', ingredients='Chicken, rice',
+                instructions='Assemble', preparation_time=10, cooking_time=20, calories=500
+            )
+            DietPlan.objects.create(name=f'Diet {index}', description='Test diet plan')
+            WorkoutPlan.objects.create(name=f'Plan {index}', description='Test workout plan')
+        get_cache().clear()
+        self.addCleanup(get_cache().clear)
+
+    def test_slim_view_returns_the_slim_fields(self):
+        """Test that ?view=slim returns the slim fields of each list"""
+        for url, serializer in [
+            (reverse('shopping:api:product_list'), ProductListSerializer),
+            (reverse('recipe_library:api:list'), RecipeListSerializer),
+            (reverse('diet_plans:api:list'), DietPlanListSerializer),
+            (reverse('workouts:api:plan_list'), WorkoutPlanListSerializer),
+        ]:
+            with self.subTest(url=url):
+                response = self.client.get(url, {'view': 'slim'})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(set(response.data['data'][0]), set(serializer.Meta.slim_fields))
+
+    def test_slim_values_match_the_full_view(self):
+        """Test that the slim rows hold the same values as the full rows"""
+        url = reverse('recipe_library:api:list')
+        full = self.client.get(url).data['data']
+        slim = self.client.get(url, {'view': 'slim'}).data['data']
+        self.assertEqual(slim, [{name: row[name] for name in slim[0]} for row in full])
+        self.assertEqual(slim[0]['total_time'], 30)
+
+    def test_fields_param_selects_fields(self):
+        """Test that ?fields= returns the named fields, methods included"""
+        response = self.client.get(reverse('shopping:api:product_list'), {'fields': 'id,name,final_price'})
+        self.assertEqual(response.status_code, 200)
+        product = response.data['data'][0]
+        self.assertEqual(set(product), {'id', 'name', 'final_price'})
+        self.assertEqual(product['final_price'], Decimal('24.00'))
+
+    def test_select_reads_only_the_needed_columns(self):
+        """Test that the query of a sparse list leaves out the unused columns"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('shopping:api:product_list'), {'view': 'slim'})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"description"', queries[0]['sql'])
+        self.assertIn('"discount_price"', queries[0]['sql'])
+
+    def test_cursor_walks_sparse_pages_in_one_query_each(self):
+        """Test that sparse pages load no deferred columns to build their cursors"""
+        names = []
+        url = reverse('workouts:api:plan_list') + '?view=slim&page_size=2'
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            names.extend(plan['name'] for plan in response.data['data'])
+            url = response.data['pagination']['next']
+        self.assertEqual(names, [f'Plan {index}' for index in reversed(range(5))])
+
+    def test_unknown_fields_are_rejected(self):
+        """Test that unknown field names and views are a bad request"""
+        url = reverse('diet_plans:api:list')
+        response = self.client.get(url, {'fields': 'id,ingredients'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ingredients', str(response.data['fields']))
+        self.assertEqual(self.client.get(url, {'view': 'tiny'}).status_code, 400)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = get_user_model().objects.create_user(
+            email='async@example.com', name='Async', password='AsyncPassword123!'
+        )
+        Profile.objects.create(user=self.user)
+
+    def call(self, view_class, url, method='get', data=None):
+        request = getattr(self.factory, method)(url, data, format='json')
+        force_authenticate(request, user=self.user)
+        view = view_class.as_view()
+        if view_class.view_is_async:
+            response = async_to_sync(view)(request)
+        else:
+            response = view(request)
+        response.render()
+        return response
+
+    def test_async_profile_view(self):
+        """Test that the async profile view reads and updates like the sync one"""
+        url = reverse('accounts:api:profile')
+        self.assertTrue(UserProfileAsyncView.view_is_async)
+        expected = self.call(UserProfileView, url)
+        response = self.call(UserProfileAsyncView, url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, expected.data)
+
+        response = self.call(UserProfileAsyncView, url, 'patch', {'name': 'Renamed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Renamed')
+        self.assertEqual(response.data['jobs'], [])
+
+    def test_async_profile_requires_authentication(self):
+        """Test that the async view still checks permissions"""
+        request = self.factory.get(reverse('accounts:api:profile'))
+        response = async_to_sync(UserProfileAsyncView.as_view())(request)
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_FLUSH_SECONDS=0)
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='member@example.com', name='Member', password='MemberPassword123!'
+        )
+        self.admin = get_user_model().objects.create_superuser(
+            email='admin@example.com', name='Admin', password='AdminPassword123!'
+        )
+        for index in range(3):
+            Product.objects.create(
+                name=f'Band {index}', description='Resistance band',
+                price=Decimal('12.00'), stock=5
+            )
+        get_cache().clear()
+        profiling.histograms.reset()
+        self.addCleanup(profiling.histograms.reset)
+
+    def test_response_has_server_timing(self):
+        """Test that responses report query count, DB, serializer and total time"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('shopping:api:product_list'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertRegex(timing, r'serialize;dur=[\d.]+')
+        self.assertRegex(timing, r'total;dur=[\d.]+')
+
+    def test_admins_read_histograms_per_view(self):
+        """Test that the stats endpoint aggregates the requests of each view"""
+        self.client.force_authenticate(user=self.user)
+        for _ in range(3):
+            self.client.get(reverse('shopping:api:product_list'))
+        self.assertEqual(self.client.get(reverse('profiling_stats')).status_code, 403)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse('profiling_stats'))
+        self.assertEqual(response.status_code, 200)
+        stats = response.data['data']['views']['shopping:api:product_list']
+        self.assertEqual(stats['requests'], 3)
+        for name in ('total_ms', 'db_ms', 'serializer_ms', 'queries', 'bytes'):
+            self.assertEqual(sum(bucket['count'] for bucket in stats['metrics'][name]['histogram']), 3)
+        self.assertGreater(stats['metrics']['queries']['mean'], 0)
+        self.assertGreater(stats['metrics']['bytes']['mean'], 0)
+
+    @override_settings(PROFILING_SLOW_QUERY_MS=0, PROFILING_SLOW_QUERY_SAMPLE_RATE=1.0)
+    def test_slow_queries_are_logged(self):
+        """Test that queries over the threshold are logged with their view"""
+        self.client.force_authenticate(user=self.user)
+        with self.assertLogs('smartfit.profiling', 'WARNING') as logs:
+            self.client.get(reverse('shopping:api:product_list'))
+        self.assertTrue(any('shopping:api:product_list' in line for line in logs.output))
+
+    @override_settings(ROOT_URLCONF=__name__)
+    async def test_async_views_count_their_queries(self):
+        """Test that the queries async views run in worker threads are measured"""
+        await Profile.objects.acreate(user=self.user)
+        response = await self.async_client.get(
+            reverse('async_profile'), headers={'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        queries = int(re.search(r'desc="(\d+) queries"', response['Server-Timing']).group(1))
+        self.assertGreater(queries, 0)
+        self.assertEqual(profiling.histograms.snapshot()['async_profile']['metrics']['queries']['sum'], queries)
+
+    @override_settings(PROFILING_ENABLED=False)
+    def test_disabled_profiling_adds_nothing(self):
+        """Test that the middleware is left out when profiling is off"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('shopping:api:product_list'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+@skipUnless(renderers.orjson is not None, 'orjson is not installed')
+class FastJSONTests(TestCase):
+    data = {
+        'price': Decimal('24.50'),
+        'created_at': datetime.datetime(2024, 5, 17, 8, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        'cairo': datetime.datetime(2024, 5, 17, 11, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=3))),
+        'date': datetime.date(2024, 5, 17),
+        'time': datetime.time(7, 45),
+        'label': gettext_lazy('Breakfast'),
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'text': 'Crème brûlée \u2028 and \u2029',
+        'nested': [{1: None, 'ok': True, 'ratio': 0.25}],
+    }
+
+    def test_renders_the_same_bytes_as_drf(self):
+        """Test that orjson output matches DRF's for decimals, datetimes and lazy strings"""
+        self.assertEqual(renderers.FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_indented_output_is_left_to_drf(self):
+        """Test that indented responses keep DRF's four-space indentation"""
+        rendered = renderers.FastJSONRenderer().render(self.data, 'application/json; indent=4')
+        self.assertEqual(rendered, JSONRenderer().render(self.data, 'application/json; indent=4'))
+
+    def test_parses_like_drf(self):
+        """Test that request bodies are parsed like DRF's parser and bad JSON is rejected"""
+        body = JSONRenderer().render({'name': 'Crème', 'quantity': 2, 'ratio': 0.5, 'tags': [None]})
+        self.assertEqual(renderers.FastJSONParser().parse(io.BytesIO(body)),
+                         JSONParser().parse(io.BytesIO(body)))
+        with self.assertRaises(ParseError):
+            renderers.FastJSONParser().parse(io.BytesIO(b'{"name": '))
+
+    def test_api_responses_are_rendered_with_orjson(self):
+        """Test that a diet plan response has the same body as with DRF's renderer"""
+        plan = seed.seed_diet_plans(1, weeks=1, meals_per_day=6)[0]
+        user = get_user_model().objects.create_user(
+            email='json@example.com', name='Json', password='JsonPassword123!'
+        )
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.get(reverse('diet_plans:api:detail', kwargs={'pk': plan.pk}))
+        self.assertIsInstance(response.accepted_renderer, renderers.FastJSONRenderer)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+        response = client.post(reverse('shopping:api:cart_item_add'), '{"product_id": 0',
+                               content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('JSON parse error', response.data['detail'])
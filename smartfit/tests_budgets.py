@@ -0,0 +1,271 @@
+"""
+Query budgets and latency ceilings of every route of the API.
+
+The database is seeded with production-like volumes (see ``smartfit.seed``)
+and each route is requested a few times, each time in a transaction that is
+rolled back and with empty caches, so writes can be repeated and every
+request takes its uncached path. A route fails when any request runs more
+queries than its budget or when its fastest request is slower than its
+latency ceiling.
+
+A new route has to be given a budget here: ``test_every_route_has_a_budget``
+fails until it is. Latency ceilings are generous, for slow CI machines;
+``SMARTFIT_LATENCY_FACTOR`` scales them.
+"""
+import os
+import time
+from collections import namedtuple
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import Profile
+from shopping.models import Cart, CartItem
+from smartfit import seed
+from workouts.models import SavedVideo, UserWorkout, VideoTutorial
+
+User = get_user_model()
+
+PASSWORD = 'BudgetPassword123!'
+RUNS = 3
+LATENCY_FACTOR = float(os.environ.get('SMARTFIT_LATENCY_FACTOR', 1))
+
+# Seeded volumes
+PRODUCTS = 1000
+RECIPES = 1000
+DIET_PLANS = 200
+WORKOUT_PLANS = 200
+ORDERS = 2000
+
+# ``kwargs`` and ``data`` are called with the test case, to use its fixtures.
+# ``client`` is 'api' (JWT authenticated), 'web' (session) or 'anonymous'.
+Budget = namedtuple(
+    'Budget', 'route method kwargs data status queries ms client format',
+    defaults=(None, None, 200, 0, 200, 'api', 'json')
+)
+
+
+def no_kwargs(test):
+    return {}
+
+
+BUDGETS = {
+    'accounts': [
+        Budget('accounts:home', 'get', no_kwargs, status=200, queries=0, ms=100, client='anonymous'),
+        Budget('accounts:body_measurements', 'get', no_kwargs, status=200, queries=2, ms=100,
+               client='web'),
+        Budget('accounts:api:token_obtain_pair', 'post', no_kwargs,
+               lambda test: {'email': test.user.email, 'password': PASSWORD},
+               status=200, queries=2, client='anonymous'),
+        Budget('accounts:api:token_refresh', 'post', no_kwargs,
+               lambda test: {'refresh': test.refresh}, status=200, queries=13, client='anonymous'),
+        Budget('accounts:api:register', 'post', no_kwargs,
+               lambda test: {'email': 'new@example.com', 'name': 'New', 'password': PASSWORD,
+                             'password2': PASSWORD},
+               status=201, queries=4, client='anonymous'),
+        Budget('accounts:api:logout', 'post', no_kwargs,
+               lambda test: {'refresh': test.refresh}, status=200, queries=7),
+        Budget('accounts:api:profile', 'get', no_kwargs, status=200, queries=3),
+        Budget('accounts:api:profile', 'patch', no_kwargs,
+               lambda test: {'name': 'Renamed'}, status=200, queries=4),
+        Budget('accounts:api:change_password', 'put', no_kwargs,
+               lambda test: {'old_password': PASSWORD, 'new_password': 'NewPassword123!',
+                             'confirm_password': 'NewPassword123!'},
+               status=200, queries=2),
+        Budget('accounts:api:body_measurements', 'patch', no_kwargs,
+               lambda test: {'height': 180, 'weight': 80}, status=200, queries=5,
+               format='multipart'),
+        Budget('accounts:api:select_diet_plan', 'put', no_kwargs,
+               lambda test: {'diet_plan_id': test.diet_plan.pk}, status=200, queries=6),
+    ],
+    'workouts': [
+        Budget('workouts:api:plan_list', 'get', no_kwargs, status=200, queries=1),
+        Budget('workouts:api:plan_detail', 'get', lambda test: {'pk': test.workout_plan.pk},
+               status=200, queries=5),
+        Budget('workouts:api:user_workout_list', 'get', no_kwargs, status=200, queries=2),
+        Budget('workouts:api:user_workout_list', 'post', no_kwargs,
+               lambda test: {'workout_plan_id': test.other_workout_plan.pk},
+               status=201, queries=6),
+        Budget('workouts:api:user_workout_detail', 'get',
+               lambda test: {'pk': test.user_workout.pk}, status=200, queries=2),
+        Budget('workouts:api:user_workout_detail', 'patch',
+               lambda test: {'pk': test.user_workout.pk}, lambda test: {'notes': 'Going well'},
+               status=200, queries=3),
+        Budget('workouts:api:user_workout_detail', 'delete',
+               lambda test: {'pk': test.user_workout.pk}, status=204, queries=5),
+        Budget('workouts:api:select_plan', 'post', no_kwargs,
+               lambda test: {'workout_plan_id': test.other_workout_plan.pk},
+               status=200, queries=8),
+        Budget('workouts:api:video_list', 'get',
+               lambda test: {'workout_plan_id': test.workout_plan.pk}, status=200, queries=2),
+        Budget('workouts:api:video_detail', 'get', lambda test: {'pk': test.tutorial.pk},
+               status=200, queries=1),
+        Budget('workouts:api:video_library', 'get', no_kwargs, status=200, queries=1),
+        Budget('workouts:api:video_library', 'post', no_kwargs,
+               lambda test: {'title': 'Mobility', 'video_url': 'https://example.com/mobility',
+                             'category': 'WO'},
+               status=201, queries=1),
+        Budget('workouts:api:saved_video_detail', 'get', lambda test: {'pk': test.saved_video.pk},
+               status=200, queries=1),
+        Budget('workouts:api:saved_video_detail', 'patch',
+               lambda test: {'pk': test.saved_video.pk}, lambda test: {'title': 'Renamed'},
+               status=200, queries=2),
+        Budget('workouts:api:saved_video_detail', 'delete',
+               lambda test: {'pk': test.saved_video.pk}, status=204, queries=2),
+        Budget('workouts:api:save_tutorial', 'post', no_kwargs,
+               lambda test: {'tutorial_id': test.other_tutorial.pk}, status=201, queries=3),
+        Budget('workouts:api:toggle_favorite', 'post', lambda test: {'pk': test.saved_video.pk},
+               status=200, queries=2),
+    ],
+    'diet_plans': [
+        Budget('diet_plans:api:list', 'get', no_kwargs, status=200, queries=1),
+        Budget('diet_plans:api:detail', 'get', lambda test: {'pk': test.diet_plan.pk},
+               status=200, queries=4),
+    ],
+    'recipe_library': [
+        Budget('recipe_library:api:list', 'get', no_kwargs, status=200, queries=1),
+        Budget('recipe_library:api:detail', 'get', lambda test: {'pk': test.recipe.pk},
+               status=200, queries=2),
+    ],
+    'shopping': [
+        Budget('shopping:api:product_list', 'get', no_kwargs, status=200, queries=1),
+        Budget('shopping:api:product_detail', 'get', lambda test: {'pk': test.product.pk},
+               status=200, queries=2),
+        Budget('shopping:api:cart', 'get', no_kwargs, status=200, queries=2),
+        Budget('shopping:api:cart_item_add', 'post', no_kwargs,
+               lambda test: {'product_id': test.other_product.pk, 'quantity': 1},
+               status=201, queries=9),
+        Budget('shopping:api:cart_item_detail', 'patch', lambda test: {'pk': test.cart_item.pk},
+               lambda test: {'quantity': 3}, status=200, queries=6),
+        Budget('shopping:api:cart_item_detail', 'delete', lambda test: {'pk': test.cart_item.pk},
+               status=200, queries=5),
+        Budget('shopping:api:checkout', 'post', no_kwargs,
+               lambda test: {'full_name': 'Budget User', 'email': 'budget@example.com',
+                             'phone': '+201000000000', 'address': '1 Nile Street',
+                             'city': 'Cairo', 'postal_code': '11511', 'country': 'Egypt'},
+               status=201, queries=11),
+        Budget('shopping:api:order_list', 'get', no_kwargs, status=200, queries=2),
+        Budget('shopping:api:order_detail', 'get', lambda test: {'pk': test.order.pk},
+               status=200, queries=2),
+    ],
+}
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class EndpointBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        products = seed.seed_products(PRODUCTS)
+        cls.product, cls.other_product = products[0], products[1]
+        cls.recipe = seed.seed_recipes(RECIPES)[0]
+        cls.diet_plan = seed.seed_diet_plans(DIET_PLANS)[0]
+        workout_plans = seed.seed_workout_plans(WORKOUT_PLANS)
+        cls.workout_plan, cls.other_workout_plan = workout_plans[0], workout_plans[1]
+        cls.tutorial, cls.other_tutorial = VideoTutorial.objects.filter(
+            workout_plan=cls.workout_plan
+        ).order_by('order')
+
+        cls.user = User.objects.create_user(email='budget@example.com', name='Budget User',
+                                            password=PASSWORD)
+        Profile.objects.create(user=cls.user, diet_plan=cls.diet_plan,
+                               workout_plan=cls.workout_plan)
+        cls.refresh = str(RefreshToken.for_user(cls.user))
+        cls.order = seed.seed_orders([cls.user], ORDERS, products)[0]
+        cart = Cart.objects.create(user=cls.user)
+        cls.cart_item = CartItem.objects.create(cart=cart, product=cls.product, quantity=2)
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, product=product, quantity=1) for product in products[2:10]
+        ])
+        cls.user_workout = UserWorkout.objects.create(user=cls.user, workout_plan=cls.workout_plan)
+        cls.saved_video = SavedVideo.objects.create(
+            user=cls.user, title='Squat technique', video_url='https://example.com/squat',
+            category='WO'
+        )
+
+    def client_for(self, kind):
+        # A fresh user each time, as views change it in memory
+        user = User.objects.get(pk=self.user.pk)
+        if kind == 'web':
+            self.client.force_login(user)
+            return self.client
+        client = APIClient()
+        if kind == 'api':
+            client.force_authenticate(user=user)
+        return client
+
+    def request(self, budget):
+        """Request ``budget``'s route, return its response, queries and time"""
+        client = self.client_for(budget.client)
+        url = reverse(budget.route, kwargs=budget.kwargs(self))
+        data = budget.data(self) if budget.data else None
+        for cache in caches.all():
+            cache.clear()
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = getattr(client, budget.method)(url, data, format=budget.format)
+                elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        return response, queries.captured_queries, elapsed * 1000
+
+    def assertWithinBudget(self, budget):
+        runs = [self.request(budget) for _ in range(RUNS)]
+        for response, queries, elapsed in runs:
+            self.assertEqual(response.status_code, budget.status, getattr(response, 'data', None))
+            self.assertLessEqual(
+                len(queries), budget.queries,
+                '{} queries, the budget is {}:\n{}'.format(
+                    len(queries), budget.queries,
+                    '\n'.join(query['sql'] for query in queries)
+                )
+            )
+        fastest = min(elapsed for response, queries, elapsed in runs)
+        ceiling = budget.ms * LATENCY_FACTOR
+        self.assertLessEqual(fastest, ceiling, f'{fastest:.0f} ms, the ceiling is {ceiling:.0f} ms')
+
+    def assertAppWithinBudgets(self, app):
+        for budget in BUDGETS[app]:
+            with self.subTest(route=budget.route, method=budget.method):
+                self.assertWithinBudget(budget)
+
+    def test_every_route_has_a_budget(self):
+        """Test that every named route of the API apps has a query budget"""
+        budgeted = {budget.route for budgets in BUDGETS.values() for budget in budgets}
+
+        def routes(patterns, namespace):
+            for pattern in patterns:
+                if isinstance(pattern, URLResolver):
+                    yield from routes(pattern.url_patterns, f'{namespace}:{pattern.namespace}')
+                elif isinstance(pattern, URLPattern) and pattern.name:
+                    yield f'{namespace}:{pattern.name}'
+
+        for resolver in get_resolver().url_patterns:
+            if isinstance(resolver, URLResolver) and resolver.namespace in BUDGETS:
+                for route in routes(resolver.url_patterns, resolver.namespace):
+                    self.assertIn(route, budgeted, f'{route} has no query budget')
+
+    def test_accounts_budgets(self):
+        """Test that the accounts routes stay within their budgets"""
+        self.assertAppWithinBudgets('accounts')
+
+    def test_workouts_budgets(self):
+        """Test that the workouts routes stay within their budgets"""
+        self.assertAppWithinBudgets('workouts')
+
+    def test_diet_plans_budgets(self):
+        """Test that the diet plan routes stay within their budgets"""
+        self.assertAppWithinBudgets('diet_plans')
+
+    def test_recipe_library_budgets(self):
+        """Test that the recipe library routes stay within their budgets"""
+        self.assertAppWithinBudgets('recipe_library')
+
+    def test_shopping_budgets(self):
+        """Test that the shopping routes stay within their budgets"""
+        self.assertAppWithinBudgets('shopping')
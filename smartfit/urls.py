@@ -1,13 +1,15 @@
 from django.contrib import admin
 from django.urls import path, include, re_path
-from django.views.static import serve
 from django.shortcuts import redirect
 from django.conf import settings
-from django.conf.urls.static import static
+from smartfit.files import serve_media, serve_static
+from smartfit.images import serve_rendition
+from smartfit.profiling import ProfilingStatsView
 
 urlpatterns = [
-    re_path(r'^media/(?P<path>.*)$', serve, {'document_root': settings.MEDIA_ROOT}),
-    re_path(r'^static/(?P<path>.*)$', serve, {'document_root': settings.STATIC_ROOT}),
+    re_path(r'^media/renditions/(?P<path>.*)$', serve_rendition),
+    re_path(r'^media/(?P<path>.*)$', serve_media),
+    re_path(r'^static/(?P<path>.*)$', serve_static),
     path('admin/', admin.site.urls),
     path('', include('accounts.urls')),
     path('forms/', include('additional_forms.urls')),
@@ -15,7 +17,9 @@ urlpatterns = [
     path('recipes/', include('recipe_library.urls')),
     path('shop/', include('shopping.urls')),
     path('workouts/', include('workouts.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path('jobs/', include('jobs.urls')),
+    path('profiling/api/', ProfilingStatsView.as_view(), name='profiling_stats'),
+]
 
 # Add debug toolbar in development
 if settings.DEBUG:
@@ -1,8 +1,11 @@
 from rest_framework import generics, status, permissions, filters
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from smartfit.cache import CatalogCacheMixin
+from smartfit.conditional import ConditionalGetMixin
+from smartfit.fieldsets import SparseFieldsetMixin
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db.models import Q, Prefetch
 from .models import (
     Exercise, WorkoutPlan, WorkoutDay, WorkoutExercise,
     UserWorkout, VideoTutorial, SavedVideo
@@ -18,46 +21,65 @@ from .serializers import (
 )
 
 
-class WorkoutPlanListView(generics.ListAPIView):
+class WorkoutPlanListView(SparseFieldsetMixin, CatalogCacheMixin, generics.ListAPIView):
     """
     API view to list all workout plans
     """
-    queryset = WorkoutPlan.objects.filter(is_active=True)
+    queryset = WorkoutPlan.objects.filter(is_active=True).with_days_count()
     serializer_class = WorkoutPlanListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    list_message = 'Workout plans retrieved successfully'
+    cache_namespace = 'workout_plans'
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
 
         # Apply category filter if provided
-        category = request.query_params.get('category', None)
+        category = self.request.query_params.get('category', None)
         if category:
             queryset = queryset.filter(category=category)
 
         # Apply difficulty filter if provided
-        difficulty = request.query_params.get('difficulty', None)
+        difficulty = self.request.query_params.get('difficulty', None)
         if difficulty:
             queryset = queryset.filter(difficulty=difficulty)
 
         # Apply featured filter if provided
-        featured = request.query_params.get('featured', None)
+        featured = self.request.query_params.get('featured', None)
         if featured and featured.lower() == 'true':
             queryset = queryset.filter(is_featured=True)
+        return queryset
 
-        serializer = self.get_serializer(queryset, many=True)
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
         return Response({
-            'message': 'Workout plans retrieved successfully',
-            'data': serializer.data
+            'message': self.list_message,
+            'data': serializer.data,
+            'pagination': self.paginator.get_pagination_data()
         })
 
 
-class WorkoutPlanDetailView(generics.RetrieveAPIView):
+class WorkoutPlanDetailView(ConditionalGetMixin, CatalogCacheMixin, generics.RetrieveAPIView):
     """
     API view to retrieve a specific workout plan with all its details
     """
-    queryset = WorkoutPlan.objects.filter(is_active=True)
+    # Load the whole plan tree up front: plan, days, exercises (joined with
+    # their exercise) and video tutorials, regardless of the plan size
+    queryset = WorkoutPlan.objects.filter(is_active=True).prefetch_related(
+        Prefetch(
+            'days__exercises',
+            queryset=WorkoutExercise.objects.select_related('exercise')
+        ),
+        'video_tutorials'
+    )
     serializer_class = WorkoutPlanDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_namespace = 'workout_plans'
+    freshness_paths = (
+        'days', 'days__exercises', 'days__exercises__exercise', 'video_tutorials'
+    )
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -76,14 +98,18 @@ class UserWorkoutListView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return UserWorkout.objects.filter(user=self.request.user)
+        return UserWorkout.objects.filter(user=self.request.user).prefetch_related(
+            Prefetch('workout_plan', queryset=WorkoutPlan.objects.with_days_count())
+        )
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
         return Response({
             'message': 'Your workout plans retrieved successfully',
-            'data': serializer.data
+            'data': serializer.data,
+            'pagination': self.paginator.get_pagination_data()
         })
 
     def create(self, request, *args, **kwargs):
@@ -120,7 +146,9 @@ class UserWorkoutDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return UserWorkout.objects.filter(user=self.request.user)
+        return UserWorkout.objects.filter(user=self.request.user).prefetch_related(
+            Prefetch('workout_plan', queryset=WorkoutPlan.objects.with_days_count())
+        )
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -140,7 +168,7 @@ class UserWorkoutDetailView(generics.RetrieveUpdateDestroyAPIView):
         # If completed status changed to True, update the profile
         if 'completed' in request.data and request.data['completed']:
             profile = request.user.profile
-            if profile.workout_plan and profile.workout_plan.id == instance.workout_plan.id:
+            if profile.workout_plan_id and profile.workout_plan_id == instance.workout_plan_id:
                 profile.workout_plan = None
                 profile.save()
 
@@ -154,7 +182,7 @@ class UserWorkoutDetailView(generics.RetrieveUpdateDestroyAPIView):
 
         # If this is the selected workout plan in the profile, remove it
         profile = request.user.profile
-        if profile.workout_plan and profile.workout_plan.id == instance.workout_plan.id:
+        if profile.workout_plan_id and profile.workout_plan_id == instance.workout_plan_id:
             profile.workout_plan = None
             profile.save()
 
@@ -164,12 +192,13 @@ class UserWorkoutDetailView(generics.RetrieveUpdateDestroyAPIView):
         }, status=status.HTTP_204_NO_CONTENT)
 
 
-class VideoTutorialListView(generics.ListAPIView):
+class VideoTutorialListView(CatalogCacheMixin, generics.ListAPIView):
     """
     API view to list video tutorials for a workout plan
     """
     serializer_class = VideoTutorialSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_namespace = 'workout_plans'
 
     def get_queryset(self):
         workout_plan_id = self.kwargs.get('workout_plan_id')
@@ -193,13 +222,14 @@ class VideoTutorialListView(generics.ListAPIView):
         })
 
 
-class VideoTutorialDetailView(generics.RetrieveAPIView):
+class VideoTutorialDetailView(CatalogCacheMixin, generics.RetrieveAPIView):
     """
     API view to retrieve a specific video tutorial
     """
     queryset = VideoTutorial.objects.filter(is_active=True)
     serializer_class = VideoTutorialSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_namespace = 'workout_plans'
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -218,7 +248,7 @@ class SavedVideoListView(generics.ListCreateAPIView):
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'description']
     ordering_fields = ['created_at', 'title', 'category']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
 
     def get_queryset(self):
         queryset = SavedVideo.objects.filter(user=self.request.user)
@@ -247,10 +277,12 @@ class SavedVideoListView(generics.ListCreateAPIView):
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
         return Response({
             'message': 'Your video library retrieved successfully',
-            'data': serializer.data
+            'data': serializer.data,
+            'pagination': self.paginator.get_pagination_data()
         })
 
     def create(self, request, *args, **kwargs):
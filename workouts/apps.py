@@ -6,3 +6,16 @@ class WorkoutsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'workouts'
     verbose_name = _('Workouts')
+
+    def ready(self):
+        from smartfit import cache, images
+        from .models import (
+            Exercise, WorkoutPlan, WorkoutDay, WorkoutExercise, VideoTutorial
+        )
+
+        cache.register('workout_plans', [
+            Exercise, WorkoutPlan, WorkoutDay, WorkoutExercise, VideoTutorial
+        ])
+        images.register(Exercise, 'image')
+        images.register(WorkoutPlan, 'image')
+        images.register(VideoTutorial, 'thumbnail')
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0003_savedvideo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='savedvideo',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='savedvideo_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savedvideo',
+            index=models.Index(fields=['user', 'source_type', 'source_id'], name='savedvideo_user_source_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userworkout',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='userworkout_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userworkout',
+            index=models.Index(fields=['user', 'workout_plan'], name='userworkout_user_plan_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutplan',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='workoutplan_active_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutplan',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', '-created_at', '-id'], name='workoutplan_active_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutplan',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['difficulty', '-created_at', '-id'], name='workoutplan_active_diff_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutplan',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_featured', True)), fields=['-created_at', '-id'], name='workoutplan_active_feat_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Q, Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 
@@ -104,6 +106,20 @@ class Exercise(models.Model):
         return self.name
 
 
+class WorkoutPlanQuerySet(models.QuerySet):
+    """
+    QuerySet for workout plans
+    """
+    def with_days_count(self):
+        """Annotate each plan with the number of its days"""
+        # A correlated count rather than a join and GROUP BY, so a page of
+        # plans is read in index order and stops at the page size
+        days = WorkoutDay.objects.filter(
+            workout_plan=OuterRef('pk')
+        ).order_by().values('workout_plan').annotate(count=Count('pk')).values('count')
+        return self.annotate(days_count=Coalesce(Subquery(days), 0))
+
+
 class WorkoutPlan(models.Model):
     """
     Model for workout plans
@@ -137,10 +153,36 @@ class WorkoutPlan(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = WorkoutPlanQuerySet.as_manager()
+
     class Meta:
         verbose_name = _('Workout Plan')
         verbose_name_plural = _('Workout Plans')
         ordering = ['-created_at']
+        # Only active plans are listed, newest first, so the indexes are
+        # partial on is_active and end with the cursor keyset.
+        indexes = [
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=Q(is_active=True),
+                name='workoutplan_active_recent_idx'
+            ),
+            models.Index(
+                fields=['category', '-created_at', '-id'],
+                condition=Q(is_active=True),
+                name='workoutplan_active_cat_idx'
+            ),
+            models.Index(
+                fields=['difficulty', '-created_at', '-id'],
+                condition=Q(is_active=True),
+                name='workoutplan_active_diff_idx'
+            ),
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=Q(is_active=True, is_featured=True),
+                name='workoutplan_active_feat_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -320,6 +362,10 @@ class SavedVideo(models.Model):
         verbose_name_plural = _('Saved Videos')
         ordering = ['-created_at']
         unique_together = ['user', 'video_url']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='savedvideo_user_recent_idx'),
+            models.Index(fields=['user', 'source_type', 'source_id'], name='savedvideo_user_source_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.name} - {self.title}"
@@ -357,6 +403,10 @@ class UserWorkout(models.Model):
         verbose_name = _('User Workout')
         verbose_name_plural = _('User Workouts')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='userworkout_user_recent_idx'),
+            models.Index(fields=['user', 'workout_plan'], name='userworkout_user_plan_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.name} - {self.workout_plan.name}"
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from smartfit.fieldsets import SparseFieldsetSerializerMixin
+from smartfit.images import RenditionsField
 from .models import (
     Exercise, WorkoutPlan, WorkoutDay, WorkoutExercise,
     UserWorkout, VideoTutorial, SavedVideo, VideoCategory
@@ -11,14 +13,15 @@ class ExerciseSerializer(serializers.ModelSerializer):
     """
     body_part_display = serializers.CharField(source='get_body_part_display', read_only=True)
     difficulty_display = serializers.CharField(source='get_difficulty_display', read_only=True)
+    image_renditions = RenditionsField(source='image')
 
     class Meta:
         model = Exercise
         fields = [
             'id', 'name', 'description', 'body_part', 'body_part_display',
             'difficulty', 'difficulty_display', 'instructions', 'tips',
-            'image', 'video_url', 'equipment_needed', 'equipment_description',
-            'created_at', 'updated_at'
+            'image', 'image_renditions', 'video_url', 'equipment_needed',
+            'equipment_description', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
@@ -53,25 +56,34 @@ class WorkoutDaySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class WorkoutPlanListSerializer(serializers.ModelSerializer):
+class WorkoutPlanListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for listing workout plans
     """
     category_display = serializers.CharField(source='get_category_display', read_only=True)
     difficulty_display = serializers.CharField(source='get_difficulty_display', read_only=True)
     days_count = serializers.SerializerMethodField()
+    image_renditions = RenditionsField(source='image')
 
     class Meta:
         model = WorkoutPlan
         fields = [
             'id', 'name', 'description', 'category', 'category_display',
             'difficulty', 'difficulty_display', 'duration_weeks',
-            'sessions_per_week', 'minutes_per_session', 'image',
+            'sessions_per_week', 'minutes_per_session', 'image', 'image_renditions',
             'days_count', 'is_featured', 'is_active', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+        slim_fields = ['id', 'name', 'image_renditions', 'difficulty', 'duration_weeks']
+        field_columns = {
+            'category_display': ['category'],
+            'difficulty_display': ['difficulty'],
+        }
 
     def get_days_count(self, obj):
+        # Use the annotated count when the queryset provides it
+        if hasattr(obj, 'days_count'):
+            return obj.days_count
         return obj.days.count()
 
 
@@ -80,13 +92,15 @@ class VideoTutorialSerializer(serializers.ModelSerializer):
     Serializer for video tutorials
     """
     duration_display = serializers.CharField(source='get_duration_display', read_only=True)
+    thumbnail_renditions = RenditionsField(source='thumbnail')
 
     class Meta:
         model = VideoTutorial
         fields = [
             'id', 'title', 'description', 'video_url', 'duration_minutes',
-            'duration_seconds', 'duration_display', 'thumbnail', 'order',
-            'is_featured', 'is_active', 'created_at', 'updated_at'
+            'duration_seconds', 'duration_display', 'thumbnail',
+            'thumbnail_renditions', 'order', 'is_featured', 'is_active',
+            'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
@@ -99,6 +113,7 @@ class WorkoutPlanDetailSerializer(serializers.ModelSerializer):
     difficulty_display = serializers.CharField(source='get_difficulty_display', read_only=True)
     days = WorkoutDaySerializer(many=True, read_only=True)
     video_tutorials = VideoTutorialSerializer(many=True, read_only=True)
+    image_renditions = RenditionsField(source='image')
 
     class Meta:
         model = WorkoutPlan
@@ -106,8 +121,8 @@ class WorkoutPlanDetailSerializer(serializers.ModelSerializer):
             'id', 'name', 'description', 'category', 'category_display',
             'difficulty', 'difficulty_display', 'duration_weeks',
             'sessions_per_week', 'minutes_per_session', 'goal',
-            'image', 'days', 'video_tutorials', 'is_featured', 'is_active',
-            'created_at', 'updated_at'
+            'image', 'image_renditions', 'days', 'video_tutorials', 'is_featured',
+            'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
@@ -1,3 +1,129 @@
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from .models import (
+    Exercise, WorkoutPlan, WorkoutDay, WorkoutExercise, VideoTutorial
+)
 
-# Create your tests here.
+User = get_user_model()
+
+
+def create_workout_plan(days, exercises_per_day, videos=2):
+    """Create an active workout plan with the given number of days and exercises"""
+    plan = WorkoutPlan.objects.create(
+        name=f'Plan {days}x{exercises_per_day}',
+        description='Test workout plan'
+    )
+    for day_number in range(1, days + 1):
+        day = WorkoutDay.objects.create(
+            workout_plan=plan,
+            day_number=day_number,
+            name=f'Day {day_number}'
+        )
+        for order in range(1, exercises_per_day + 1):
+            exercise = Exercise.objects.create(
+                name=f'Exercise {day_number}-{order}',
+                description='Test exercise',
+                instructions='Do it'
+            )
+            WorkoutExercise.objects.create(
+                workout_day=day,
+                exercise=exercise,
+                order=order
+            )
+    for order in range(1, videos + 1):
+        VideoTutorial.objects.create(
+            workout_plan=plan,
+            title=f'Video {order}',
+            description='Test video',
+            video_url=f'https://example.com/videos/{plan.id}/{order}',
+            order=order
+        )
+    return plan
+
+
+class WorkoutPlanDetailAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='athlete@example.com',
+            name='Athlete',
+            password='AthletePassword123!'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_plan_detail_returns_full_tree(self):
+        """Test that the plan detail includes days, exercises and videos"""
+        plan = create_workout_plan(days=2, exercises_per_day=3)
+        url = reverse('workouts:api:plan_detail', kwargs={'pk': plan.id})
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = response.data['data']
+        self.assertEqual(len(data['days']), 2)
+        self.assertEqual(len(data['days'][0]['exercises']), 3)
+        self.assertEqual(data['days'][0]['exercises'][0]['exercise']['name'], 'Exercise 1-1')
+        self.assertEqual(len(data['video_tutorials']), 2)
+
+    def test_plan_detail_query_count_is_constant(self):
+        """Test that the plan detail query count does not grow with the plan size"""
+        # Freshness check, plan, days, exercises joined with their exercise,
+        # video tutorials
+        expected_queries = 5
+
+        for days, exercises_per_day in [(1, 1), (3, 5), (6, 7), (7, 12)]:
+            plan = create_workout_plan(days=days, exercises_per_day=exercises_per_day)
+            url = reverse('workouts:api:plan_detail', kwargs={'pk': plan.id})
+
+            with self.subTest(days=days, exercises_per_day=exercises_per_day):
+                with self.assertNumQueries(expected_queries):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                exercises_count = sum(
+                    len(day['exercises']) for day in response.data['data']['days']
+                )
+                self.assertEqual(exercises_count, days * exercises_per_day)
+
+    def test_shared_exercise_change_changes_the_etag(self):
+        """Test that editing an exercise used by the plan invalidates its ETag"""
+        plan = create_workout_plan(days=2, exercises_per_day=2)
+        url = reverse('workouts:api:plan_detail', kwargs={'pk': plan.id})
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+
+        exercise = Exercise.objects.get(name='Exercise 2-2')
+        exercise.instructions = 'Do it slowly'
+        exercise.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_removed_video_changes_the_etag(self):
+        """Test that deleting a video tutorial of the plan invalidates its ETag"""
+        plan = create_workout_plan(days=3, exercises_per_day=4, videos=3)
+        url = reverse('workouts:api:plan_detail', kwargs={'pk': plan.id})
+        etag = self.client.get(url)['ETag']
+
+        # Deleting the oldest video leaves the latest updated_at unchanged
+        VideoTutorial.objects.filter(workout_plan=plan, order=1).delete()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['data']['video_tutorials']), 2)
+
+    def test_inactive_plan_is_not_found(self):
+        """Test that inactive plans are not exposed through the detail endpoint"""
+        plan = create_workout_plan(days=1, exercises_per_day=1)
+        plan.is_active = False
+        plan.save()
+        url = reverse('workouts:api:plan_detail', kwargs={'pk': plan.id})
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)